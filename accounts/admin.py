@@ -3,7 +3,15 @@ Admin configuration for accounts app.
 """
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User
+from .models import FaceProfile, User
+
+
+class FaceProfileInline(admin.StackedInline):
+    """Registration photo (the embedding is recomputed from it on the next login)"""
+    model = FaceProfile
+    fields = ('image', 'model_name', 'updated_at')
+    readonly_fields = ('model_name', 'updated_at')
+    can_delete = False
 
 
 @admin.register(User)
@@ -13,10 +21,11 @@ class UserAdmin(BaseUserAdmin):
     list_filter = ('user_type', 'user_login', 'register_time')
     search_fields = ('email', 'name')
     ordering = ('-register_time',)
+    inlines = (FaceProfileInline,)
     
     fieldsets = (
         (None, {'fields': ('email', 'password')}),
-        ('Personal info', {'fields': ('name', 'user_image', 'user_type')}),
+        ('Personal info', {'fields': ('name', 'user_type')}),
         ('Permissions', {'fields': ('is_active', 'is_staff', 'is_superuser')}),
         ('Exam Credits', {'fields': ('examcredits',)}),
         ('Login Status', {'fields': ('user_login',)}),
@@ -0,0 +1,24 @@
+"""
+Authentication backend that keeps the per-request user lookup small.
+"""
+from django.contrib.auth.backends import ModelBackend
+
+from .models import User
+
+# Columns read on the request path (request.user, decorators, session context, logout).
+# password is needed for the session auth hash check; anything else is loaded on access.
+REQUEST_USER_FIELDS = (
+    'uid', 'password', 'email', 'name', 'user_type', 'user_login',
+    'is_active', 'is_staff', 'is_superuser',
+)
+
+
+class RequestUserBackend(ModelBackend):
+    """ModelBackend whose get_user (run by AuthenticationMiddleware) loads only REQUEST_USER_FIELDS"""
+
+    def get_user(self, user_id):
+        try:
+            user = User.objects.only(*REQUEST_USER_FIELDS).get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
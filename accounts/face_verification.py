@@ -0,0 +1,233 @@
+"""
+Face verification against a stored reference embedding.
+
+The registration photo (FaceProfile.image, exposed as User.user_image) is embedded
+once (at registration, or lazily on the first login for older accounts) and kept in
+the same FaceProfile row as a float32 vector together with the sha256 of the image it
+came from; a changed photo no longer matches the hash and is re-embedded. A login
+then only embeds the live capture and compares the two vectors, instead of running
+DeepFace.verify on both images.
+
+The VGG-Face model is built once per process and warmed up at worker start
+(warmup(), called from the WSGI/ASGI entry points). Embeddings run under a
+semaphore of FACE_VERIFICATION_CONCURRENCY slots, so a login burst queues for
+up to FACE_VERIFICATION_QUEUE_TIMEOUT seconds instead of oversubscribing the CPU.
+"""
+import base64
+import hashlib
+import inspect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from proctoring import metrics
+from .models import FaceProfile
+
+logger = logging.getLogger(__name__)
+
+try:
+    from deepface import DeepFace
+except ImportError:
+    DeepFace = None
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:
+    cv2 = None
+    np = None
+
+MODEL_NAME = "VGG-Face"
+
+
+class FaceVerificationUnavailable(Exception):
+    """DeepFace/OpenCV is missing or the reference photo cannot be used."""
+
+
+class FaceVerificationBusy(Exception):
+    """No embedding slot became free within FACE_VERIFICATION_QUEUE_TIMEOUT."""
+
+
+_model = None
+_model_lock = threading.Lock()
+_represent_takes_model = None
+_slots = threading.BoundedSemaphore(max(1, getattr(settings, "FACE_VERIFICATION_CONCURRENCY", 2)))
+_waiting = 0
+_busy_rejections = 0
+_wait_time = metrics.RollingWindow()
+_embed_time = metrics.RollingWindow()
+_verify_time = metrics.RollingWindow()
+
+
+def is_available():
+    return DeepFace is not None and cv2 is not None
+
+
+def image_hash(image_b64):
+    return hashlib.sha256(image_b64.encode("ascii", "ignore")).hexdigest()
+
+
+def decode_image(image_b64):
+    """BGR array from a base64 image, or None if it cannot be decoded."""
+    try:
+        data = np.frombuffer(base64.b64decode(image_b64), np.uint8)
+    except (ValueError, TypeError):
+        return None
+    image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+    if image is None or image.size == 0:
+        return None
+    return image
+
+
+def get_model():
+    """The process-wide VGG-Face model, built on first use."""
+    global _model, _represent_takes_model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                try:
+                    model = DeepFace.build_model(model_name=MODEL_NAME)
+                except TypeError:
+                    # Newer DeepFace: build_model(task, model_name)
+                    model = DeepFace.build_model(task="facial_recognition", model_name=MODEL_NAME)
+                # Older DeepFace rebuilds the model on every call unless it is passed in;
+                # newer versions cache built models themselves and take no model argument
+                _represent_takes_model = "model" in inspect.signature(DeepFace.represent).parameters
+                _model = model
+    return _model
+
+
+@contextmanager
+def _embedding_slot(timings):
+    global _waiting, _busy_rejections
+    started = time.monotonic()
+    _waiting += 1
+    try:
+        acquired = _slots.acquire(timeout=getattr(settings, "FACE_VERIFICATION_QUEUE_TIMEOUT", 30))
+    finally:
+        _waiting -= 1
+    timings["wait"] = time.monotonic() - started
+    _wait_time.add(timings["wait"])
+    if not acquired:
+        _busy_rejections += 1
+        raise FaceVerificationBusy("Face verification is busy, please try again")
+    try:
+        yield
+    finally:
+        _slots.release()
+
+
+def compute_embedding(image, timings=None):
+    """
+    float32 embedding of the (first) face in a BGR image.
+    If a timings dict is given, the slot wait and embedding time (seconds) are stored in it.
+    """
+    if not is_available():
+        raise FaceVerificationUnavailable("DeepFace/OpenCV not installed")
+    timings = {} if timings is None else timings
+    model = get_model()
+    kwargs = {"model": model} if _represent_takes_model else {}
+    with _embedding_slot(timings):
+        started = time.monotonic()
+        result = DeepFace.represent(image, model_name=MODEL_NAME, enforce_detection=False, **kwargs)
+        timings["embed"] = time.monotonic() - started
+        _embed_time.add(timings["embed"])
+    # Newer DeepFace returns one dict per detected face, older versions the vector itself
+    if isinstance(result, list) and result and isinstance(result[0], dict):
+        result = result[0]["embedding"]
+    return np.asarray(result, dtype=np.float32)
+
+
+def cosine_distance(a, b):
+    return float(1.0 - np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-10))
+
+
+def store_reference_embedding(user):
+    """Embed user.user_image and save it as the user's FaceProfile; returns the embedding or None."""
+    image = decode_image(user.user_image) if user.user_image else None
+    if image is None:
+        return None
+    embedding = compute_embedding(image)
+    user.face_profile, _ = FaceProfile.objects.update_or_create(
+        user=user,
+        defaults={
+            "embedding": embedding.astype("<f4").tobytes(),
+            "model_name": MODEL_NAME,
+            "image_hash": image_hash(user.user_image),
+        },
+    )
+    return embedding
+
+
+def get_reference_embedding(user):
+    """The stored embedding for user.user_image, recomputed if missing or stale."""
+    try:
+        profile = user.face_profile
+    except FaceProfile.DoesNotExist:
+        profile = None
+    if (profile is not None and profile.embedding is not None and profile.model_name == MODEL_NAME
+            and profile.image_hash == image_hash(profile.image)):
+        return np.frombuffer(bytes(profile.embedding), dtype="<f4")
+    embedding = store_reference_embedding(user)
+    if embedding is None:
+        raise FaceVerificationUnavailable("Stored face image could not be decoded")
+    return embedding
+
+
+def verify(live_image, user):
+    """
+    Compare a decoded live capture against the user's reference embedding.
+    Returns {"verified", "distance", "threshold"} like DeepFace.verify, plus
+    "timings" (seconds): reference lookup, slot wait and embedding of the live capture.
+    """
+    started = time.monotonic()
+    reference = get_reference_embedding(user)
+    timings = {"reference": time.monotonic() - started}
+    embedding = compute_embedding(live_image, timings)
+    distance = cosine_distance(embedding, reference)
+    threshold = getattr(settings, "FACE_VERIFICATION_THRESHOLD", 0.40)
+    _verify_time.add(time.monotonic() - started)
+    return {
+        "verified": distance <= threshold,
+        "distance": distance,
+        "threshold": threshold,
+        "timings": timings,
+    }
+
+
+def warmup(background=True):
+    """Build the model and run one dummy embedding so the first login is not slow."""
+    if not is_available() or not getattr(settings, "FACE_VERIFICATION_ENABLED", True) \
+            or not getattr(settings, "FACE_VERIFICATION_WARMUP", True):
+        return
+
+    def run():
+        started = time.monotonic()
+        try:
+            compute_embedding(np.zeros((224, 224, 3), dtype=np.uint8))
+            logger.info("Face verification model warmed up in %.2fs", time.monotonic() - started)
+        except Exception as e:
+            logger.warning("Face verification warm-up failed: %s", e)
+
+    if background:
+        threading.Thread(target=run, name="face-verification-warmup", daemon=True).start()
+    else:
+        run()
+
+
+def stats():
+    return {
+        "model_loaded": _model is not None,
+        "concurrency": getattr(settings, "FACE_VERIFICATION_CONCURRENCY", 2),
+        "waiting": _waiting,
+        "busy_rejections": _busy_rejections,
+        "wait_ms": _wait_time.summary(scale=1000),
+        "embed_ms": _embed_time.summary(scale=1000),
+        "verify_ms": _verify_time.summary(scale=1000),
+    }
+
+
+metrics.register("face_verification", stats)
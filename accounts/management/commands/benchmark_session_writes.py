@@ -0,0 +1,120 @@
+"""
+Django management command to compare session writes under simulated exam traffic:
+Django's SessionMiddleware with SESSION_SAVE_EVERY_REQUEST (before) against
+LazySessionMiddleware saving only changed sessions (after). Each student sends
+heartbeats and answer syncs, and changes a bookmark every --bookmark-every requests;
+the bookmarks read back from the session store are checked at the end.
+Rows are generated inside a transaction that is rolled back, so the database is unchanged.
+Usage: python manage.py benchmark_session_writes [--students 50] [--requests 40]
+       [--bookmark-every 10]
+"""
+import json
+import time
+
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from accounts.middleware import LazySessionMiddleware
+from accounts.models import User
+from exams.models import Question, StudentTestInfo, Teacher
+
+TEST_ID = "BENCH-SESSIONS"
+QIDS = [str(i) for i in range(1, 11)]
+
+
+def _path(cls):
+    return f"{cls.__module__}.{cls.__name__}"
+
+
+def _middleware(session_class):
+    return [_path(session_class) if "SessionMiddleware" in entry else entry for entry in settings.MIDDLEWARE]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare django_session writes per request: save every request vs only changed sessions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=50, help="Simulated students")
+        parser.add_argument("--requests", type=int, default=40, help="Requests per student")
+        parser.add_argument("--bookmark-every", type=int, default=10,
+                            help="Every Nth request of a student changes a bookmark")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise Rollback
+        except Rollback:
+            self.stdout.write("Synthetic rows rolled back.")
+
+    def _run(self, options):
+        teacher = User.objects.create_user(email="bench-teacher@sessions.invalid", password="!",
+                                           name="Bench", user_type="teacher", user_image="")
+        Teacher.objects.create(email=teacher.email, test_id=TEST_ID, test_type="objective", end=timezone.now(),
+                               duration=60, password="!", subject="bench", topic="bench", uid=teacher)
+        Question.objects.bulk_create([
+            Question(test_id=TEST_ID, qid=qid, q="q", a="a", b="b", c="c", d="d", ans="a", marks=1, uid=teacher)
+            for qid in QIDS
+        ])
+        students = [
+            User.objects.create_user(email=f"bench-{i}@sessions.invalid", password="!",
+                                     name=f"Bench {i}", user_type="student", user_image="")
+            for i in range(options["students"])
+        ]
+        StudentTestInfo.objects.bulk_create([
+            StudentTestInfo(email=s.email, test_id=TEST_ID, uid=s, time_left=3600) for s in students
+        ])
+
+        runs = (
+            ("before", SessionMiddleware, True),
+            ("after", LazySessionMiddleware, False),
+        )
+        for label, session_class, save_every_request in runs:
+            with override_settings(MIDDLEWARE=_middleware(session_class),
+                                   SESSION_SAVE_EVERY_REQUEST=save_every_request):
+                writes, requests, elapsed, lost = self._simulate(students, options)
+            self.stdout.write(
+                f"{label:6}  {requests} requests  {writes} session writes  "
+                f"({writes / requests:.3f}/request, {writes / elapsed:8.1f} writes/s at "
+                f"{requests / elapsed:6.1f} requests/s)  bookmarks lost: {lost}"
+            )
+        self.stdout.write(self.style.SUCCESS("Benchmark complete."))
+
+    def _simulate(self, students, options):
+        clients = []
+        for student in students:
+            client = Client()
+            client.force_login(student)
+            clients.append(client)
+        expected = {}
+        requests = 0
+        base = f"/give-test/{TEST_ID}/"
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for n in range(options["requests"]):
+                for i, client in enumerate(clients):
+                    if n % options["bookmark_every"] == options["bookmark_every"] - 1:
+                        bookmarks = [QIDS[(n + i) % len(QIDS)]]
+                        expected[i] = bookmarks
+                        client.post(base + "api/sync/", json.dumps({"bookmarks": bookmarks}),
+                                    content_type="application/json")
+                    elif n % 2:
+                        client.post(base + "api/sync/", json.dumps({"answers": []}), content_type="application/json")
+                    else:
+                        client.post(base + "heartbeat/")
+                    requests += 1
+            elapsed = time.perf_counter() - started
+        writes = sum(1 for q in queries.captured_queries
+                     if "django_session" in q["sql"] and q["sql"].lstrip().upper().startswith(("UPDATE", "INSERT")))
+        lost = sum(1 for i, bookmarks in expected.items()
+                   if clients[i].session.get("bookmarks", {}).get(TEST_ID) != bookmarks)
+        return writes, requests, elapsed, lost
@@ -0,0 +1,54 @@
+"""
+Django management command to measure what loading request.user reads from the database:
+the columns fetched by the auth backend, against the full user row with the registration
+photo that every request used to load before it moved to FaceProfile.
+Usage: python manage.py measure_request_user [--users 200] [--repeat 5]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from accounts.backends import REQUEST_USER_FIELDS, RequestUserBackend
+from accounts.models import User
+
+
+def _row_bytes(row):
+    return sum(len(value) if isinstance(value, (str, bytes)) else 8 for value in row if value is not None)
+
+
+class Command(BaseCommand):
+    help = "Report bytes read and time per request.user lookup, before/after deferring the user image"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200, help="Number of users to sample")
+        parser.add_argument("--repeat", type=int, default=5, help="Lookups per user")
+
+    def handle(self, *args, **options):
+        uids = list(User.objects.order_by("uid").values_list("uid", flat=True)[:options["users"]])
+        if not uids:
+            self.stdout.write(self.style.WARNING("No users to measure."))
+            return
+
+        full_fields = [f.attname for f in User._meta.concrete_fields] + ["face_profile__image"]
+        before = sum(_row_bytes(User.objects.filter(pk=uid).values_list(*full_fields).first()) for uid in uids)
+        after = sum(_row_bytes(User.objects.filter(pk=uid).values_list(*REQUEST_USER_FIELDS).first()) for uid in uids)
+
+        def timed(load):
+            started = time.perf_counter()
+            for _ in range(options["repeat"]):
+                for uid in uids:
+                    load(uid)
+            return (time.perf_counter() - started) * 1000 / (options["repeat"] * len(uids))
+
+        backend = RequestUserBackend()
+        before_ms = timed(lambda uid: User.objects.select_related("face_profile").defer(
+            "face_profile__embedding").get(pk=uid))
+        after_ms = timed(backend.get_user)
+
+        self.stdout.write(f"{len(uids)} users on {connection.vendor}")
+        self.stdout.write(f"before: {before / len(uids):10.0f} bytes/request  {before_ms:6.3f} ms/lookup "
+                          f"(full row + image)")
+        self.stdout.write(f"after:  {after / len(uids):10.0f} bytes/request  {after_ms:6.3f} ms/lookup "
+                          f"({len(REQUEST_USER_FIELDS)} columns)")
+        self.stdout.write(self.style.SUCCESS("Done."))
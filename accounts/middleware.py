@@ -0,0 +1,28 @@
+"""
+Session middleware that only writes sessions that changed.
+
+With SESSION_SAVE_EVERY_REQUEST every frame upload, heartbeat and AJAX call rewrote the
+session row. LazySessionMiddleware saves a session when it was modified (as Django does
+without SESSION_SAVE_EVERY_REQUEST) and extends the expiry of a session that was read
+at most once per SESSION_REFRESH_INTERVAL seconds, by touching a timestamp in it.
+Views that change session data must assign to request.session (or set .modified).
+"""
+import time
+
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+
+REFRESHED_KEY = "_refreshed_at"
+
+
+class LazySessionMiddleware(SessionMiddleware):
+
+    def process_response(self, request, response):
+        session = getattr(request, "session", None)
+        if session is not None and session.accessed and not session.is_empty():
+            now = int(time.time())
+            # Stamping a session that is saved anyway costs nothing
+            if session.modified or now - session.get(REFRESHED_KEY, 0) >= \
+                    getattr(settings, "SESSION_REFRESH_INTERVAL", 3600):
+                session[REFRESHED_KEY] = now
+        return super().process_response(request, response)
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_add_last_login_and_auth_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FaceProfile',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='face_profile', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('embedding', models.BinaryField()),
+                ('model_name', models.CharField(max_length=50)),
+                ('image_hash', models.CharField(max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'face_profiles',
+            },
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:24
+
+from django.db import migrations, models
+
+
+def copy_images_to_profiles(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    FaceProfile = apps.get_model('accounts', 'FaceProfile')
+    existing = set(FaceProfile.objects.values_list('user_id', flat=True))
+    new_profiles = []
+    for uid, image in User.objects.exclude(user_image='').values_list('uid', 'user_image').iterator():
+        if uid in existing:
+            FaceProfile.objects.filter(user_id=uid).update(image=image)
+        else:
+            new_profiles.append(FaceProfile(user_id=uid, image=image))
+    FaceProfile.objects.bulk_create(new_profiles, batch_size=200)
+
+
+def copy_images_to_users(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    FaceProfile = apps.get_model('accounts', 'FaceProfile')
+    for uid, image in FaceProfile.objects.exclude(image='').values_list('user_id', 'image').iterator():
+        User.objects.filter(uid=uid).update(user_image=image)
+    # Profiles that only held the photo have no embedding, which 0003 requires
+    FaceProfile.objects.filter(embedding__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_faceprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='faceprofile',
+            name='image',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AlterField(
+            model_name='faceprofile',
+            name='embedding',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='faceprofile',
+            name='image_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='faceprofile',
+            name='model_name',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        # Gives the column a default so the migration can be reversed
+        migrations.AlterField(
+            model_name='user',
+            name='user_image',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(copy_images_to_profiles, copy_images_to_users),
+        migrations.RemoveField(
+            model_name='user',
+            name='user_image',
+        ),
+    ]
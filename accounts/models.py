@@ -13,9 +13,12 @@ class UserManager(BaseUserManager):
         if not email:
             raise ValueError('The Email field must be set')
         email = self.normalize_email(email)
+        user_image = extra_fields.pop('user_image', '')
         user = self.model(email=email, **extra_fields)
         user.set_password(password)
         user.save(using=self._db)
+        if user_image:
+            user.set_user_image(user_image)
         return user
 
     def create_superuser(self, email, password=None, **extra_fields):
@@ -31,7 +34,6 @@ class User(AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(unique=True, max_length=100)
     register_time = models.DateTimeField(auto_now_add=True)
     user_type = models.CharField(max_length=25)  # 'student' or 'teacher'
-    user_image = models.TextField()  # Base64 encoded image
     user_login = models.IntegerField(default=0)
     examcredits = models.IntegerField(default=7, validators=[MinValueValidator(0)])
     
@@ -51,3 +53,32 @@ class User(AbstractBaseUser, PermissionsMixin):
     
     def __str__(self):
         return f"{self.name} ({self.email})"
+
+    @property
+    def user_image(self):
+        """Base64 registration photo, stored in FaceProfile and only loaded when accessed"""
+        try:
+            return self.face_profile.image
+        except FaceProfile.DoesNotExist:
+            return ''
+
+    def set_user_image(self, image):
+        """Store a new registration photo; its embedding is recomputed on the next verification"""
+        profile, _ = FaceProfile.objects.update_or_create(user=self, defaults={'image': image})
+        self.face_profile = profile
+
+
+class FaceProfile(models.Model):
+    """Registration photo and the reference face embedding computed from it"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='face_profile')
+    image = models.TextField(blank=True, default='')  # Base64 encoded image (kept off the users row)
+    embedding = models.BinaryField(null=True)  # little-endian float32 vector
+    model_name = models.CharField(max_length=50, blank=True, default='')
+    image_hash = models.CharField(max_length=64, blank=True, default='')  # sha256 of the image the embedding was computed from
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'face_profiles'
+
+    def __str__(self):
+        return f"FaceProfile({self.user_id}, {self.model_name})"
@@ -20,7 +20,8 @@ from django.views.decorators.http import require_GET, require_POST, require_http
 logger = logging.getLogger(__name__)
 
 from .models import User
-from exams.models import StudentTestInfo, Teacher
+from . import face_verification
+from exams.models import StudentTestInfo, Teacher, TestResult
 from .forms import (
     RegisterForm,
     LoginForm,
@@ -186,6 +187,14 @@ def verify_email_view(request):
             messages.error(request, f"Error creating account: {str(e)}. Please try again.")
             return redirect("register")
 
+        # Embed the registration photo once so logins only embed the live capture
+        if getattr(settings, 'FACE_VERIFICATION_ENABLED', True) and face_verification.is_available() \
+                and dbImgdata != PLACEHOLDER_IMAGE_B64:
+            try:
+                face_verification.store_reference_embedding(user)
+            except Exception as e:
+                logger.warning("Could not compute face embedding at registration (email=%s): %s", user.email, e)
+
         for key in ["tempName", "tempEmail", "tempPassword", "tempUT", "tempImage", "tempOTP", "show_temp_otp"]:
             request.session.pop(key, None)
 
@@ -219,7 +228,11 @@ def login_view(request):
 
             db_lookup_start = time.time()
             try:
-                user = User.objects.get(email=email, user_type=user_type)
+                users = User.objects.all()
+                if imgdata1 and getattr(settings, 'FACE_VERIFICATION_ENABLED', True):
+                    # The stored photo and embedding are only needed when verifying a face
+                    users = users.select_related("face_profile")
+                user = users.get(email=email, user_type=user_type)
             except User.DoesNotExist:
                 messages.error(request, "Invalid email, user type, or password.")
                 logger.info("Login failed: user not found (email=%s)", email)
@@ -236,6 +249,7 @@ def login_view(request):
             # Face verification - required for security
             verified = False  # Start as False, must be verified to pass
             face_error = None
+            face_timings = {}
             if getattr(settings, 'FACE_VERIFICATION_ENABLED', True) and user.user_image and imgdata1:
                 face_start = time.time()
                 try:
@@ -252,17 +266,16 @@ def login_view(request):
                         if DEEPFACE_AVAILABLE and CV2_AVAILABLE:
                             try:
                                 nparr1 = np.frombuffer(base64.b64decode(imgdata1), np.uint8)
-                                nparr2 = np.frombuffer(base64.b64decode(user.user_image), np.uint8)
-
                                 im1 = cv2.imdecode(nparr1, cv2.IMREAD_COLOR)
-                                im2 = cv2.imdecode(nparr2, cv2.IMREAD_COLOR)
 
-                                if im1 is None or im2 is None or im1.size == 0 or im2.size == 0:
+                                if im1 is None or im1.size == 0:
                                     face_error = "Failed to decode images - invalid format"
                                     logger.warning("Face verification failed: image decode failed (email=%s)", email)
                                 else:
-                                    # Try face verification with VGG-Face model
-                                    result = DeepFace.verify(im1, im2, enforce_detection=False, model_name='VGG-Face')
+                                    # VGG-Face: only the live capture is embedded, the stored
+                                    # photo's embedding is cached in FaceProfile
+                                    result = face_verification.verify(im1, user)
+                                    face_timings = result.get("timings", {})
                                     verified = bool(result.get("verified", False))
                                     confidence = result.get("distance", 1.0)
 
@@ -275,6 +288,12 @@ def login_view(request):
                                         logger.info("Face verification: allowing login with acceptable confidence (email=%s, distance=%.3f)",
                                                   email, confidence)
 
+                            except face_verification.FaceVerificationBusy:
+                                # All embedding slots stayed taken: ask the student to retry
+                                # rather than falling back to the weaker pixel comparison
+                                face_error = "Face verification is busy, please try again in a moment"
+                                logger.warning("Face verification busy (email=%s)", email)
+                                verified = False
                             except Exception as e:
                                 face_error = f"Face verification failed: {str(e)[:100]}"
                                 logger.error("DeepFace verification error (email=%s): %s", email, e)
@@ -317,8 +336,11 @@ def login_view(request):
 
             total_time = time.time() - start_time
             logger.info(
-                "Login timing (email=%s): db=%.3fs pw=%.3fs face=%.3fs total=%.3fs",
-                email, db_lookup_time, pw_check_time, face_time, total_time,
+                "Login timing (email=%s): db=%.3fs pw=%.3fs face=%.3fs "
+                "(ref=%.3fs wait=%.3fs embed=%.3fs) total=%.3fs",
+                email, db_lookup_time, pw_check_time, face_time,
+                face_timings.get("reference", 0.0), face_timings.get("wait", 0.0),
+                face_timings.get("embed", 0.0), total_time,
             )
 
             if not verified:
@@ -477,30 +499,30 @@ def student_test_history_view(request):
     """Student exam history: list of tests the student has taken (from StudentTestInfo + Teacher)."""
     if request.user.user_type != "student":
         return redirect("professor_index")
-    sti_list = StudentTestInfo.objects.filter(email=request.user.email).order_by("-stiid")
-    tests = []
-    for sti in sti_list:
-        teacher = Teacher.objects.filter(test_id=sti.test_id).first()
-        if teacher:
-            tests.append({
-                "test_id": sti.test_id,
-                "subject": teacher.subject,
-                "topic": teacher.topic,
-            })
-    return render(request, "student_test_history.html", {"tests": tests})
+    return render(request, "student_test_history.html", {"tests": _student_tests_list(request)})
 
 
 def _student_tests_list(request):
-    """Shared: list of tests (test_id, subject, topic) for current student from StudentTestInfo + Teacher."""
-    sti_list = StudentTestInfo.objects.filter(email=request.user.email).order_by("-stiid")
+    """
+    Shared: tests (test_id, subject, topic, result) for the current student from StudentTestInfo,
+    Teacher and TestResult; result is set once the attempt is completed.
+    """
+    sti_list = list(StudentTestInfo.objects.filter(email=request.user.email).order_by("-stiid"))
+    test_ids = {sti.test_id for sti in sti_list}
+    teachers = {}
+    for teacher in Teacher.objects.filter(test_id__in=test_ids).order_by("-tid"):
+        # Same record as .filter(test_id=...).first() would give for duplicated test ids
+        teachers[teacher.test_id] = teacher
+    scores = {r.test_id: r for r in TestResult.objects.filter(email=request.user.email, test_id__in=test_ids)}
     results = []
     for sti in sti_list:
-        teacher = Teacher.objects.filter(test_id=sti.test_id).first()
+        teacher = teachers.get(sti.test_id)
         if teacher:
             results.append({
                 "test_id": sti.test_id,
                 "subject": teacher.subject,
                 "topic": teacher.topic,
+                "result": scores.get(sti.test_id) if sti.completed else None,
             })
     return results
 
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark for camera.get_frame on sample images.
+
+Times the per-frame latency of the current camera.py and, with --before REF, of
+camera.py as it was at git revision REF, on the same frames and in the same process.
+
+Usage: python benchmark_camera.py FRAMES_DIR [--before REF] [--repeat 5]
+"""
+import argparse
+import base64
+import glob
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png")
+
+
+def load_frames(directory):
+    paths = sorted(p for pattern in IMAGE_PATTERNS for p in glob.glob(os.path.join(directory, pattern)))
+    frames = []
+    for path in paths:
+        with open(path, "rb") as f:
+            frames.append(base64.b64encode(f.read()))
+    return frames
+
+
+def load_camera_at(ref):
+    """Import camera.py from a git revision as a separate module."""
+    source = subprocess.check_output(["git", "show", f"{ref}:camera.py"])
+    with tempfile.NamedTemporaryFile("wb", suffix=".py", delete=False) as f:
+        f.write(source)
+    spec = importlib.util.spec_from_file_location(f"camera_{ref.replace('/', '_')}", f.name)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    os.unlink(f.name)
+    return module
+
+
+def measure(get_frame, frames, repeat):
+    get_frame(frames[0])  # warm-up (model graphs, caches)
+    timings = []
+    for _ in range(repeat):
+        for frame in frames:
+            started = time.perf_counter()
+            get_frame(frame)
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "mean": sum(timings) / len(timings),
+        "p50": timings[len(timings) // 2],
+        "p99": timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+    }
+
+
+def report(label, result):
+    print(f"{label:<10} mean {result['mean']:8.2f} ms   p50 {result['p50']:8.2f} ms   p99 {result['p99']:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("frames", help="Directory of sample frames (jpg/png)")
+    parser.add_argument("--before", help="Git revision of camera.py to compare against")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the frame set")
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames)
+    if not frames:
+        sys.exit(f"No frames found in {args.frames}")
+    print(f"{len(frames)} frames x {args.repeat} passes")
+
+    if args.before:
+        report("before", measure(load_camera_at(args.before).get_frame, frames, args.repeat))
+
+    import camera
+    report("after", measure(camera.get_frame, frames, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
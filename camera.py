@@ -1,11 +1,12 @@
 from face_detector import get_face_detector, find_faces
-from face_landmarks import get_landmark_model, detect_marks
+from face_landmarks import get_landmark_model, detect_marks_batch
 import numpy as np
 import cv2
 import base64
 from PIL import Image
 from io import BytesIO
-import math
+import logging
+from collections import defaultdict, namedtuple
 
 # Gaze tracking is optional; provide a safe fallback if the external
 # library is not installed or is incompatible on this system.
@@ -29,7 +30,9 @@ except Exception:
             return False
 
 import wget
-from time import time
+from time import time, monotonic
+
+logger = logging.getLogger(__name__)
 
 gaze = GazeTracking()
 
@@ -184,6 +187,7 @@ def YoloOutput(filters, anchors, classes, name=None):
     return yolo_output
 
 def yolo_boxes(pred, anchors, classes):
+    import tensorflow as tf
     grid_size = tf.shape(pred)[1]
     box_xy, box_wh, objectness, class_probs = tf.split(
         pred, (2, 2, 1, classes), axis=-1)
@@ -265,229 +269,283 @@ def YoloV3(size=None, channels=3, anchors=yolo_anchors,
 # rest of the application working even if the model is incompatible
 # with the current TensorFlow/Keras version.
 _yolo_model = None
+_yolo_load_attempted = False
 
 
 def get_yolo_model():
-    """Return a singleton YOLO model instance or None on failure."""
-    global _yolo_model
-    if _yolo_model is not None:
+    """Return a singleton YOLO model instance or None on failure (not retried per frame)."""
+    global _yolo_model, _yolo_load_attempted
+    if _yolo_model is not None or _yolo_load_attempted:
         return _yolo_model
+    _yolo_load_attempted = True
     try:
         model = YoloV3()
         load_darknet_weights(model, 'models/yolov3.weights')
         _yolo_model = model
     except Exception as e:
         # Log the problem and disable YOLO-based checks, but don't crash
-        print(f"Warning: failed to initialize YOLO model: {e}")
+        logger.warning("Failed to initialize YOLO model: %s", e)
         _yolo_model = None
     return _yolo_model
 
-def get_2d_points(img, rotation_vector, translation_vector, camera_matrix, val):
-    """Return the 3D points present as 2D for making annotation box"""
-    point_3d = []
-    dist_coeffs = np.zeros((4,1))
-    rear_size = val[0]
-    rear_depth = val[1]
-    point_3d.append((-rear_size, -rear_size, rear_depth))
-    point_3d.append((-rear_size, rear_size, rear_depth))
-    point_3d.append((rear_size, rear_size, rear_depth))
-    point_3d.append((rear_size, -rear_size, rear_depth))
-    point_3d.append((-rear_size, -rear_size, rear_depth))
-    
-    front_size = val[2]
-    front_depth = val[3]
-    point_3d.append((-front_size, -front_size, front_depth))
-    point_3d.append((-front_size, front_size, front_depth))
-    point_3d.append((front_size, front_size, front_depth))
-    point_3d.append((front_size, -front_size, front_depth))
-    point_3d.append((-front_size, -front_size, front_depth))
-    # Use built-in float for compatibility with newer NumPy versions
-    point_3d = np.array(point_3d, dtype=float).reshape(-1, 3)
-    
-    (point_2d, _) = cv2.projectPoints(point_3d,
-                                      rotation_vector,
-                                      translation_vector,
-                                      camera_matrix,
-                                      dist_coeffs)
-    point_2d = np.int32(point_2d.reshape(-1, 2))
-    return point_2d
-
-def draw_annotation_box(img, rotation_vector, translation_vector, camera_matrix,
-                        rear_size=300, rear_depth=0, front_size=500, front_depth=400,
-                        color=(255, 255, 0), line_width=2):
-    rear_size = 1
-    rear_depth = 0
-    front_size = img.shape[1]
-    front_depth = front_size*2
-    val = [rear_size, rear_depth, front_size, front_depth]
-    point_2d = get_2d_points(img, rotation_vector, translation_vector, camera_matrix, val)
-    
-def head_pose_points(img, rotation_vector, translation_vector, camera_matrix):
-    rear_size = 1
-    rear_depth = 0
-    front_size = img.shape[1]
-    front_depth = front_size*2
-    val = [rear_size, rear_depth, front_size, front_depth]
-    point_2d = get_2d_points(img, rotation_vector, translation_vector, camera_matrix, val)
-    y = (point_2d[5] + point_2d[8])//2
-    x = point_2d[2]
-    
-    return (x, y)
-
-face_model = get_face_detector()
-landmark_model = get_landmark_model()
-    
-def get_frame(imgData):
-    nparr = np.frombuffer(base64.b64decode(imgData), np.uint8)
-    image = cv2.imdecode(nparr, cv2.COLOR_BGR2GRAY)
-    ret = True
-
-    size = image.shape
-    font = cv2.FONT_HERSHEY_SIMPLEX 
-    model_points = np.array([
-                        (0.0, 0.0, 0.0),             # Nose tip
-                        (0.0, -330.0, -65.0),        # Chin
-                        (-225.0, 170.0, -135.0),     # Left eye left corner
-                        (225.0, 170.0, -135.0),      # Right eye right corne
-                        (-150.0, -150.0, -125.0),    # Left Mouth corner
-                        (150.0, -150.0, -125.0)      # Right mouth corner
-                    ])
-
-    focal_length = size[1]
-    center = (size[1]/2, size[0]/2)
-    camera_matrix = np.array(
-                     [[focal_length, 0, center[0]],
-                     [0, focal_length, center[1]],
-                     [0, 0, 1]], dtype = "double"
-                     )
-
-    img = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    img = cv2.resize(img, (320, 320))
-    img = img.astype(np.float32)
-    img = np.expand_dims(img, 0)
-    img = img / 255
-
-    # Default statuses in case YOLO is unavailable
-    mob_status = 0
-    person_status = 0
-
-    yolo_model = get_yolo_model()
-    if yolo_model is not None:
-        class_names = [c.strip() for c in open("models/classes.TXT").readlines()]
+CLASS_NAMES_PATH = "models/classes.TXT"
+PERSON_CLASS_ID = 0
+PHONE_CLASS_ID = 67
+HEAD_ANGLE_LIMIT = 48
+
+# 3D reference points of a generic head model, matched to the landmarks below
+MODEL_POINTS = np.array([
+    (0.0, 0.0, 0.0),             # Nose tip
+    (0.0, -330.0, -65.0),        # Chin
+    (-225.0, 170.0, -135.0),     # Left eye left corner
+    (225.0, 170.0, -135.0),      # Right eye right corner
+    (-150.0, -150.0, -125.0),    # Left Mouth corner
+    (150.0, -150.0, -125.0)      # Right mouth corner
+], dtype=np.float64)
+LANDMARK_IDS = [30, 8, 36, 45, 48, 54]
+NOSE_END_POINT = np.array([(0.0, 0.0, 1000.0)])
+# Recent OpenCV builds dropped the UPNP alias (it was EPnP internally)
+SOLVEPNP_FLAG = getattr(cv2, "SOLVEPNP_UPNP", cv2.SOLVEPNP_EPNP)
+
+# Camera matrix, distortion and projected points for one frame size
+Intrinsics = namedtuple("Intrinsics", ["camera_matrix", "dist_coeffs", "pose_points"])
+
+
+def rodrigues(rotation_vectors):
+    """Rotation matrices (N, 3, 3) for rotation vectors (N, 3), like cv2.Rodrigues."""
+    theta = np.linalg.norm(rotation_vectors, axis=1)
+    safe = np.where(theta > 1e-12, theta, 1.0)
+    k = rotation_vectors / safe[:, None]
+    zeros = np.zeros_like(theta)
+    cross = np.stack([
+        np.stack([zeros, -k[:, 2], k[:, 1]], axis=1),
+        np.stack([k[:, 2], zeros, -k[:, 0]], axis=1),
+        np.stack([-k[:, 1], k[:, 0], zeros], axis=1),
+    ], axis=1)
+    sin = np.sin(theta)[:, None, None]
+    cos = np.cos(theta)[:, None, None]
+    rotation = np.eye(3) + sin * cross + (1 - cos) * (cross @ cross)
+    rotation[theta <= 1e-12] = np.eye(3)
+    return rotation
+
+
+def project_points(points, rotation_vectors, translation_vectors, camera_matrix):
+    """
+    Project the same 3D points (M, 3) with N poses at once; returns (N, M, 2).
+    Equivalent to cv2.projectPoints per pose with zero distortion.
+    """
+    camera = rodrigues(rotation_vectors) @ points.T + translation_vectors[:, :, None]  # (N, 3, M)
+    pixels = camera_matrix @ camera
+    return (pixels[:, :2] / pixels[:, 2:3]).transpose(0, 2, 1)
+
+
+def _slope_angle(dy, dx):
+    """int(degrees(atan(dy / dx))) per element, 90 where dx == 0."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        angle = np.trunc(np.degrees(np.arctan(dy / np.where(dx == 0, 1, dx))))
+    return np.where(dx == 0, 90, angle).astype(int)
+
+
+def read_class_names(path=CLASS_NAMES_PATH):
+    try:
+        with open(path) as f:
+            return [c.strip() for c in f.readlines()]
+    except OSError as e:
+        logger.warning("Could not read class names from %s: %s", path, e)
+        return []
+
+
+class RateLimitedLogger:
+    """
+    Logs each event at most once per interval; repeats in between are counted and
+    reported as `suppressed=N` on the next emitted line. Fields are logged as
+    key=value and passed in `extra` for structured handlers.
+    """
+
+    def __init__(self, logger, interval=5.0):
+        self.logger = logger
+        self.interval = interval
+        self._last = {}
+        self._suppressed = defaultdict(int)
+
+    def event(self, name, level=logging.INFO, **fields):
+        now = monotonic()
+        last = self._last.get(name)
+        if last is not None and now - last < self.interval:
+            self._suppressed[name] += 1
+            return
+        self._last[name] = now
+        suppressed = self._suppressed.pop(name, 0)
+        if suppressed:
+            fields["suppressed"] = suppressed
+        self.logger.log(level, "%s %s", name, " ".join(f"{k}={v}" for k, v in fields.items()),
+                        extra={"event": name, "fields": fields})
+
+
+class FrameAnalyzer:
+    """
+    Per-frame proctoring analysis (objects, head pose, gaze).
+    Class names are read once and camera intrinsics are cached per frame size,
+    so a frame only pays for the models themselves.
+    """
+
+    def __init__(self, face_model=None, landmark_model=None, class_names_path=CLASS_NAMES_PATH,
+                 gaze_tracker=None, log_interval=5.0):
+        self.face_model = face_model if face_model is not None else get_face_detector()
+        self.landmark_model = landmark_model if landmark_model is not None else get_landmark_model()
+        self.class_names = read_class_names(class_names_path)
+        self.gaze = gaze_tracker if gaze_tracker is not None else gaze
+        self.log = RateLimitedLogger(logger, log_interval)
+        self._intrinsics = {}
+
+    def intrinsics(self, shape):
+        """Camera matrix (focal length = width, centre = image centre) for a frame size."""
+        key = shape[:2]
+        cached = self._intrinsics.get(key)
+        if cached is None:
+            height, width = key
+            camera_matrix = np.array([[width, 0, width / 2],
+                                      [0, width, height / 2],
+                                      [0, 0, 1]], dtype=np.float64)
+            # Nose direction followed by a box in front of the face, for the head-pose angles
+            box = np.array([(-1, -1, 0), (-1, 1, 0), (1, 1, 0), (1, -1, 0), (-1, -1, 0),
+                            (-width, -width, 2 * width), (-width, width, 2 * width),
+                            (width, width, 2 * width), (width, -width, 2 * width),
+                            (-width, -width, 2 * width)], dtype=np.float64)
+            cached = Intrinsics(camera_matrix, np.zeros((4, 1)), np.vstack([NOSE_END_POINT, box]))
+            self._intrinsics[key] = cached
+        return cached
+
+    def detect_objects(self, image):
+        """Returns (mob_status, person_status, annotated image); statuses are 0 without YOLO."""
+        yolo_model = get_yolo_model()
+        if yolo_model is None:
+            return 0, 0, image
+
+        img = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        img = cv2.resize(img, (320, 320))
+        img = np.expand_dims(img.astype(np.float32) / 255, 0)
         boxes, scores, classes, nums = yolo_model(img)
-        count = 0
-        for i in range(nums[0]):
-            if int(classes[0][i] == 0):
-                count += 1
-            if int(classes[0][i] == 67):
-                print('Mobile Phone detected')
-                mob_status = 1
-            else:
-                print('Not Mobile Phone detected')
-                mob_status = 0
-            print(mob_status)
+        detected = [int(c) for c in np.asarray(classes[0])[:int(nums[0])]]
 
+        mob_status = 1 if PHONE_CLASS_ID in detected else 0
+        if mob_status:
+            self.log.event("mobile_phone_detected")
+        count = detected.count(PERSON_CLASS_ID)
         if count == 0:
-            print('No person detected')
             person_status = 1
+            self.log.event("no_person_detected")
         elif count > 1:
-            print('More than one person detected')
             person_status = 2
+            self.log.event("multiple_persons_detected", count=count)
         else:
-            print('Normal')
             person_status = 0
 
-        image = draw_outputs(image, (boxes, scores, classes, nums), class_names)
-            
-    user_move1=""
-    user_move2=""
-    if ret == True:
-        faces = find_faces(image, face_model)
-        for face in faces:
-            marks = detect_marks(image, landmark_model, face)
-            image_points = np.array([
-                                    marks[30],     # Nose tip
-                                     marks[8],     # Chin
-                                    marks[36],     # Left eye left corner
-                                    marks[45],     # Right eye right corne
-                                    marks[48],     # Left Mouth corner
-                                    marks[54]      # Right mouth corner
-                                ], dtype="double")
-            dist_coeffs = np.zeros((4,1)) # Assuming no lens distortion
-            (success, rotation_vector, translation_vector) = cv2.solvePnP(model_points, image_points, camera_matrix, dist_coeffs, flags=cv2.SOLVEPNP_UPNP)
-            
-            (nose_end_point2D, jacobian) = cv2.projectPoints(np.array([(0.0, 0.0, 1000.0)]), rotation_vector, translation_vector, camera_matrix, dist_coeffs)
-            
-            for p in image_points:
-                cv2.circle(image, (int(p[0]), int(p[1])), 3, (0,0,255), -1)
-            
-            p1 = ( int(image_points[0][0]), int(image_points[0][1]))
-            p2 = ( int(nose_end_point2D[0][0][0]), int(nose_end_point2D[0][0][1]))
-            x1, x2 = head_pose_points(image, rotation_vector, translation_vector, camera_matrix)
-
-            try:
-                m = (p2[1] - p1[1])/(p2[0] - p1[0])
-                ang1 = int(math.degrees(math.atan(m)))
-            except:
-                ang1 = 90
-        
-            try:
-                m = (x2[1] - x1[1])/(x2[0] - x1[0])
-                ang2 = int(math.degrees(math.atan(-1/m)))
-            except:
-                ang2 = 90
-                
-            if ang1 >= 48:
-                user_move1 = 2
-                print('Head down')
-            elif ang1 <= -48:
-                user_move1 = 1
-                print('Head up')
-            else:
-                user_move1 = 0
-
-            if ang2 >= 48:
-                print('Head right')
-                user_move2 = 4
-            elif ang2 <= -48:
-                print('Head left')
-                user_move2 = 3
-            else:
-                user_move2 = 0
-
-       
-    ret, jpeg = cv2.imencode('.jpg', image)
-    jpg_as_text = base64.b64encode(jpeg)
-
-    gaze.refresh(image)
-
-    frame = gaze.annotated_frame()
-    eye_movements = ""
-
-    if gaze.is_blinking():
-        eye_movements = 1
-        print("Blinking")
-    elif gaze.is_right():
-        eye_movements = 4
-        print("Looking right")
-    elif gaze.is_left():
-        eye_movements = 3
-        print("Looking left")
-    elif gaze.is_center():
-        eye_movements = 2
-        print("Looking center")
-    else:
-        eye_movements = 0
-        print("Not found!")
-    print(eye_movements)
-
-    proctorDict = dict()  
-    proctorDict['jpg_as_text'] = jpg_as_text
-    proctorDict['mob_status'] = mob_status
-    proctorDict['person_status'] = person_status
-    proctorDict['user_move1'] = user_move1
-    proctorDict['user_move2'] = user_move2
-    proctorDict['eye_movements'] = eye_movements
-
-    return proctorDict
-    
+        image = draw_outputs(image, (boxes, scores, classes, nums), self.class_names)
+        return mob_status, person_status, image
+
+    def head_poses(self, image, faces, intrinsics):
+        """
+        Head pose for every face: landmarks come from one batched model call, and the
+        projections and angles are computed for all faces at once.
+        Returns an (N, 2) int array of (user_move1, user_move2):
+        0 straight, 1 up, 2 down / 0 straight, 3 left, 4 right.
+        """
+        if len(faces) == 0:
+            return np.zeros((0, 2), dtype=int)
+        marks = detect_marks_batch(image, self.landmark_model, faces)
+        image_points = marks[:, LANDMARK_IDS].astype(np.float64)  # (N, 6, 2)
+
+        rotations, translations = [], []
+        for points in image_points:
+            _, rotation_vector, translation_vector = cv2.solvePnP(
+                MODEL_POINTS, np.ascontiguousarray(points), intrinsics.camera_matrix, intrinsics.dist_coeffs,
+                flags=SOLVEPNP_FLAG)
+            rotations.append(rotation_vector.ravel())
+            translations.append(translation_vector.ravel())
+        projected = project_points(intrinsics.pose_points, np.array(rotations), np.array(translations),
+                                   intrinsics.camera_matrix)  # (N, 11, 2)
+
+        for points in image_points:
+            for p in points:
+                cv2.circle(image, (int(p[0]), int(p[1])), 3, (0, 0, 255), -1)
+
+        # Same integer truncation as the original per-face code
+        p1 = image_points[:, 0].astype(np.int64)
+        p2 = projected[:, 0].astype(np.int64)
+        box_2d = projected[:, 1:].astype(np.int32).astype(np.int64)
+        x1 = box_2d[:, 2]
+        x2 = (box_2d[:, 5] + box_2d[:, 8]) // 2
+
+        ang1 = _slope_angle(p2[:, 1] - p1[:, 1], p2[:, 0] - p1[:, 0])
+        # Angle of the perpendicular: atan(-1 / m) = atan(-dx / dy)
+        dx, dy = x2[:, 0] - x1[:, 0], x2[:, 1] - x1[:, 1]
+        ang2 = np.where(dx == 0, 90, _slope_angle(-dx, dy))
+
+        moves = np.zeros((len(faces), 2), dtype=int)
+        moves[ang1 >= HEAD_ANGLE_LIMIT, 0] = 2
+        moves[ang1 <= -HEAD_ANGLE_LIMIT, 0] = 1
+        moves[ang2 >= HEAD_ANGLE_LIMIT, 1] = 4
+        moves[ang2 <= -HEAD_ANGLE_LIMIT, 1] = 3
+
+        for event, column, value, angles in (("head_down", 0, 2, ang1), ("head_up", 0, 1, ang1),
+                                             ("head_right", 1, 4, ang2), ("head_left", 1, 3, ang2)):
+            hits = moves[:, column] == value
+            if hits.any():
+                self.log.event(event, faces=int(hits.sum()), angle=int(angles[hits][0]))
+        return moves
+
+    def eye_movements(self, image):
+        """0 not found, 1 blinking, 2 centre, 3 left, 4 right."""
+        self.gaze.refresh(image)
+        if self.gaze.is_blinking():
+            return 1
+        if self.gaze.is_right():
+            return 4
+        if self.gaze.is_left():
+            return 3
+        if self.gaze.is_center():
+            return 2
+        return 0
+
+    def analyze(self, image):
+        """Analyze one BGR frame; returns the same dict as get_frame."""
+        intrinsics = self.intrinsics(image.shape)
+        mob_status, person_status, image = self.detect_objects(image)
+
+        user_move1 = ""
+        user_move2 = ""
+        moves = self.head_poses(image, find_faces(image, self.face_model), intrinsics)
+        if len(moves):
+            # Reported for the last detected face, as before
+            user_move1, user_move2 = (int(v) for v in moves[-1])
+
+        ret, jpeg = cv2.imencode('.jpg', image)
+        eye_movements = self.eye_movements(image)
+        self.log.event("eye_movements", level=logging.DEBUG, value=eye_movements)
+
+        return {
+            'jpg_as_text': base64.b64encode(jpeg),
+            'mob_status': mob_status,
+            'person_status': person_status,
+            'user_move1': user_move1,
+            'user_move2': user_move2,
+            'eye_movements': eye_movements,
+        }
+
+
+_analyzer = None
+
+
+def get_analyzer():
+    """Module-wide FrameAnalyzer, created on first use."""
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = FrameAnalyzer()
+    return _analyzer
+
+
+def get_frame(imgData):
+    nparr = np.frombuffer(base64.b64decode(imgData), np.uint8)
+    image = cv2.imdecode(nparr, cv2.COLOR_BGR2GRAY)
+    return get_analyzer().analyze(image)
@@ -0,0 +1,144 @@
+"""
+Grading of objective tests.
+
+grade_objective_test reads the answer key and every submitted answer for a test in two
+queries and scores all students in one pass over the answers, instead of one
+query per student per question.
+
+Scoring matches the previous per-question checks: a question counts as correct when
+any of the student's answer rows for that qid equals the key. With Teacher.neg_marks
+set, every other answered question deducts neg_marks percent of its marks.
+"""
+from collections import defaultdict
+
+from django.db.models import Count
+
+from .models import Question, Student
+
+DISTRIBUTION_BUCKETS = ("0-9", "10-19", "20-29", "30-39", "40-49", "50-59", "60-69", "70-79", "80-89", "90-100")
+
+
+def _bucket(percentage):
+    return DISTRIBUTION_BUCKETS[min(9, max(0, int(percentage // 10)))]
+
+
+def outcome(key_ans, marks, submitted, penalty=0.0):
+    """("correct" | "wrong" | "unattempted", points) for one key row and the set of submitted answers."""
+    if not submitted:
+        return "unattempted", 0
+    if key_ans in submitted:
+        return "correct", marks
+    return "wrong", -marks * penalty
+
+
+def score_question(key_rows, submitted, penalty=0.0):
+    """{score, attempted, correct} contributed by the key rows of one qid."""
+    totals = {"score": 0.0, "attempted": 0, "correct": 0}
+    for key_ans, marks in key_rows:
+        result, points = outcome(key_ans, marks, submitted, penalty)
+        totals["score"] += points
+        totals["attempted"] += result != "unattempted"
+        totals["correct"] += result == "correct"
+    return totals
+
+
+def grade_objective_test(test_id, neg_marks=0, emails=None):
+    """
+    Score every student of an objective test.
+
+    emails fixes the roster and its order (e.g. from StudentTestInfo); students in it
+    without answers score 0. By default the roster is everyone who submitted an answer.
+    Returns a dict with:
+      students       [{email, marks, total_possible, percentage, correct, wrong, unattempted}]
+      questions      [{qid, marks, correct, wrong, unattempted, correct_rate}] in key order
+      distribution   {bucket: count} of student percentages, buckets of 10
+      total_possible sum of the marks in the answer key
+    """
+    key = list(Question.objects.filter(test_id=test_id).order_by("questions_uid").values_list("qid", "ans", "marks"))
+    key_qids = {qid for qid, _, _ in key}
+    total_possible = sum(marks for _, _, marks in key)
+    penalty = (neg_marks or 0) / 100.0
+
+    # email -> qid -> set of submitted answers (blank answers are unattempted)
+    given = {email: defaultdict(set) for email in emails or ()}
+    answers = Student.objects.filter(test_id=test_id)
+    if emails is not None:
+        answers = answers.filter(email__in=list(emails))
+    answers = answers.values_list("email", "qid", "ans")
+    for email, qid, ans in answers.iterator():
+        per_student = given.get(email)
+        if per_student is None:
+            if emails is not None:
+                continue
+            per_student = given[email] = defaultdict(set)
+        if qid in key_qids and ans:
+            per_student[qid].add(ans)
+
+    question_stats = [
+        {"qid": qid, "marks": marks, "correct": 0, "wrong": 0, "unattempted": 0} for qid, _, marks in key
+    ]
+    students = []
+    for email, per_student in given.items():
+        score = 0.0
+        counts = {"correct": 0, "wrong": 0, "unattempted": 0}
+        for (qid, ans, marks), stats in zip(key, question_stats):
+            result, points = outcome(ans, marks, per_student.get(qid), penalty)
+            score += points
+            counts[result] += 1
+            stats[result] += 1
+        marks = int(score) if score == int(score) else round(score, 2)
+        percentage = round(100 * score / total_possible, 1) if total_possible else 0
+        students.append({
+            "email": email,
+            "marks": marks,
+            "total_possible": total_possible,
+            "percentage": percentage,
+            **counts,
+        })
+
+    for stats in question_stats:
+        stats["correct_rate"] = round(100 * stats["correct"] / len(students), 1) if students else 0
+
+    return {
+        "students": students,
+        "questions": question_stats,
+        "distribution": distribution_of(student["percentage"] for student in students),
+        "total_possible": total_possible,
+    }
+
+
+def distribution_of(percentages):
+    distribution = dict.fromkeys(DISTRIBUTION_BUCKETS, 0)
+    for percentage in percentages:
+        distribution[_bucket(percentage)] += 1
+    return distribution
+
+
+def question_stats(test_id, emails):
+    """
+    Per-question stats in the format of grade_objective_test for the given students, from
+    grouped queries instead of every answer row. Students are counted once per question,
+    so legacy duplicate answer rows are graded as the grader does: correct if any of them
+    matches the key, wrong if none does.
+    """
+    emails = list(emails)
+    key = Question.objects.filter(test_id=test_id).order_by("questions_uid").values_list("qid", "ans", "marks")
+    rows = Student.objects.filter(test_id=test_id, email__in=emails).exclude(ans__isnull=True).exclude(ans="")
+    answered = dict(rows.values_list("qid").annotate(n=Count("email", distinct=True)).order_by())
+    counts = defaultdict(dict)
+    for qid, ans, n in rows.values_list("qid", "ans").annotate(n=Count("email", distinct=True)).order_by():
+        counts[qid][ans] = n
+    students = len(emails)
+    stats = []
+    for qid, ans, marks in key:
+        correct = counts.get(qid, {}).get(ans, 0)
+        wrong = answered.get(qid, 0) - correct
+        stats.append({
+            "qid": qid,
+            "marks": marks,
+            "correct": correct,
+            "wrong": wrong,
+            "unattempted": students - correct - wrong,
+            "correct_rate": round(100 * correct / students, 1) if students else 0,
+        })
+    return stats
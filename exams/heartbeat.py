@@ -0,0 +1,213 @@
+"""
+Server-side exam clock for the time-left heartbeat.
+
+Each running attempt is a deadline (epoch seconds) kept in a fast store, set when the
+attempt starts; the remaining time is computed from it rather than taken from client
+ticks, so repeated, late or reordered heartbeats are harmless. StudentTestInfo.time_left
+is only written as a checkpoint, at most once per EXAMS_HEARTBEAT_CHECKPOINT_INTERVAL
+seconds per attempt and when the attempt finishes, together with time_left_at. On a
+store miss (restart, eviction, another worker) the deadline is rebuilt as
+time_left_at + time_left, so every worker arrives at the same deadline and the time
+since the last checkpoint is not given back.
+
+Backends (EXAMS_HEARTBEAT_BACKEND):
+    'local' - in-process LRU (default). An attempt restarted in one worker reaches the
+              entries other workers already hold only when those are evicted, so use
+              'cache' when several workers serve the same students.
+    'cache' - Django cache alias EXAMS_HEARTBEAT_CACHE_ALIAS, shared between workers;
+              checkpoints are claimed with cache.add so only one worker writes per interval
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from proctoring import metrics
+from .models import StudentTestInfo
+
+
+class LocalClockStore:
+    """Thread-safe in-process LRU of deadlines and last checkpoint times."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            self._data.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, deadline):
+        with self._lock:
+            # A fresh deadline counts as checkpointed: it was read from or written to the row
+            self._data[key] = [deadline, time.time()]
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def claim_checkpoint(self, key, interval):
+        with self._lock:
+            entry = self._data.get(key)
+            now = time.time()
+            if entry is None or now - entry[1] < interval:
+                return False
+            entry[1] = now
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CacheClockStore:
+    """Deadlines in a Django cache; the checkpoint claim is a key added for one interval."""
+
+    def __init__(self, alias="default", timeout=None):
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def _key(self, key, suffix="deadline"):
+        return f"exams:heartbeat:{key}:{suffix}"
+
+    def get(self, key):
+        return self.cache.get(self._key(key))
+
+    def set(self, key, deadline):
+        self.cache.set(self._key(key), deadline, self.timeout)
+        self.cache.set(self._key(key, "checkpoint"), True, _checkpoint_interval())
+
+    def claim_checkpoint(self, key, interval):
+        return self.cache.add(self._key(key, "checkpoint"), True, interval)
+
+    def delete(self, key):
+        self.cache.delete_many([self._key(key), self._key(key, "checkpoint")])
+
+
+_store = None
+_store_lock = threading.Lock()
+_beats = 0
+_misses = 0
+_checkpoints = 0
+
+
+def get_store():
+    """Return the configured clock store (created on first use)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if getattr(settings, "EXAMS_HEARTBEAT_BACKEND", "local") == "cache":
+                    _store = CacheClockStore(
+                        alias=getattr(settings, "EXAMS_HEARTBEAT_CACHE_ALIAS", "default"),
+                        timeout=getattr(settings, "EXAMS_HEARTBEAT_TIMEOUT", 86400),
+                    )
+                else:
+                    _store = LocalClockStore(getattr(settings, "EXAMS_HEARTBEAT_MAX_ENTRIES", 10000))
+    return _store
+
+
+def _checkpoint_interval():
+    return getattr(settings, "EXAMS_HEARTBEAT_CHECKPOINT_INTERVAL", 60)
+
+
+def _key(student_id, test_id):
+    return f"{student_id}:{test_id}"
+
+
+def _remaining(deadline):
+    return max(0, int(round(deadline - time.time())))
+
+
+def _checkpoint(student_id, test_id, time_left):
+    """Write time_left to the row; never moves it up, so a late writer cannot add time."""
+    global _checkpoints
+    _checkpoints += 1
+    StudentTestInfo.objects.filter(uid_id=student_id, test_id=test_id, time_left__gt=time_left) \
+        .update(time_left=time_left, time_left_at=timezone.now())
+
+
+def _load_deadline(student_id, test_id):
+    """Deadline from the last checkpoint, or None when the student has no StudentTestInfo row."""
+    rows = StudentTestInfo.objects.filter(uid_id=student_id, test_id=test_id)
+    row = rows.values("pk", "time_left", "time_left_at").first()
+    if row is None:
+        return None
+    if row["time_left_at"] is None:
+        # A row whose clock never started (or predates time_left_at): start it now,
+        # once, so all workers share the stamp
+        StudentTestInfo.objects.filter(pk=row["pk"], time_left_at__isnull=True).update(time_left_at=timezone.now())
+        row = StudentTestInfo.objects.filter(pk=row["pk"]).values("time_left", "time_left_at").first()
+    return row["time_left_at"].timestamp() + row["time_left"]
+
+
+def start(student_id, test_id, time_left):
+    """
+    Start (or restart) the clock of an attempt with time_left seconds; the caller writes
+    the row, with time_left_at set to now.
+    """
+    get_store().set(_key(student_id, test_id), time.time() + time_left)
+    return time_left
+
+
+def remaining(student_id, test_id):
+    """Seconds left in the attempt, or None when the student has no StudentTestInfo row."""
+    global _misses
+    store = get_store()
+    key = _key(student_id, test_id)
+    deadline = store.get(key)
+    if deadline is None:
+        _misses += 1
+        deadline = _load_deadline(student_id, test_id)
+        if deadline is None:
+            return None
+        store.set(key, deadline)
+    return _remaining(deadline)
+
+
+def beat(student_id, test_id):
+    """
+    Record a heartbeat and return the seconds left (None without a StudentTestInfo row).
+    Writes the checkpoint when this attempt's interval has elapsed.
+    """
+    global _beats
+    _beats += 1
+    time_left = remaining(student_id, test_id)
+    if time_left is not None and get_store().claim_checkpoint(_key(student_id, test_id), _checkpoint_interval()):
+        _checkpoint(student_id, test_id, time_left)
+    return time_left
+
+
+def finish(student_id, test_id):
+    """Checkpoint the final time left and stop the clock; returns the seconds left."""
+    time_left = remaining(student_id, test_id)
+    if time_left is not None:
+        _checkpoint(student_id, test_id, time_left)
+    get_store().delete(_key(student_id, test_id))
+    return time_left
+
+
+def stats():
+    store = get_store()
+    data = {
+        "backend": type(store).__name__,
+        "beats": _beats,
+        "misses": _misses,
+        "checkpoints": _checkpoints,
+    }
+    if isinstance(store, LocalClockStore):
+        data["entries"] = len(store)
+    return data
+
+
+metrics.register("exam_heartbeat", stats)
@@ -6,6 +6,7 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
 from accounts.models import User
+from exams import questions as question_sets
 from exams.models import Teacher, Question
 
 
@@ -133,6 +134,7 @@ class Command(BaseCommand):
                 marks=2,
                 uid=teacher_user,
             )
+        question_sets.invalidate(DEMO_TEST_ID)
         self.stdout.write(self.style.SUCCESS(f"Added {len(DEMO_QUESTIONS)} questions."))
 
         self.stdout.write("")
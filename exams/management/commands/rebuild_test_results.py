@@ -0,0 +1,28 @@
+"""
+Django management command to recompute the TestResult table from the raw answers
+(Student for objective tests, LongTest/PracticalTest marks for the others).
+Usage: python manage.py rebuild_test_results [--test-id TEST_ID ...]
+"""
+from django.core.management.base import BaseCommand
+
+from exams.models import Teacher, TestResult
+from exams.results import rebuild_test
+
+
+class Command(BaseCommand):
+    help = "Rebuild materialized per-student test results from the submitted answers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--test-id", action="append", dest="test_ids",
+                            help="Only rebuild this test (repeatable; default: all tests)")
+
+    def handle(self, *args, **options):
+        test_ids = options["test_ids"]
+        if not test_ids:
+            test_ids = list(Teacher.objects.values_list("test_id", flat=True).distinct())
+            # Rows of deleted tests
+            TestResult.objects.exclude(test_id__in=test_ids).delete()
+        rows = 0
+        for test_id in test_ids:
+            rows += rebuild_test(test_id)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} results for {len(test_ids)} tests."))
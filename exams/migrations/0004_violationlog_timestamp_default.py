@@ -0,0 +1,19 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:12
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0003_violationlog_score'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='violationlog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('exams', '0004_violationlog_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestResult',
+            fields=[
+                ('rid', models.BigAutoField(primary_key=True, serialize=False)),
+                ('email', models.EmailField(max_length=100)),
+                ('test_id', models.CharField(max_length=100)),
+                ('score', models.FloatField(default=0)),
+                ('total_possible', models.IntegerField(default=0)),
+                ('attempted', models.IntegerField(default=0)),
+                ('correct', models.IntegerField(default=0)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+                ('uid', models.ForeignKey(db_column='uid', on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'test_results',
+                'indexes': [models.Index(fields=['test_id'], name='test_result_test_id_a088a2_idx'), models.Index(fields=['uid'], name='test_result_uid_7add9a_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='testresult',
+            constraint=models.UniqueConstraint(fields=('email', 'test_id'), name='test_results_email_test_id_uniq'),
+        ),
+    ]
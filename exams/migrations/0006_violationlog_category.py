@@ -0,0 +1,42 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:36
+
+from django.db import migrations, models
+from django.db.models import Q
+
+# Frozen copy of ViolationLog.CATEGORY_PHRASES at the time of this migration
+CATEGORY_PHRASES = (
+    (1, ('Tab Switch',)),
+    (2, ('Mobile Phone', 'Cell Phone')),
+    (3, ('Person', 'Face')),
+    (4, ('High Volume',)),
+)
+
+
+def backfill_categories(apps, schema_editor):
+    """One UPDATE per category, in priority order, over the rows no earlier category claimed."""
+    ViolationLog = apps.get_model('exams', 'ViolationLog')
+    for category, phrases in CATEGORY_PHRASES:
+        condition = Q()
+        for phrase in phrases:
+            condition |= Q(details__icontains=phrase)
+        ViolationLog.objects.filter(condition, category=0).update(category=category)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0005_testresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='violationlog',
+            name='category',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Other'), (1, 'Tab switch'), (2, 'Mobile phone'), (3, 'Person/face'), (4, 'Audio')], default=0),
+        ),
+        migrations.RunPython(backfill_categories, migrations.RunPython.noop, hints={'model_name': 'violationlog'}),
+        migrations.AddIndex(
+            model_name='violationlog',
+            index=models.Index(fields=['test_id', 'student', 'category', 'timestamp'], name='violation_logs_stats_idx'),
+        ),
+    ]
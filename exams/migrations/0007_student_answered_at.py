@@ -0,0 +1,18 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0006_violationlog_category'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='answered_at',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
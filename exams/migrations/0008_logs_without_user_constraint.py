@@ -0,0 +1,21 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('exams', '0007_student_answered_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='violationlog',
+            name='student',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='violations', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
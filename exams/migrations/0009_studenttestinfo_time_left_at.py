@@ -0,0 +1,18 @@
+# Generated by Django 4.2.28 on 2026-10-17 23:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0008_logs_without_user_constraint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studenttestinfo',
+            name='time_left_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -3,6 +3,7 @@ Django models for exams app.
 """
 from django.db import models
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from accounts.models import User
 
 
@@ -67,6 +68,7 @@ class Student(models.Model):
     test_id = models.CharField(max_length=100)
     qid = models.CharField(max_length=25, null=True, blank=True)
     ans = models.TextField(null=True, blank=True)
+    answered_at = models.BigIntegerField(null=True, blank=True)  # client time (ms) of the answer, orders batched syncs
     uid = models.ForeignKey(User, on_delete=models.CASCADE, db_column='uid')
     
     class Meta:
@@ -86,6 +88,7 @@ class StudentTestInfo(models.Model):
     email = models.EmailField(max_length=100)
     test_id = models.CharField(max_length=100)
     time_left = models.IntegerField()  # Time in seconds
+    time_left_at = models.DateTimeField(null=True, blank=True)  # When time_left was written (exams/heartbeat.py)
     completed = models.IntegerField(default=0)
     uid = models.ForeignKey(User, on_delete=models.CASCADE, db_column='uid')
     
@@ -187,17 +190,80 @@ class PracticalTest(models.Model):
 
 class ViolationLog(models.Model):
     """Log for proctoring violations"""
+
+    class Category(models.IntegerChoices):
+        OTHER = 0, 'Other'
+        TAB_SWITCH = 1, 'Tab switch'
+        MOBILE_PHONE = 2, 'Mobile phone'
+        PERSON = 3, 'Person/face'
+        AUDIO = 4, 'Audio'
+
+    # (category, phrases) in priority order; the first phrase found in details (any case) wins
+    CATEGORY_PHRASES = (
+        (Category.TAB_SWITCH, ('Tab Switch',)),
+        (Category.MOBILE_PHONE, ('Mobile Phone', 'Cell Phone')),
+        (Category.PERSON, ('Person', 'Face')),
+        (Category.AUDIO, ('High Volume',)),
+    )
+
     vid = models.BigAutoField(primary_key=True)
-    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='violations')
+    student = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, related_name='violations')
     test_id = models.CharField(max_length=100)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)  # set when the violation happens, not when it is flushed
     details = models.TextField()
-    evidence = models.TextField(null=True, blank=True)  # Base64 image or path
+    category = models.PositiveSmallIntegerField(choices=Category.choices, default=Category.OTHER)
+    evidence = models.TextField(null=True, blank=True)  # "evidence:<sha256>.<ext>" (proctoring.evidence); older rows: base64
     score = models.IntegerField(default=0)
 
     class Meta:
         db_table = 'violation_logs'
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['test_id', 'student', 'category', 'timestamp'], name='violation_logs_stats_idx'),
+        ]
+
+    @classmethod
+    def category_for(cls, details):
+        text = (details or '').lower()
+        for category, phrases in cls.CATEGORY_PHRASES:
+            if any(phrase.lower() in text for phrase in phrases):
+                return category
+        return cls.Category.OTHER
 
     def __str__(self):
         return f"{self.student.email} - {self.test_id} - {self.timestamp}"
+
+
+class TestResult(models.Model):
+    """Per student/test result, kept current as answers and marks are saved (see exams.results)"""
+    rid = models.BigAutoField(primary_key=True)
+    email = models.EmailField(max_length=100)
+    test_id = models.CharField(max_length=100)
+    score = models.FloatField(default=0)
+    total_possible = models.IntegerField(default=0)
+    attempted = models.IntegerField(default=0)
+    correct = models.IntegerField(default=0)
+    last_updated = models.DateTimeField(auto_now=True)
+    uid = models.ForeignKey(User, on_delete=models.CASCADE, db_column='uid')
+
+    class Meta:
+        db_table = 'test_results'
+        constraints = [
+            models.UniqueConstraint(fields=['email', 'test_id'], name='test_results_email_test_id_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['test_id']),
+            models.Index(fields=['uid']),
+        ]
+
+    def __str__(self):
+        return f"{self.email} - {self.test_id}: {self.score}/{self.total_possible}"
+
+    @property
+    def percentage(self):
+        return round(100 * self.score / self.total_possible, 1) if self.total_possible else 0
+
+    @property
+    def marks(self):
+        """Score as shown on result pages (whole numbers without a decimal point)"""
+        return int(self.score) if self.score == int(self.score) else round(self.score, 2)
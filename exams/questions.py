@@ -0,0 +1,114 @@
+"""
+Read-through cache of an objective test's questions for the exam-taking pages.
+
+Every student of a test navigates the same immutable question set, so it is loaded with
+one query into a QuestionSet (ordered qids, qid -> index, question bodies and answer key)
+and shared by all requests of the process. Each test has a version token in the Django
+cache alias EXAMS_QUESTION_CACHE_ALIAS; invalidate() replaces the token when questions
+are added, updated or deleted, and a process reloads its copy when the token differs.
+With the default per-process cache the token only reaches the process that changed the
+questions, so copies are also reloaded after EXAMS_QUESTION_CACHE_TTL seconds; point the
+alias at a shared cache to make edits visible to every worker at once.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from proctoring import metrics
+from .models import Question
+
+QUESTION_FIELDS = ("q", "a", "b", "c", "d", "marks")
+
+
+class QuestionSet:
+    """Questions of one test, in qid order (duplicate qids keep their first row)."""
+    __slots__ = ("test_id", "version", "loaded_at", "qids", "index", "questions", "keys")
+
+    def __init__(self, test_id, version, rows):
+        self.test_id = test_id
+        self.version = version
+        self.loaded_at = time.monotonic()
+        qids = []
+        self.questions = {}
+        self.keys = {}
+        for qid, *body, ans in rows:
+            # Grading counts every key row of a qid; the page shows the first one
+            self.keys.setdefault(qid, []).append((ans, body[-1]))
+            if qid not in self.questions:
+                qids.append(qid)
+                self.questions[qid] = dict(zip(QUESTION_FIELDS, body))
+        self.qids = tuple(qids)
+        self.index = {qid: i for i, qid in enumerate(self.qids)}
+        self.keys = {qid: tuple(rows) for qid, rows in self.keys.items()}
+
+    def __len__(self):
+        return len(self.qids)
+
+    def clamp(self, index):
+        return min(max(index, 0), max(0, len(self.qids) - 1))
+
+
+_sets = OrderedDict()
+_lock = threading.Lock()
+_hits = 0
+_misses = 0
+
+
+def _version_key(test_id):
+    return f"exams:questions:{test_id}:version"
+
+
+def _cache():
+    return caches[getattr(settings, "EXAMS_QUESTION_CACHE_ALIAS", "default")]
+
+
+def _version(test_id):
+    cache = _cache()
+    version = cache.get(_version_key(test_id))
+    if version is None:
+        # First use, or the token was evicted: whoever adds it first wins
+        cache.add(_version_key(test_id), uuid.uuid4().hex, None)
+        version = cache.get(_version_key(test_id))
+    return version
+
+
+def get(test_id):
+    """The QuestionSet of a test (an empty one when it has no questions)."""
+    global _hits, _misses
+    version = _version(test_id)
+    ttl = getattr(settings, "EXAMS_QUESTION_CACHE_TTL", 300)
+    with _lock:
+        question_set = _sets.get(test_id)
+        if question_set is not None and question_set.version == version \
+                and time.monotonic() - question_set.loaded_at < ttl:
+            _sets.move_to_end(test_id)
+            _hits += 1
+            return question_set
+    _misses += 1
+    rows = Question.objects.filter(test_id=test_id).order_by("qid", "questions_uid") \
+        .values_list("qid", *QUESTION_FIELDS, "ans")
+    question_set = QuestionSet(test_id, version, rows)
+    with _lock:
+        _sets[test_id] = question_set
+        _sets.move_to_end(test_id)
+        while len(_sets) > getattr(settings, "EXAMS_QUESTION_CACHE_MAX_TESTS", 256):
+            _sets.popitem(last=False)
+    return question_set
+
+
+def invalidate(test_id):
+    """Make every process reload the test's questions on next use."""
+    _cache().set(_version_key(test_id), uuid.uuid4().hex, None)
+    with _lock:
+        _sets.pop(test_id, None)
+
+
+def stats():
+    return {"tests": len(_sets), "hits": _hits, "misses": _misses}
+
+
+metrics.register("question_sets", stats)
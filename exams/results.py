@@ -0,0 +1,190 @@
+"""
+Materialized test results.
+
+TestResult keeps one row per student and test (score, attempted, correct), so result
+pages and the student history read a handful of rows instead of re-grading:
+  - saving objective answers (record_answer, or record_answers for a synced batch)
+    adjusts the row by the difference between the old and the new answers' outcomes,
+    with F() updates so concurrent saves do not lose points
+  - entering subjective/practical marks recomputes that student's row from
+    LongTest/PracticalTest (refresh_result)
+  - editing a test's questions drops its rows (invalidate_test); results_for_test
+    rebuilds a test whose rows are missing, and `manage.py rebuild_test_results`
+    recomputes everything from the raw answers
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from . import questions as question_sets
+from .grading import grade_objective_test, score_question
+from .models import LongQA, LongTest, PracticalQA, PracticalTest, Student, StudentTestInfo, Teacher, TestResult
+
+# Answer and key tables of the manually marked test types
+_MARKED = {
+    "subjective": (LongTest, LongQA),
+    "practical": (PracticalTest, PracticalQA),
+}
+
+
+def _test_settings(test_id):
+    """(test_type, neg_marks) of a test, or (None, 0) if it does not exist."""
+    return Teacher.objects.filter(test_id=test_id).values_list("test_type", "neg_marks").first() or (None, 0)
+
+
+def _marked_totals(test_id, test_type, emails=None):
+    """{email: (score, attempted, correct)} and total possible for a subjective/practical test."""
+    answers_model, key_model = _MARKED[test_type]
+    answers = answers_model.objects.filter(test_id=test_id)
+    if emails is not None:
+        answers = answers.filter(email__in=list(emails))
+    totals = {
+        row["email"]: (row["score"] or 0, row["attempted"], row["correct"])
+        for row in answers.values("email").annotate(
+            score=Sum("marks"), attempted=Count("pk"), correct=Count("pk", filter=Q(marks__gt=0)),
+        ).order_by()
+    }
+    total_possible = key_model.objects.filter(test_id=test_id).aggregate(total=Sum("marks"))["total"] or 0
+    return totals, total_possible
+
+
+def _compute(test_id, emails):
+    """{email: TestResult field values} for the given students, from the raw answers."""
+    test_type, neg_marks = _test_settings(test_id)
+    if test_type in _MARKED:
+        totals, total_possible = _marked_totals(test_id, test_type, emails)
+        return {
+            email: dict(zip(("score", "attempted", "correct"), totals.get(email, (0, 0, 0))),
+                        total_possible=total_possible)
+            for email in emails
+        }
+    report = grade_objective_test(test_id, neg_marks, emails=emails)
+    return {
+        row["email"]: {
+            "score": float(row["marks"]),
+            "attempted": row["correct"] + row["wrong"],
+            "correct": row["correct"],
+            "total_possible": row["total_possible"],
+        }
+        for row in report["students"]
+    }
+
+
+def _uid_for(email, test_id):
+    uid = StudentTestInfo.objects.filter(email=email, test_id=test_id).values_list("uid", flat=True).first()
+    return uid or Student.objects.filter(email=email, test_id=test_id).values_list("uid", flat=True).first()
+
+
+def refresh_result(email, test_id, uid=None):
+    """Recompute one student's row from their answers/marks."""
+    values = _compute(test_id, [email])[email]
+    uid = uid or _uid_for(email, test_id)
+    if uid is None:
+        return None
+    result, _ = TestResult.objects.update_or_create(email=email, test_id=test_id, defaults={**values, "uid_id": uid})
+    return result
+
+
+def record_answer(user, test_id, qid, ans):
+    """Save a student's objective answer and fold the change into their TestResult."""
+    record_answers(user, test_id, [(qid, ans, None)])
+
+
+def record_answers(user, test_id, updates):
+    """
+    Save a batch of objective answers [(qid, ans, ts)] and fold the changes into the
+    student's TestResult with one update. ts (client time in ms) orders the updates: an
+    answer not newer than the one stored for its qid is skipped, so a replayed or late
+    batch changes nothing. ts None always applies. Returns the number of answers saved.
+    """
+    latest = {}
+    for qid, ans, ts in updates:
+        if qid not in latest or (ts or 0) >= (latest[qid][1] or 0):
+            latest[qid] = (ans, ts)
+    if not latest:
+        return 0
+
+    with transaction.atomic():
+        stored = {}
+        for row in Student.objects.select_for_update().filter(
+                uid=user, email=user.email, test_id=test_id, qid__in=list(latest)):
+            stored.setdefault(row.qid, []).append(row)
+        changed, to_update, to_create = [], [], []
+        for qid, (ans, ts) in latest.items():
+            rows = stored.get(qid)
+            if rows:
+                stored_ts = max((row.answered_at for row in rows if row.answered_at is not None), default=None)
+                if ts is not None and stored_ts is not None and ts <= stored_ts:
+                    continue
+                # Legacy duplicate rows are graded together, as grade_objective_test does
+                changed.append((qid, {row.ans for row in rows if row.ans}, ans))
+                for row in rows:
+                    row.ans, row.answered_at = ans, ts
+                    to_update.append(row)
+            else:
+                changed.append((qid, set(), ans))
+                to_create.append(Student(uid=user, email=user.email, test_id=test_id, qid=qid, ans=ans, answered_at=ts))
+        Student.objects.bulk_update(to_update, ["ans", "answered_at"])
+        Student.objects.bulk_create(to_create)
+        if changed:
+            _apply_changes(user, test_id, changed)
+    return len(changed)
+
+
+def _apply_changes(user, test_id, changed):
+    """Adjust the student's TestResult by the outcome difference of each (qid, old answers, new) change."""
+    result = TestResult.objects.filter(email=user.email, test_id=test_id)
+    if not result.exists():
+        # First answer since the row was dropped (or ever): compute it in full
+        refresh_result(user.email, test_id, uid=user.pk)
+        return
+
+    keys = question_sets.get(test_id).keys
+    penalty = (_test_settings(test_id)[1] or 0) / 100.0
+    totals = {"score": 0.0, "attempted": 0, "correct": 0}
+    for qid, previous, ans in changed:
+        key = keys.get(qid)
+        if not key:
+            continue
+        before = score_question(key, previous, penalty)
+        after = score_question(key, {ans} if ans else set(), penalty)
+        for field in totals:
+            totals[field] += after[field] - before[field]
+    deltas = {field: F(field) + value for field, value in totals.items() if value}
+    if deltas:
+        result.update(last_updated=timezone.now(), **deltas)
+
+
+def invalidate_test(test_id):
+    """Drop a test's rows after its questions changed; they are rebuilt on the next read."""
+    TestResult.objects.filter(test_id=test_id).delete()
+
+
+def rebuild_test(test_id):
+    """Recompute every row of a test from the raw answers; returns the number of rows."""
+    test_type, _ = _test_settings(test_id)
+    answers_model = _MARKED[test_type][0] if test_type in _MARKED else Student
+    # Everyone with a test session or an answer, first session first
+    uids = dict(StudentTestInfo.objects.filter(test_id=test_id).order_by("stiid").values_list("email", "uid"))
+    for email, uid in answers_model.objects.filter(test_id=test_id).values_list("email", "uid").distinct():
+        uids.setdefault(email, uid)
+
+    values = _compute(test_id, list(uids)) if test_type and uids else {}
+    with transaction.atomic():
+        TestResult.objects.filter(test_id=test_id).delete()
+        TestResult.objects.bulk_create(
+            [TestResult(email=email, test_id=test_id, uid_id=uids[email], **values[email]) for email in uids if email in values],
+            batch_size=500,
+        )
+    return len(values)
+
+
+def results_for_test(test_id):
+    """TestResult rows of a test (rebuilt first if any student with a session has none)."""
+    rows = list(TestResult.objects.filter(test_id=test_id).order_by("rid"))
+    have = {row.email for row in rows}
+    sessions = StudentTestInfo.objects.filter(test_id=test_id).values_list("email", flat=True)
+    if not rows or any(email not in have for email in sessions):
+        rebuild_test(test_id)
+        rows = list(TestResult.objects.filter(test_id=test_id).order_by("rid"))
+    return rows
@@ -1,3 +1,87 @@
+from datetime import timedelta
+from unittest import mock
+
 from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import User
+from exams import heartbeat
+from exams.grading import grade_objective_test, question_stats
+from exams.models import Question, Student, StudentTestInfo, Teacher, TestResult
+from exams.results import record_answer, refresh_result
+
+
+class HeartbeatClockTests(TestCase):
+
+    def setUp(self):
+        self.student = User.objects.create_user(email="student@example.com", password="pw", name="S",
+                                                user_type="student", user_image="")
+        self.info = StudentTestInfo.objects.create(email=self.student.email, test_id="T1", uid=self.student,
+                                                   time_left=600, time_left_at=timezone.now() - timedelta(seconds=100))
+
+    def test_workers_rebuild_the_same_deadline_from_the_checkpoint(self):
+        seen = []
+        for _ in range(2):
+            # Each worker has its own local store and has not seen the attempt start
+            with mock.patch.object(heartbeat, "_store", heartbeat.LocalClockStore()):
+                seen.append(heartbeat.remaining(self.student.pk, "T1"))
+        self.assertEqual(seen[0], seen[1])
+        self.assertAlmostEqual(seen[0], 500, delta=1)
+
+    def test_row_without_checkpoint_time_starts_its_clock_once(self):
+        StudentTestInfo.objects.filter(pk=self.info.pk).update(time_left_at=None)
+        with mock.patch.object(heartbeat, "_store", heartbeat.LocalClockStore()):
+            self.assertAlmostEqual(heartbeat.remaining(self.student.pk, "T1"), 600, delta=1)
+        stamped = StudentTestInfo.objects.get(pk=self.info.pk).time_left_at
+        self.assertIsNotNone(stamped)
+        with mock.patch.object(heartbeat, "_store", heartbeat.LocalClockStore()):
+            heartbeat.remaining(self.student.pk, "T1")
+        self.assertEqual(StudentTestInfo.objects.get(pk=self.info.pk).time_left_at, stamped)
+
+
+class RecordAnswersTests(TestCase):
+
+    def test_duplicate_rows_are_graded_like_the_grader(self):
+        teacher = User.objects.create_user(email="teacher@example.com", password="pw", name="T",
+                                           user_type="teacher", user_image="")
+        student = User.objects.create_user(email="student@example.com", password="pw", name="S",
+                                           user_type="student", user_image="")
+        Teacher.objects.create(email=teacher.email, test_id="DUP", test_type="objective", end=timezone.now(),
+                               duration=60, password="pw", subject="s", topic="t", neg_marks=25, uid=teacher)
+        Question.objects.create(test_id="DUP", qid="1", q="q", a="a", b="b", c="c", d="d", ans="a", marks=4,
+                                uid=teacher)
+        # Legacy duplicates that disagree; the grader counts the question as correct
+        for ans in ("b", "a"):
+            Student.objects.create(uid=student, email=student.email, test_id="DUP", qid="1", ans=ans)
+        refresh_result(student.email, "DUP", uid=student.pk)
+
+        record_answer(student, "DUP", "1", "a")
+        result = TestResult.objects.get(email=student.email, test_id="DUP")
+        self.assertEqual((result.score, result.attempted, result.correct), (4, 1, 1))
+
+
+class QuestionStatsTests(TestCase):
+
+    def test_students_with_duplicate_rows_are_counted_once(self):
+        teacher = User.objects.create_user(email="teacher@example.com", password="pw", name="T",
+                                           user_type="teacher", user_image="")
+        Teacher.objects.create(email=teacher.email, test_id="QS", test_type="objective", end=timezone.now(),
+                               duration=60, password="pw", subject="s", topic="t", neg_marks=0, uid=teacher)
+        for qid in ("1", "2"):
+            Question.objects.create(test_id="QS", qid=qid, q="q", a="a", b="b", c="c", d="d", ans="a", marks=1,
+                                    uid=teacher)
+        answers = {
+            "dup@example.com": [("1", "b"), ("1", "a")],
+            "wrong@example.com": [("1", "c"), ("1", "d"), ("2", "a")],
+            "outside@example.com": [("1", "b"), ("2", "b")],
+        }
+        for email, rows in answers.items():
+            student = User.objects.create_user(email=email, password="pw", name="S", user_type="student",
+                                               user_image="")
+            for qid, ans in rows:
+                Student.objects.create(uid=student, email=email, test_id="QS", qid=qid, ans=ans)
 
-# Create your tests here.
+        emails = ["dup@example.com", "wrong@example.com"]
+        stats = question_stats("QS", emails)
+        self.assertEqual(stats, grade_objective_test("QS", emails=emails)["questions"])
+        self.assertEqual([(q["correct"], q["wrong"], q["unattempted"]) for q in stats], [(1, 1, 0), (1, 0, 1)])
@@ -16,5 +16,6 @@ urlpatterns = [
     path('process-scan-frame/', views.process_scan_frame, name='process_scan_frame'),
     path('detect-cheating/', views.video_feed_view, name='detect_cheating'), # Mapped to video_feed_view as requested
     path('video_feed', views.video_feed_view, name='video_feed'), # Legacy path
+    path('video_feed/frame', views.video_feed_frame_view, name='video_feed_frame'), # Binary frame upload
     path('check-environment/', views.check_environment_view, name='check_environment'),
 ]
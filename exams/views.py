@@ -3,73 +3,69 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.views.decorators.http import require_http_methods, require_GET, require_POST
 from datetime import timedelta
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt, csrf_protect, ensure_csrf_cookie
 from django.http import JsonResponse
 from django.core.mail import send_mail
 from django.conf import settings
 import json
+import random
 
 from .models import Teacher, Question, StudentTestInfo, Student, LongQA, PracticalQA
 from proctoring.models import ProctoringLog, WindowEstimationLog
-from .models import Teacher, Question, StudentTestInfo, Student, LongQA, PracticalQA, ViolationLog
+from .models import Teacher, Question, StudentTestInfo, Student, LongQA, LongTest, PracticalQA, PracticalTest, ViolationLog
 from .forms import GiveTestForm
+from . import heartbeat, questions as question_sets
+from .grading import distribution_of, question_stats
+from .results import invalidate_test, record_answer, record_answers, refresh_result, results_for_test
+from proctoring.inference import InferenceBroker
+from proctoring.detectors import load_detector
+from proctoring.worker import WorkerClient, WorkerError
+from proctoring import sampling
+from proctoring.frame_cache import detect_with_cache
+from proctoring import archive, live, state as proctoring_state
+from proctoring.violations import log_violation, clear_violations, flush_pending
 import base64
 from PIL import Image
 from io import BytesIO
+import numpy as np
 
-# Try to import YOLO
 try:
-    from ultralytics import YOLO
-    import torch
+    import cv2
 except ImportError:
-    YOLO = None
-    print("Warning: ultralytics not installed. Object detection will not work.")
+    cv2 = None
 
-# Load model globally to avoid reloading
-YOLO_MODEL = None
 # Removed 'table' as it causes false positives for students sitting at desks
 RESTRICTED_CLASSES = ['cell phone', 'mobile phone', 'laptop', 'book', 'tv'] 
 
-def load_yolo_model():
-    global YOLO_MODEL
-    if YOLO_MODEL is None and YOLO is not None:
-        try:
-            # First try to load the user's custom model
-            # We assume it might be a .pt file renamed to .pkl or a pickle
-            model_path = 'yolov8n/data.pkl'
-            print(f"Attempting to load custom model: {model_path}")
-            
-            try:
-                # Try loading as standard YOLO model
-                YOLO_MODEL = YOLO(model_path)
-                # Test if it's valid by checking names
-                if not hasattr(YOLO_MODEL, 'names') or not YOLO_MODEL.names:
-                     raise ValueError("Model loaded but has no class names")
-                print("Custom YOLOv8 Model loaded successfully")
-            except Exception as e:
-                print(f"YOLO(path) failed ({e}). Trying pickle...")
-                import pickle
-                with open(model_path, 'rb') as f:
-                    # Logic: If it's a pickled model object
-                    YOLO_MODEL = pickle.load(f)
-                
-                print("Custom Model loaded via pickle")
+# Load model globally to avoid reloading
+# (ultralytics, ONNX Runtime or OpenVINO backend; see PROCTORING_DETECTOR_BACKEND)
+YOLO_MODEL = None
+YOLO_LOAD_ATTEMPTED = False
 
-        except Exception as e:
-            print(f"Error loading custom model: {e}")
-            print("FALLBACK: Loading standard 'yolov8n.pt' model...")
-            try:
-                # Fallback to standard yolov8n which detects COCO classes
-                # (person, bicycle, car, ..., backpack, umbrella, ..., handbag, tie, suitcase, frisbee, skis, snowboard, sports ball, kite, baseball bat, baseball glove, skateboard, surfboard, tennis racket, bottle, wine glass, cup, fork, knife, spoon, bowl, banana, apple, sandwich, orange, broccoli, carrot, hot dog, pizza, donut, cake, chair, couch, potted plant, bed, dining table, toilet, tv, laptop, mouse, remote, keyboard, cell phone, microwave, oven, toaster, sink, refrigerator, book, clock, vase, scissors, teddy bear, hair drier, toothbrush)
-                YOLO_MODEL = YOLO('yolov8n.pt') 
-                print("Standard yolov8n.pt loaded successfully")
-            except Exception as e2:
-                print(f"CRITICAL: Could not load fallback model: {e2}")
-                YOLO_MODEL = None
+# With a worker pool configured the model lives in `manage.py run_proctoring_worker`
+PROCTORING_WORKER_SOCKET = getattr(settings, 'PROCTORING_WORKER_SOCKET', '')
+
+def load_yolo_model():
+    global YOLO_MODEL, YOLO_LOAD_ATTEMPTED
+    # Loading tries every backend, so a failed load is not retried on each frame
+    if YOLO_MODEL is None and not YOLO_LOAD_ATTEMPTED and not PROCTORING_WORKER_SOCKET:
+        YOLO_LOAD_ATTEMPTED = True
+        YOLO_MODEL = load_detector()
+        if YOLO_MODEL is None:
+            print("Warning: no object detector could be loaded. Object detection will not work.")
+        else:
+            print(f"Object detector loaded ({YOLO_MODEL.backend} backend)")
 
 
-# Load YOLO model at module initialization
-load_yolo_model()
+if PROCTORING_WORKER_SOCKET:
+    # Frames are sent to the worker pool, which batches them itself
+    YOLO_BROKER = WorkerClient(PROCTORING_WORKER_SOCKET)
+else:
+    # Load and warm up the detector at module initialization
+    load_yolo_model()
+    # Frames from concurrent requests are batched into a single forward pass
+    YOLO_BROKER = InferenceBroker(lambda: YOLO_MODEL)
 
 
 def _professor_required(view_func):
@@ -81,6 +77,12 @@ def _professor_required(view_func):
     return wrapper
 
 
+def _questions_changed(test_id):
+    """Drop what is derived from a test's questions: cached question set and stored results."""
+    question_sets.invalidate(test_id)
+    invalidate_test(test_id)
+
+
 def _professor_tests(request):
     """List of Teacher rows for current professor (uid=request.user)."""
     return list(Teacher.objects.filter(uid=request.user).order_by("-tid"))
@@ -141,49 +143,33 @@ def give_test_exam_view(request, test_id):
     if request.method == 'POST' and request.POST.get('action'):
         action = request.POST.get('action')
 
-        # Fetch ordered question ids for this test (deduplicated by earlier patch)
-        q_list = list(Question.objects.filter(test_id=test_id).order_by('qid').values_list('qid', flat=True))
+        # Ordered question ids for this test (shared, cached question set)
+        question_set = question_sets.get(test_id)
+        q_list = question_set.qids
         total = len(q_list)
 
         # Determine current question index. Prefer POSTed qid since GET parameters
         # disappear on form submission.  Fall back to query param if qid is missing
         question_index = 0
         posted_qid = request.POST.get('qid')
-        if posted_qid and posted_qid in q_list:
-            question_index = q_list.index(posted_qid)
+        if posted_qid and posted_qid in question_set.index:
+            question_index = question_set.index[posted_qid]
         else:
             try:
                 question_index = int(request.GET.get('q', 0))
             except (TypeError, ValueError):
                 question_index = 0
 
-        # Persist remaining time if client sent it with the form (seconds)
-        posted_time = request.POST.get('time')
-        if posted_time:
-            try:
-                tval = int(posted_time)
-                StudentTestInfo.objects.update_or_create(
-                    uid=request.user,
-                    email=request.user.email,
-                    test_id=test_id,
-                    defaults={"time_left": tval, "completed": 0},
-                )
-            except Exception:
-                # ignore errors here; not fatal for navigation
-                pass
+        # A form post is a heartbeat too; the remaining time comes from the server clock
+        if request.POST.get('time'):
+            heartbeat.beat(request.user.pk, test_id)
 
         # Handle submit action (save answer and move to next question)
         if action == 'submit':
             qid = request.POST.get('qid') or (q_list[question_index] if question_index < total else None)
             ans = request.POST.get('ans') or request.POST.get('selected_answer')
             if qid and ans is not None:
-                Student.objects.update_or_create(
-                    uid=request.user,
-                    email=request.user.email,
-                    test_id=test_id,
-                    qid=qid,
-                    defaults={'ans': ans}
-                )
+                record_answer(request.user, test_id, qid, ans)
 
             # Move to next question after submit, or stay on last question
             new_index = min(question_index + 1, max(0, total - 1))
@@ -244,45 +230,27 @@ def give_test_exam_view(request, test_id):
                 except (json.JSONDecodeError, AttributeError):
                     no = None
             
-            try:
-                q_obj = Question.objects.get(test_id=test_id, qid=no)
-                return JsonResponse({
-                    'q': q_obj.q,
-                    'a': q_obj.a,
-                    'b': q_obj.b,
-                    'c': q_obj.c,
-                    'd': q_obj.d,
-                    'marks': q_obj.marks
-                })
-            except Question.DoesNotExist:
+            question = question_sets.get(test_id).questions.get(str(no))
+            if question is None:
                 return JsonResponse({'error': 'Question not found'}, status=404)
+            return JsonResponse(question)
         
         elif flag == 'mark':
             # Save answer
             qid = request.POST.get('qid') or (request.body and json.loads(request.body.decode()).get('qid'))
             ans = request.POST.get('ans') or (request.body and json.loads(request.body.decode()).get('ans'))
             
-            Student.objects.update_or_create(
-                uid=request.user,
-                email=request.user.email,
-                test_id=test_id,
-                qid=qid,
-                defaults={'ans': ans}
-            )
+            record_answer(request.user, test_id, qid, ans)
             return JsonResponse({'status': 'Answer saved'})
             
         elif flag == 'time':
-            # Update time left
-            time_left = request.POST.get('time') or (request.body and json.loads(request.body.decode()).get('time'))
-            StudentTestInfo.objects.filter(
-                uid=request.user,
-                email=request.user.email,
-                test_id=test_id
-            ).update(time_left=time_left)
-            return JsonResponse({'status': 'Time updated'})
+            # Heartbeat: the client's tick is not trusted, time left comes from the server clock
+            time_left = heartbeat.beat(request.user.pk, test_id)
+            return JsonResponse({'status': 'Time updated', 'time_left': time_left})
             
         elif flag == 'completed':
             # Mark test as completed
+            heartbeat.finish(request.user.pk, test_id)
             StudentTestInfo.objects.filter(
                 uid=request.user,
                 email=request.user.email,
@@ -301,10 +269,7 @@ def give_test_exam_view(request, test_id):
 
     # --- RESET VIOLATION COUNT FOR NEW TEST ATTEMPT ---
     # Clear all previous violations for this student + test to allow fresh attempt
-    ViolationLog.objects.filter(
-        student=request.user,
-        test_id=test_id
-    ).delete()
+    clear_violations(request.user, test_id)
     print(f"✓ Cleared violations for {request.user.email} on test {test_id} - Fresh attempt started")
     
     # --- RESET TEST SESSION INFO FOR NEW ATTEMPT ---
@@ -315,8 +280,10 @@ def give_test_exam_view(request, test_id):
         test_id=test_id
     ).update(
         time_left=teacher.duration * 60,  # Reset to full duration in seconds
+        time_left_at=timezone.now(),  # The server-side clock starts now
         completed=0  # Mark as not completed for fresh attempt
     )
+    heartbeat.start(request.user.pk, test_id, teacher.duration * 60)
     print(f"✓ Reset test session for {request.user.email} on test {test_id}")
 
     context = {
@@ -333,6 +300,8 @@ def give_test_exam_view(request, test_id):
         "proctortypes": teacher.proctoring_type, # For subjective
         "proctortypep": teacher.proctoring_type, # For practical
         "calc": teacher.calc,
+        "frame_type": settings.PROCTORING_FRAME_TYPE,
+        "frame_quality": settings.PROCTORING_FRAME_QUALITY,
     }
 
     if teacher.test_type == 'subjective':
@@ -351,31 +320,18 @@ def give_test_exam_view(request, test_id):
         except (TypeError, ValueError):
             question_index = 0
 
-        # fetch all qids for this test and remove duplicates while preserving order
-        raw_qids = list(Question.objects.filter(test_id=test_id).order_by('qid').values_list('qid', flat=True))
-        seen = set()
-        questions_qids = []
-        for q in raw_qids:
-            if q not in seen:
-                seen.add(q)
-                questions_qids.append(q)
+        # Ordered, deduplicated qids and question bodies (shared, cached question set)
+        question_set = question_sets.get(test_id)
+        questions_qids = question_set.qids
         total_questions = len(questions_qids)
 
         # Clamp index
-        if question_index < 0:
-            question_index = 0
-        if question_index >= total_questions:
-            question_index = max(0, total_questions - 1)
+        question_index = question_set.clamp(question_index)
 
         # Load selected question
         if total_questions > 0:
-            sel_qid = questions_qids[question_index]
-            try:
-                q_obj = Question.objects.get(test_id=test_id, qid=sel_qid)
-                q, a, b, c, d, marks = q_obj.q, q_obj.a, q_obj.b, q_obj.c, q_obj.d, q_obj.marks
-            except Question.DoesNotExist:
-                q = a = b = c = d = ""
-                marks = 0
+            question = question_set.questions[questions_qids[question_index]]
+            q, a, b, c, d, marks = (question[field] for field in question_sets.QUESTION_FIELDS)
         else:
             q = a = b = c = d = ""
             marks = 0
@@ -405,15 +361,14 @@ def give_test_exam_view(request, test_id):
         answers_dict = {}
         for answer in student_answers:
             # Find the question index (1-based) for this qid
-            try:
-                question_index = questions_qids.index(answer['qid']) + 1
-                answers_dict[str(question_index)] = {
-                    'marked': answer['ans'],
-                    'status': 'SUBMITTED'  # Existing answers are considered submitted
-                }
-            except ValueError:
+            position = question_set.index.get(answer['qid'])
+            if position is None:
                 # qid not found in questions_qids, skip
                 continue
+            answers_dict[str(position + 1)] = {
+                'marked': answer['ans'],
+                'status': 'SUBMITTED'  # Existing answers are considered submitted
+            }
         
         context.update({
             "answers": json.dumps(answers_dict),
@@ -423,7 +378,7 @@ def give_test_exam_view(request, test_id):
             "current_qid": current_qid,
             "total_questions": total_questions,
             "time_left": time_left_val,
-            "question_list": questions_qids,
+            "question_list": list(questions_qids),
             "bookmarks_json": json.dumps(bookmarks),
         })
         return render(request, "testquiz.html", context)
@@ -434,19 +389,135 @@ def give_test_exam_view(request, test_id):
 def randomize_view(request):
     if request.method == "POST":
         test_id = request.POST.get('id')
-        # collect qids and remove duplicates to avoid showing the same question repeatedly
-        raw_qids = list(Question.objects.filter(test_id=test_id).values_list('qid', flat=True))
-        seen = set()
-        questions = []
-        for q in raw_qids:
-            if q not in seen:
-                seen.add(q)
-                questions.append(q)
-        random.shuffle(questions)
-        return JsonResponse(questions, safe=False)
+        # deduplicated qids, so the same question is not shown repeatedly
+        qids = list(question_sets.get(test_id).qids)
+        random.shuffle(qids)
+        return JsonResponse(qids, safe=False)
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
 
+def _exam_session(request, test_id):
+    """
+    (teacher, sti, None) for an objective test the student has entered, or
+    (None, None, JsonResponse) with the error to return.
+    """
+    if request.user.user_type != "student":
+        return None, None, JsonResponse({'error': 'Access denied'}, status=403)
+    teacher = Teacher.objects.filter(test_id=test_id).only('test_type', 'duration').first()
+    if not teacher or teacher.test_type in ('subjective', 'practical'):
+        return None, None, JsonResponse({'error': 'Test not found'}, status=404)
+    sti = StudentTestInfo.objects.filter(uid=request.user, email=request.user.email, test_id=test_id).first()
+    if not sti:
+        # The test password has not been entered (give_test_view creates the row)
+        return None, None, JsonResponse({'error': 'Test not started'}, status=403)
+    return teacher, sti, None
+
+
+@login_required
+@require_GET
+def exam_api_start_view(request, test_id):
+    """
+    Everything the exam page needs, in one response: the question set (shuffled per
+    student with EXAMS_SHUFFLE_QUESTIONS), saved answers, bookmarks and time left.
+    The page then navigates locally and only talks to exam_api_sync_view.
+    """
+    teacher, sti, error = _exam_session(request, test_id)
+    if error:
+        return error
+    question_set = question_sets.get(test_id)
+    qids = list(question_set.qids)
+    if getattr(settings, 'EXAMS_SHUFFLE_QUESTIONS', False):
+        # Seeded per student, so reloading the page keeps the order
+        random.Random(f"{request.user.pk}:{test_id}").shuffle(qids)
+    answers = dict(
+        Student.objects.filter(uid=request.user, test_id=test_id, qid__in=qids)
+        .exclude(ans__isnull=True).exclude(ans='').values_list('qid', 'ans')
+    )
+    return JsonResponse({
+        'test_id': test_id,
+        'questions': [{'qid': qid, **question_set.questions[qid]} for qid in qids],
+        'answers': answers,
+        'bookmarks': list(request.session.get('bookmarks', {}).get(test_id, [])),
+        'time_left': heartbeat.remaining(request.user.pk, test_id),
+        'completed': bool(sti.completed),
+        'sync_interval_ms': getattr(settings, 'EXAMS_SYNC_INTERVAL_MS', 15000),
+    })
+
+
+@login_required
+@require_POST
+def exam_api_sync_view(request, test_id):
+    """
+    Batched, idempotent answer sync. JSON body:
+        {"answers": [{"qid": "1", "ans": "b", "ts": 1700000000000}, ...],
+         "time_left": 1234, "bookmarks": ["3"], "completed": false}
+    Every field is optional. Answers older than the stored one for their qid are skipped,
+    so retrying a batch (or receiving it late) is harmless. Each sync is also a heartbeat:
+    the time left in the response comes from the server clock (exams/heartbeat.py) and the
+    client's time_left is ignored.
+    """
+    teacher, sti, error = _exam_session(request, test_id)
+    if error:
+        return error
+    try:
+        payload = json.loads(request.body or b'{}')
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    answers = payload.get('answers') or []
+    if not isinstance(answers, list) or len(answers) > getattr(settings, 'EXAMS_SYNC_MAX_ANSWERS', 500):
+        return JsonResponse({'error': 'Invalid answers'}, status=400)
+
+    known = question_sets.get(test_id).index
+    updates, rejected = [], []
+    for item in answers:
+        qid = str(item.get('qid', '')) if isinstance(item, dict) else ''
+        ts = item.get('ts') if isinstance(item, dict) else None
+        if qid not in known or not isinstance(ts, (int, float)):
+            rejected.append(qid)
+            continue
+        ans = item.get('ans')
+        updates.append((qid, '' if ans is None else str(ans)[:10], int(ts)))
+    applied = record_answers(request.user, test_id, updates) if updates else 0
+
+    time_left = heartbeat.beat(request.user.pk, test_id)
+
+    bookmarks = payload.get('bookmarks')
+    if isinstance(bookmarks, list):
+        bookmarks = sorted({str(qid) for qid in bookmarks if str(qid) in known})
+        stored = request.session.get('bookmarks', {})
+        if sorted(stored.get(test_id, [])) != bookmarks:
+            stored[test_id] = bookmarks
+            request.session['bookmarks'] = stored
+
+    if payload.get('completed') and not sti.completed:
+        time_left = heartbeat.finish(request.user.pk, test_id)
+        StudentTestInfo.objects.filter(pk=sti.pk).update(completed=1)
+        sti.completed = 1
+
+    return JsonResponse({
+        'applied': applied,
+        'skipped': len(updates) - applied,
+        'rejected': rejected,
+        'time_left': time_left,
+        'completed': bool(sti.completed),
+    })
+
+
+@login_required
+@require_POST
+def exam_heartbeat_view(request, test_id):
+    """
+    Time-left heartbeat of every exam page. Returns the remaining seconds from the server
+    clock; the database row is only checkpointed every EXAMS_HEARTBEAT_CHECKPOINT_INTERVAL.
+    """
+    if request.user.user_type != "student":
+        return JsonResponse({'error': 'Access denied'}, status=403)
+    time_left = heartbeat.beat(request.user.pk, test_id)
+    if time_left is None:
+        return JsonResponse({'error': 'Test not started'}, status=404)
+    return JsonResponse({'time_left': time_left, 'expired': time_left == 0})
+
+
 @login_required
 @csrf_exempt
 def window_event_view(request):
@@ -455,10 +526,10 @@ def window_event_view(request):
         test_id = request.POST.get('testid')
         
         # Log the violation
-        ViolationLog.objects.create(
-            student=request.user,
-            test_id=test_id or 'unknown',
-            details="Tab Switch / Window Focus Lost",
+        log_violation(
+            request.user,
+            test_id or 'unknown',
+            "Tab Switch / Window Focus Lost",
             score=1
         )
         
@@ -466,10 +537,172 @@ def window_event_view(request):
     return JsonResponse({'status': 'ignored'})
 
 
+def _decode_frame(data):
+    """Decode encoded image bytes (JPEG/WebP/PNG) straight into a BGR NumPy array."""
+    if cv2 is not None:
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    else:
+        image = np.asarray(Image.open(BytesIO(data)).convert('RGB'))[:, :, ::-1]
+    if image is None or image.size == 0:
+        raise ValueError("Could not decode frame")
+    return image
+
+
+def _analyze_frame(request, image, voice_db, test_id):
+    """Run detection and scoring rules on one decoded frame and build the JSON response."""
+    alerts = []
+    score_increment = 0
+    
+    # Load model if needed
+    load_yolo_model()
+    
+    # Run inference (batched with other students' frames), or reuse the last
+    # result when the scene has not changed since the previous frame
+    try:
+        detections = detect_with_cache(YOLO_BROKER, (request.user.pk, test_id), image, conf=0.4)
+    except (TimeoutError, WorkerError) as e:
+        # Detector overloaded or unreachable: skip object rules for this frame and
+        # slow every session down instead of letting requests pile up
+        print(f"Detection skipped: {e}")
+        sampling.report_overload()
+        detections = None
+    if detections is not None:
+        detected_objects = [d.name for d in detections]
+        
+        # --- RULE 1: NO FACE DETECTED (+2) ---
+        # Only log this violation if face was previously detected but is now missing
+        # This prevents false positives from poor frame quality on first attempt
+        person_count = detected_objects.count('person')
+        
+        # Check if student previously had face detected ("Face Re-detected" marker)
+        previous_with_face = proctoring_state.get_state(request.user.pk, test_id or 'unknown').face_baseline
+        
+        if person_count == 0 and previous_with_face:
+            # Only flag if face was detected before and is now gone
+            alerts.append("No Face Detected")
+            score_increment += 2
+            log_violation(
+                request.user,
+                test_id or 'unknown',
+                "No Face Detected",
+                score=2
+            )
+        elif person_count > 0 and not previous_with_face:
+            # Log that face is present (baseline for future checks)
+            log_violation(
+                request.user,
+                test_id or 'unknown',
+                "Face Re-detected",
+                score=0  # No penalty for detecting face initially
+            )
+
+        # --- RULE 2: MULTIPLE PERSONS (+2) ---
+        elif person_count > 1:
+            alerts.append(f"Multiple Persons Detected ({person_count})")
+            score_increment += 2
+            log_violation(
+                request.user,
+                test_id or 'unknown',
+                f"Multiple Persons ({person_count})",
+                score=2
+            )
+        
+        # --- RULE 3: PROHIBITED ITEMS ---
+        # Mobile Phone (+2)
+        if 'cell phone' in detected_objects or 'mobile phone' in detected_objects:
+            alerts.append("Mobile Phone Detected")
+            score_increment += 2
+            log_violation(
+                 request.user,
+                 test_id or 'unknown',
+                 "Mobile Phone Detected",
+                 score=2
+            )
+        
+        # Book (+1)
+        if 'book' in detected_objects:
+            alerts.append("Book Detected")
+            score_increment += 1
+            log_violation(
+                 request.user,
+                 test_id or 'unknown',
+                 "Book Detected",
+                 score=1
+            )
+
+        # Laptop (+1) - if distinct from current device
+        if 'laptop' in detected_objects:
+            alerts.append("Laptop Detected")
+            score_increment += 1
+            log_violation(
+                 request.user,
+                 test_id or 'unknown',
+                 "Laptop Detected",
+                 score=1
+            )
+
+    # --- RULE 4: AUDIO DETECTION (+1) ---
+    # app.js sends 'average' as voice_db. Adjust threshold based on testing.
+    try:
+        if voice_db and float(voice_db) > 50: # Example threshold
+             alerts.append("High Audio Level")
+             score_increment += 1
+             log_violation(
+                 request.user,
+                 test_id or 'unknown',
+                 f"High Volume ({voice_db})",
+                 score=1
+            )
+    except (ValueError, TypeError):
+        pass
+
+    # --- CALCULATE TOTAL SCORE AND FLAG COUNT ---
+    # Running totals are kept per student/test instead of re-aggregating ViolationLog;
+    # "Face Re-detected" baseline markers are not counted as flags.
+    session_state = proctoring_state.get_state(request.user.pk, test_id or 'unknown')
+    total_score = session_state.score
+
+    # --- RULE 5A: TERMINATE IF 5 FLAGS RAISED (Primary termination method) ---
+    violation_flags = session_state.flags
+
+    # Server-driven sampling: faster after violations, slower on clean streaks and under load
+    next_interval = sampling.next_interval_ms(
+        (request.user.pk, test_id), test_id or 'unknown', bool(alerts), YOLO_BROKER.pressure()
+    )
+    
+    if violation_flags >= 5:
+        print(f"Terminating exam for {request.user}. Violation Flags: {violation_flags}")
+        return JsonResponse({
+            'status': 'terminate',
+            'message': f'Exam terminated after {violation_flags} violations detected.',
+            'score': total_score,
+            'flags': violation_flags,
+            'next_interval_ms': next_interval
+        })
+
+    # Return appropriate response
+    if alerts:  # If violations were detected
+        return JsonResponse({
+            'status': 'warning_popup',
+            'alerts': alerts,
+            'score': total_score,
+            'flags': violation_flags,
+            'next_interval_ms': next_interval
+        })
+    else:  # No violations
+        return JsonResponse({
+            'status': 'processed',
+            'alerts': [],
+            'score': total_score,
+            'flags': violation_flags,
+            'next_interval_ms': next_interval
+        })
+
+
 @login_required
 @csrf_exempt
 def video_feed_view(request):
-    """Process video feed for exam monitoring with scoring logic."""
+    """Process video feed for exam monitoring with scoring logic (legacy base64 form field)."""
     if request.method == 'POST':
         try:
             # Handle jQuery $.post nested data structure
@@ -481,162 +714,8 @@ def video_feed_view(request):
                 return JsonResponse({'status': 'no_image'})
 
             # Decode image
-            image_bytes = base64.b64decode(image_data)
-            image = Image.open(BytesIO(image_bytes))
-            
-            alerts = []
-            score_increment = 0
-            
-            # Load model if needed
-            load_yolo_model()
-            
-            if YOLO_MODEL:
-                # Run inference
-                results = YOLO_MODEL(image, verbose=False, conf=0.4)
-                detected_objects = []
-                
-                for result in results:
-                    for box in result.boxes:
-                        cls_id = int(box.cls[0])
-                        class_name = result.names[cls_id] if hasattr(result, 'names') else str(cls_id)
-                        detected_objects.append(class_name)
-                
-                # --- RULE 1: NO FACE DETECTED (+2) ---
-                # Only log this violation if face was previously detected but is now missing
-                # This prevents false positives from poor frame quality on first attempt
-                person_count = detected_objects.count('person')
-                
-                # Check if student previously had face detected
-                previous_with_face = ViolationLog.objects.filter(
-                    student=request.user,
-                    test_id=test_id or 'unknown',
-                    details="Face Re-detected"  # Marker for face recovery
-                ).exists()
-                
-                if person_count == 0 and previous_with_face:
-                    # Only flag if face was detected before and is now gone
-                    alerts.append("No Face Detected")
-                    score_increment += 2
-                    ViolationLog.objects.create(
-                        student=request.user,
-                        test_id=test_id or 'unknown',
-                        details="No Face Detected",
-                        score=2
-                    )
-                elif person_count > 0 and not previous_with_face:
-                    # Log that face is present (baseline for future checks)
-                    ViolationLog.objects.create(
-                        student=request.user,
-                        test_id=test_id or 'unknown',
-                        details="Face Re-detected",
-                        score=0  # No penalty for detecting face initially
-                    )
-
-                # --- RULE 2: MULTIPLE PERSONS (+2) ---
-                elif person_count > 1:
-                    alerts.append(f"Multiple Persons Detected ({person_count})")
-                    score_increment += 2
-                    ViolationLog.objects.create(
-                        student=request.user,
-                        test_id=test_id or 'unknown',
-                        details=f"Multiple Persons ({person_count})",
-                        score=2
-                    )
-                
-                # --- RULE 3: PROHIBITED ITEMS ---
-                # Mobile Phone (+2)
-                if 'cell phone' in detected_objects or 'mobile phone' in detected_objects:
-                    alerts.append("Mobile Phone Detected")
-                    score_increment += 2
-                    ViolationLog.objects.create(
-                         student=request.user,
-                         test_id=test_id or 'unknown',
-                         details="Mobile Phone Detected",
-                         score=2
-                    )
-                
-                # Book (+1)
-                if 'book' in detected_objects:
-                    alerts.append("Book Detected")
-                    score_increment += 1
-                    ViolationLog.objects.create(
-                         student=request.user,
-                         test_id=test_id or 'unknown',
-                         details="Book Detected",
-                         score=1
-                    )
-
-                # Laptop (+1) - if distinct from current device
-                if 'laptop' in detected_objects:
-                    alerts.append("Laptop Detected")
-                    score_increment += 1
-                    ViolationLog.objects.create(
-                         student=request.user,
-                         test_id=test_id or 'unknown',
-                         details="Laptop Detected",
-                         score=1
-                    )
-
-            # --- RULE 4: AUDIO DETECTION (+1) ---
-            # app.js sends 'average' as voice_db. Adjust threshold based on testing.
-            try:
-                if voice_db and float(voice_db) > 50: # Example threshold
-                     alerts.append("High Audio Level")
-                     score_increment += 1
-                     ViolationLog.objects.create(
-                         student=request.user,
-                         test_id=test_id or 'unknown',
-                         details=f"High Volume ({voice_db})",
-                         score=1
-                    )
-            except (ValueError, TypeError):
-                pass
-
-            # --- CALCULATE TOTAL SCORE AND FLAG COUNT ---
-            # Sum up scores from ViolationLog
-            from django.db.models import Sum
-            total_score = ViolationLog.objects.filter(
-                student=request.user, 
-                test_id=test_id or 'unknown'
-            ).aggregate(Sum('score'))['score__sum'] or 0
-            
-            # Count total violations (each ViolationLog record = 1 violation)
-            total_violations = ViolationLog.objects.filter(
-                student=request.user, 
-                test_id=test_id or 'unknown'
-            ).count()
-
-            # --- RULE 5A: TERMINATE IF 5 FLAGS RAISED (Primary termination method) ---
-            # Only count actual violation flags (excluding face re-detection markers)
-            violation_flags = ViolationLog.objects.filter(
-                student=request.user, 
-                test_id=test_id or 'unknown'
-            ).exclude(details="Face Re-detected").count()
-            
-            if violation_flags >= 5:
-                print(f"Terminating exam for {request.user}. Violation Flags: {violation_flags}")
-                return JsonResponse({
-                    'status': 'terminate',
-                    'message': f'Exam terminated after {violation_flags} violations detected.',
-                    'score': total_score,
-                    'flags': violation_flags
-                })
-
-            # Return appropriate response
-            if alerts:  # If violations were detected
-                return JsonResponse({
-                    'status': 'warning_popup',
-                    'alerts': alerts,
-                    'score': total_score,
-                    'flags': violation_flags
-                })
-            else:  # No violations
-                return JsonResponse({
-                    'status': 'processed',
-                    'alerts': [],
-                    'score': total_score,
-                    'flags': violation_flags
-                })
+            image = _decode_frame(base64.b64decode(image_data))
+            return _analyze_frame(request, image, voice_db, test_id)
             
         except Exception as e:
             print(f"Monitoring error: {e}")
@@ -645,6 +724,35 @@ def video_feed_view(request):
     return JsonResponse({'status': 'processed'})
 
 
+@login_required
+@csrf_exempt
+@require_POST
+def video_feed_frame_view(request):
+    """
+    Binary frame ingest: the encoded JPEG/WebP frame is the raw request body
+    (application/octet-stream or image/*) or a multipart 'frame' Blob.
+    testid and voice_db come from the query string (or multipart fields).
+    """
+    try:
+        if request.content_type == 'multipart/form-data':
+            upload = request.FILES.get('frame')
+            data = upload.read() if upload else b''
+            params = request.POST
+        else:
+            data = request.body
+            params = request.GET
+
+        if not data:
+            return JsonResponse({'status': 'no_image'})
+
+        image = _decode_frame(data)
+        return _analyze_frame(request, image, params.get('voice_db'), params.get('testid'))
+
+    except Exception as e:
+        print(f"Monitoring error: {e}")
+        return JsonResponse({'status': 'error', 'message': str(e)})
+
+
 @login_required
 def scan_360_view(request, test_id):
     """Render the 360-degree environment scan page."""
@@ -675,6 +783,7 @@ def finish_exam_view(request):
 
     # Mark StudentTestInfo as completed for current user and test (if provided)
     if test_id:
+        heartbeat.finish(request.user.pk, test_id)
         StudentTestInfo.objects.filter(
             uid=request.user,
             email=request.user.email,
@@ -723,45 +832,31 @@ def process_scan_frame(request):
         is_clean = True
         detected_objects = []
         
-        if YOLO_MODEL:
-            # Convert to cv2 format for YOLO (or pass PIL)
-            # YOLOv8 supports PIL images directly
-            # Run inference with lower confidence to see if ANYTHING is detected
-            results = YOLO_MODEL(image, verbose=False, conf=0.25) 
-            
-            # Process results
+        # YOLOv8 supports PIL images directly
+        # Run inference with lower confidence to see if ANYTHING is detected
+        detections = YOLO_BROKER.detect(image, conf=0.25)
+        if detections is not None:
             # Classes: 0:person, 67:cell phone, 63:laptop, 73:book, etc. (COCO indices)
             # We rely on class names
-            
-            for result in results:
-                # Debug: print all detected classes
-                if len(result.boxes) > 0:
-                    print(f"DEBUG: Detected {len(result.boxes)} objects")
-                
-                for box in result.boxes:
-                    cls_id = int(box.cls[0])
-                    # Handle both integer and string keys in names
-                    if hasattr(result, 'names'):
-                        class_name = result.names[cls_id]
-                    else:
-                         class_name = str(cls_id)
+            if detections:
+                print(f"DEBUG: Detected {len(detections)} objects")
 
-                    conf = float(box.conf[0])
-                    print(f"DEBUG: Found {class_name} ({conf:.2f})")
+            for class_name, conf in detections:
+                print(f"DEBUG: Found {class_name} ({conf:.2f})")
+                
+                if conf > 0.4: # Slightly lower threshold
+                    detected_objects.append(class_name)
+                    
+                    # Check restricted
+                    # Logic: Multiple people is bad. Phone/Book is bad.
                     
-                    if conf > 0.4: # Slightly lower threshold
-                        detected_objects.append(class_name)
-                        
-                        # Check restricted
-                        # Logic: Multiple people is bad. Phone/Book is bad.
-                        
-                        if class_name in RESTRICTED_CLASSES or (class_name == 'person' and detected_objects.count('person') > 1):
-                            # Allow one person (the student)
-                            if class_name == 'person' and detected_objects.count('person') == 1:
-                                pass
-                            else:
-                                is_clean = False
-                                print(f"DEBUG: Violation found: {class_name}")
+                    if class_name in RESTRICTED_CLASSES or (class_name == 'person' and detected_objects.count('person') > 1):
+                        # Allow one person (the student)
+                        if class_name == 'person' and detected_objects.count('person') == 1:
+                            pass
+                        else:
+                            is_clean = False
+                            print(f"DEBUG: Violation found: {class_name}")
 
         else:
             print("WARNING: YOLO_MODEL could not be loaded. Allowing scan to proceed without detection.")
@@ -779,11 +874,11 @@ def process_scan_frame(request):
             # Check if recent violation exists to avoid spamming DB
             # For 360 scan, we can just log every time or throttle
             # Here we just log
-            ViolationLog.objects.create(
-                student=request.user,
-                test_id=test_id,
-                details=f"Scan Violation: Found {', '.join(detected_objects)}",
-                evidence="[Base64 Image Omitted]" 
+            log_violation(
+                request.user,
+                test_id,
+                f"Scan Violation: Found {', '.join(detected_objects)}",
+                evidence=image_bytes,
             )
             
         return JsonResponse({
@@ -1197,6 +1292,7 @@ def create_test_view(request):
                 marks=1,
                 uid=request.user
             )
+        question_sets.invalidate(test_id)
         
         messages.success(request, f"Test '{test_id}' created successfully!")
         return redirect('disptests')
@@ -1472,6 +1568,7 @@ def update_objective_question_view(request, test_id, qid):
         question.marks = request.POST.get('mko', question.marks)
         
         question.save()
+        _questions_changed(test_id)
         messages.success(request, f"Question {qid} updated successfully!")
         return redirect('updatetidlist')
     
@@ -1514,6 +1611,7 @@ def update_long_question_view(request, test_id, qid):
         question.marks = request.POST.get('mko', question.marks)
         
         question.save()
+        _questions_changed(test_id)
         messages.success(request, f"Long answer question {qid} updated successfully!")
         return redirect('updatetidlist')
     
@@ -1551,6 +1649,7 @@ def update_practical_question_view(request, test_id, qid):
         question.marks = request.POST.get('mko', question.marks)
         
         question.save()
+        _questions_changed(test_id)
         messages.success(request, f"Practical question {qid} updated successfully!")
         return redirect('updatetidlist')
     
@@ -1635,12 +1734,11 @@ def live_monitoring_view(request):
         
         # Get student logs for this test (active sessions)
         # Assuming StudentTestInfo tracks active test-taking sessions
-        student_logs = StudentTestInfo.objects.filter(test_id=test_id)
+        student_logs = StudentTestInfo.objects.filter(test_id=test_id).select_related('uid')
         
-        # Prepare data for the template
+        # Prepare data for the template; violation counters arrive over the live stream
         log_data = []
         for log in student_logs:
-            student = Student.objects.filter(email=log.email, test_id=test_id).first()
             log_entry = {
                 'email': log.email,
                 'time_left': log.time_left,
@@ -1673,35 +1771,12 @@ def ajax_student_monitoring_stats_view(request, test_id, email):
     if not teacher_record:
         return JsonResponse({'error': 'Test not found'}, status=404)
     
-    # This is a placeholder - in a real implementation, you would query
-    # the actual monitoring logs from your database tables
-    # For now, returning sample data
+    # The monitoring pages now follow proctoring's live stream; this one-off read is
+    # kept for other callers and counts everything in a single grouped query
     try:
-        # Get all logs for this student and test
-        logs = ViolationLog.objects.filter(test_id=test_id, student__email=email)
-        
-        # Calculate stats based on log details
-        window_events = logs.filter(details__icontains="Tab Switch").count()
-        mobile_detected = logs.filter(
-            models.Q(details__icontains="Mobile Phone") | 
-            models.Q(details__icontains="Cell Phone")
-        ).count()
-        person_events = logs.filter(
-            models.Q(details__icontains="Person") | 
-            models.Q(details__icontains="Face")
-        ).count()
-        audio_events = logs.filter(details__icontains="High Volume").count()
-        
-        total_logs = logs.count()
-        
-        stats = {
-            'win': window_events,
-            'mob': mobile_detected,
-            'per': person_events,
-            'aud': audio_events,
-            'tot': total_logs
-        }
-        
+        flush_pending()
+        counts = live.counter_totals(test_id, email).get(email, {})
+        stats = {name: counts.get(name, 0) for name in live.COUNTER_NAMES}
         return JsonResponse(stats)
     
     except Exception as e:
@@ -1806,6 +1881,35 @@ def insert_obj_marks_view(request, test_id, email):
     return render(request, "insertobjmarks.html", context)
 
 
+def _save_manual_marks(request, test_id, email, test_type):
+    """Store the marks posted by the insert-marks forms (one field per qid) and refresh the student's TestResult."""
+    key_model, marks_model = (LongQA, LongTest) if test_type == 'subjective' else (PracticalQA, PracticalTest)
+    answers = Student.objects.filter(test_id=test_id, email=email)
+    uid = answers.values_list('uid', flat=True).first()
+    if uid is None:
+        return 0
+    answer_text = dict(answers.values_list('qid', 'ans'))
+    saved = 0
+    for qid, max_marks in key_model.objects.filter(test_id=test_id).values_list('qid', 'marks'):
+        try:
+            marks = int(request.POST.get(qid, ''))
+            # LongTest.qid is an integer column
+            row_qid = int(qid) if marks_model is LongTest else qid
+        except ValueError:
+            continue
+        marks = max(0, min(marks, max_marks)) if max_marks else max(0, marks)
+        answer_field = 'ans' if marks_model is LongTest else 'code'
+        marks_model.objects.update_or_create(
+            email=email,
+            test_id=test_id,
+            qid=row_qid,
+            defaults={'marks': marks, answer_field: answer_text.get(qid) or '', 'uid_id': uid},
+        )
+        saved += 1
+    refresh_result(email, test_id, uid=uid)
+    return saved
+
+
 @login_required
 def insert_sub_marks_view(request, test_id, email):
     """Display interface to insert marks for subjective test for a specific student."""
@@ -1818,6 +1922,11 @@ def insert_sub_marks_view(request, test_id, email):
         messages.error(request, "Test not found.")
         return redirect('insertmarkstid')
     
+    if request.method == 'POST':
+        saved = _save_manual_marks(request, test_id, email, 'subjective')
+        messages.success(request, f"Marks saved for {saved} question(s).")
+        return redirect('insert_sub_marks', test_id=test_id, email=email)
+    
     # Get the student's answers for subjective questions
     student_answers = Student.objects.filter(test_id=test_id, email=email)
     
@@ -1859,6 +1968,11 @@ def insert_prac_marks_view(request, test_id, email):
         messages.error(request, "Test not found.")
         return redirect('insertmarkstid')
     
+    if request.method == 'POST':
+        saved = _save_manual_marks(request, test_id, email, 'practical')
+        messages.success(request, f"Marks saved for {saved} question(s).")
+        return redirect('insert_prac_marks', test_id=test_id, email=email)
+    
     # Get the student's answers for practical questions
     student_answers = Student.objects.filter(test_id=test_id, email=email)
     
@@ -1910,63 +2024,9 @@ def view_results_view(request):
             messages.error(request, "Test not found.")
             return redirect('publish_results_testid')
         
-        # Find all students who took this test
-        # We use StudentTestInfo because it tracks active/completed test sessions
-        student_sessions = StudentTestInfo.objects.filter(test_id=test_id)
-        test_type = teacher_record.test_type
-
-        results_data = []
-        for session in student_sessions:
-            student_email = session.email
-            total_possible = 0
-            total_score = 0
-            
-            if test_type == 'subjective':
-                # Sum the actual marks awarded in LongTest
-                long_tests = LongTest.objects.filter(test_id=test_id, email=student_email)
-                for lt in long_tests:
-                    total_score += lt.marks if lt.marks else 0
-                
-                # Calculate total possible from LongQA
-                long_qas = LongQA.objects.filter(test_id=test_id)
-                total_possible = sum([q.marks if q.marks else 0 for q in long_qas])
-                
-            elif test_type == 'practical':
-                # Sum the actual marks awarded in PracticalTest
-                prac_tests = PracticalTest.objects.filter(test_id=test_id, email=student_email)
-                for pt in prac_tests:
-                    total_score += pt.marks if pt.marks else 0
-                
-                # Calculate total possible from PracticalQA
-                prac_qas = PracticalQA.objects.filter(test_id=test_id)
-                total_possible = sum([q.marks if q.marks else 0 for q in prac_qas])
-                
-            else:  # objective
-                # Get the questions for this test to calculate total possible marks
-                questions = Question.objects.filter(test_id=test_id)
-                total_possible = sum([q.marks for q in questions])
-                
-                # Calculate actual score based on correct answers
-                for q in questions:
-                    student_answer = Student.objects.filter(
-                        test_id=test_id,
-                        email=student_email,
-                        qid=q.qid,
-                        ans=q.ans  # If student's answer matches correct answer
-                    ).count()
-                    if student_answer > 0:
-                        total_score += q.marks
-            
-            # Avoid duplicate emails if there are multiple sessions by checking if already in results_data
-            if not any(r['email'] == student_email for r in results_data):
-                results_data.append({
-                    'email': student_email,
-                    'marks': total_score,
-                    'total_possible': total_possible
-                })
-        
+        # Scores are kept per student in TestResult as answers and marks are saved
         context = {
-            'callresults': results_data,
+            'callresults': results_for_test(test_id),
             'tid': test_id
         }
         
@@ -1977,27 +2037,21 @@ def view_results_view(request):
 
 
 def _build_results_data(test_id, request_user):
-    """Build list of {email, marks, total_possible, percentage} for a test. Returns empty if no data."""
+    """
+    Results of a test for its results page: students (TestResult rows with email, marks,
+    total_possible, percentage), per-question stats (objective tests) and the distribution.
+    Returns None if the test does not belong to the user.
+    """
     teacher_record = Teacher.objects.filter(test_id=test_id, uid=request_user).first()
     if not teacher_record:
-        return None, 0
-    student_results = Student.objects.filter(test_id=test_id).values_list("email", flat=True).distinct()
-    questions = Question.objects.filter(test_id=test_id)
-    total_possible = sum(q.marks for q in questions) if questions else 0
-    results_data = []
-    for email in student_results:
-        total_score = 0
-        for q in questions:
-            if Student.objects.filter(test_id=test_id, email=email, qid=q.qid, ans=q.ans).exists():
-                total_score += q.marks
-        pct = round(100 * total_score / total_possible, 1) if total_possible else 0
-        results_data.append({
-            "email": email,
-            "marks": total_score,
-            "total_possible": total_possible,
-            "percentage": pct,
-        })
-    return results_data, total_possible
+        return None
+    rows = results_for_test(test_id)
+    objective = teacher_record.test_type not in ('subjective', 'practical')
+    return {
+        "students": rows,
+        "questions": question_stats(test_id, [row.email for row in rows]) if objective and rows else [],
+        "distribution": distribution_of(row.percentage for row in rows),
+    }
 
 
 # Dummy result set for demo when no real results exist
@@ -2027,15 +2081,23 @@ def view_results_for_test_view(request, test_id):
     if not teacher_record:
         messages.error(request, "Test not found.")
         return redirect("tests_created")
-    results_data, total_possible = _build_results_data(test_id, request.user)
-    use_dummy = False
-    if not results_data:
-        results_data = list(DUMMY_RESULTS)
-        use_dummy = True
+    report = _build_results_data(test_id, request.user)
+    if not report or not report["students"]:
+        return render(
+            request,
+            "view_results_detail.html",
+            {"callresults": list(DUMMY_RESULTS), "tid": test_id, "use_dummy": True},
+        )
     return render(
         request,
         "view_results_detail.html",
-        {"callresults": results_data, "tid": test_id, "use_dummy": use_dummy},
+        {
+            "callresults": report["students"],
+            "question_stats": report["questions"],
+            "distribution": report["distribution"],
+            "tid": test_id,
+            "use_dummy": False,
+        },
     )
 
 
@@ -2088,7 +2150,7 @@ def winevent_students_logs_view(request, test_id, email):
         return redirect('livemonitoringtid')
     
     # Get window event logs
-    window_logs = WindowEstimationLog.objects.filter(test_id=test_id, email=email)
+    window_logs = archive.rows_for(WindowEstimationLog, test_id, email=email)
     
     # Get student name
     student = Student.objects.filter(email=email, test_id=test_id).first()
@@ -2116,7 +2178,7 @@ def person_display_students_logs_view(request, test_id, email):
         return redirect('livemonitoringtid')
     
     # Get proctoring logs with person detection
-    proctoring_logs = ProctoringLog.objects.filter(test_id=test_id, email=email)
+    proctoring_logs = archive.rows_for(ProctoringLog, test_id, email=email)
     
     # Get student name
     student = Student.objects.filter(email=email, test_id=test_id).first()
@@ -2144,7 +2206,7 @@ def mob_display_students_logs_view(request, test_id, email):
         return redirect('livemonitoringtid')
     
     # Get proctoring logs with mobile detection
-    proctoring_logs = ProctoringLog.objects.filter(test_id=test_id, email=email)
+    proctoring_logs = archive.rows_for(ProctoringLog, test_id, email=email)
     
     # Get student name
     student = Student.objects.filter(email=email, test_id=test_id).first()
@@ -2172,7 +2234,7 @@ def audio_display_students_logs_view(request, test_id, email):
         return redirect('livemonitoringtid')
     
     # Get proctoring logs with audio data
-    proctoring_logs = ProctoringLog.objects.filter(test_id=test_id, email=email)
+    proctoring_logs = archive.rows_for(ProctoringLog, test_id, email=email)
     
     # Get student name
     student = Student.objects.filter(email=email, test_id=test_id).first()
@@ -2200,7 +2262,7 @@ def display_students_logs_view(request, test_id, email):
         return redirect('livemonitoringtid')
     
     # Get all proctoring logs
-    proctoring_logs = ProctoringLog.objects.filter(test_id=test_id, email=email)
+    proctoring_logs = archive.rows_for(ProctoringLog, test_id, email=email)
     
     # Get student name
     student = Student.objects.filter(email=email, test_id=test_id).first()
@@ -2374,6 +2436,9 @@ def delete_questions_view(request, test_id):
                     uid=request.user
                 ).delete()
             
+            if deleted_count:
+                _questions_changed(test_id)
+            
             return JsonResponse({
                 'success': f'Successfully deleted {deleted_count} question(s)',
                 'message': f'{deleted_count} question(s) have been deleted successfully.'
@@ -2416,10 +2481,10 @@ def check_environment_view(request):
                 # Or try to get test_id from request if sent
                 test_id = request.POST.get('test_id') or request.GET.get('test_id') or 'SYSTEM_CHECK'
                 
-                ViolationLog.objects.create(
-                    student=request.user,
-                    test_id=test_id,
-                    details=f"Environment Violation: {', '.join(details)}",
+                log_violation(
+                    request.user,
+                    test_id,
+                    f"Environment Violation: {', '.join(details)}",
                     score=5 # High score for environment manipulation
                 )
         
@@ -2476,6 +2541,7 @@ def add_objective_question_view(request, test_id):
             marks=int(marks)
         )
         
+        _questions_changed(test_id)
         messages.success(request, f"Question {qid} added successfully!")
         return redirect('updatetidlist')
         
@@ -2514,6 +2580,7 @@ def add_long_question_view(request, test_id):
             marks=int(marks)
         )
         
+        _questions_changed(test_id)
         messages.success(request, f"Subjective question {qid} added successfully!")
         return redirect('updatetidlist')
         
@@ -2554,6 +2621,7 @@ def add_practical_question_view(request, test_id):
             marks=int(marks)
         )
         
+        _questions_changed(test_id)
         messages.success(request, f"Practical question {qid} added successfully!")
         return redirect('updatetidlist')
         
@@ -77,7 +77,8 @@ def move_box(box, offset):
         bottom_y = box[3] + offset[1]
         return [left_x, top_y, right_x, bottom_y]
 
-def detect_marks(img, model, face):
+def face_crop_box(img, face):
+    """Square landmark crop box for a detected face, clipped to the image."""
     offset_y = int(abs((face[3] - face[1]) * 0.1))
     box_moved = move_box(face, [0, offset_y])
     facebox = get_square_box(box_moved)
@@ -91,22 +92,52 @@ def detect_marks(img, model, face):
         facebox[2] = w
     if facebox[3] > h:
         facebox[3] = h
-    
+    return facebox
+
+def _crop_face(img, facebox):
     face_img = img[facebox[1]: facebox[3],
                      facebox[0]: facebox[2]]
     face_img = cv2.resize(face_img, (320, 320))
-    face_img = cv2.cvtColor(face_img, cv2.COLOR_BGR2RGB)
+    return cv2.cvtColor(face_img, cv2.COLOR_BGR2RGB)
+
+def _to_image_coords(marks, facebox):
+    marks = np.reshape(marks, (-1, 2)).copy()
+    marks *= (facebox[2] - facebox[0])
+    marks[:, 0] += facebox[0]
+    marks[:, 1] += facebox[1]
+    return marks.astype(np.uint)
+
+def detect_marks(img, model, face):
+    facebox = face_crop_box(img, face)
+    face_img = _crop_face(img, facebox)
     
     import tensorflow as tf
     predictions = model.signatures["predict"](
         tf.constant([face_img], dtype=tf.uint8))
 
     marks = np.array(predictions['output']).flatten()[:136]
-    marks = np.reshape(marks, (-1, 2))
-    
-    marks *= (facebox[2] - facebox[0])
-    marks[:, 0] += facebox[0]
-    marks[:, 1] += facebox[1]
-    marks = marks.astype(np.uint)
+    return _to_image_coords(marks, facebox)
 
-    return marks 
+def detect_marks_batch(img, model, faces):
+    """
+    Landmarks for every face in one model call.
+    Returns an (N, 68, 2) array in image coordinates (same values as detect_marks per face).
+    """
+    if len(faces) == 0:
+        return np.zeros((0, 68, 2), dtype=np.uint)
+    faceboxes = [face_crop_box(img, face) for face in faces]
+    batch = np.stack([_crop_face(img, facebox) for facebox in faceboxes])
+
+    import tensorflow as tf
+    try:
+        predictions = model.signatures["predict"](tf.constant(batch, dtype=tf.uint8))
+        output = np.array(predictions['output'])
+    except (ValueError, tf.errors.InvalidArgumentError):
+        output = None
+    if output is None or output.size < len(faces) * 136:
+        # Model exported with a fixed batch of one: fall back to one call per face
+        return np.stack([detect_marks(img, model, face) for face in faces])
+    output = output.reshape(len(faces), -1)
+
+    return np.stack([_to_image_coords(marks[:136], facebox)
+                     for marks, facebox in zip(output, faceboxes)])
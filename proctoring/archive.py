@@ -0,0 +1,172 @@
+"""
+Per-test archives of the proctoring logs.
+
+The log tables are the hot partition: they only hold the rows of tests that are running
+or recently closed. compact() moves a closed test out of them: its violations are rolled
+up into ViolationSummary rows (what the live counters and results need), and the raw
+rows of ViolationLog, ProctoringLog and WindowEstimationLog are appended to gzipped JSONL
+files under PROCTORING_ARCHIVE_DIR/<test>/<table>.jsonl.gz, then deleted. Pages that
+show raw logs read the archive file only when one exists for the test.
+
+The archive is written (and fsynced) before the rows are deleted; a crash in between
+appends the same rows again on the next run, which readers drop by primary key, and the
+summaries' high-water mark (ViolationSummary.last_vid) keeps them from being rolled up twice.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.db import models, router, transaction
+from django.utils.dateparse import parse_datetime
+
+from exams.models import ViolationLog
+from .models import ProctoringLog, ViolationSummary, WindowEstimationLog
+from .violations import flush_pending
+
+ARCHIVED_MODELS = (ViolationLog, ProctoringLog, WindowEstimationLog)
+
+
+def archive_dir():
+    return Path(getattr(settings, "PROCTORING_ARCHIVE_DIR", Path(settings.BASE_DIR) / "archive"))
+
+
+def path_for(model, test_id):
+    # Test ids are free text: keep a readable prefix, the digest keeps them apart
+    slug = re.sub(r"[^A-Za-z0-9_-]", "_", test_id)[:50]
+    digest = hashlib.sha256(test_id.encode()).hexdigest()[:12]
+    return archive_dir() / f"{slug}-{digest}" / f"{model._meta.db_table}.jsonl.gz"
+
+
+def is_archived(model, test_id):
+    return path_for(model, test_id).exists()
+
+
+def _datetime_fields(model):
+    return {f.attname for f in model._meta.concrete_fields if isinstance(f, models.DateTimeField)}
+
+
+def _append(model, test_id, rows):
+    """Append rows (dicts of attname -> value) as a new gzip member; returns the row count."""
+    path = path_for(model, test_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    datetimes = _datetime_fields(model)
+    written = 0
+    with open(path, "ab") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as archive:
+            for row in rows:
+                for name in datetimes:
+                    if row.get(name) is not None:
+                        row[name] = row[name].isoformat()
+                archive.write(json.dumps(row).encode() + b"\n")
+                written += 1
+        raw.flush()
+        os.fsync(raw.fileno())
+    return written
+
+
+def read(model, test_id, **filters):
+    """Archived rows of a test as unsaved model instances, optionally filtered by field equality."""
+    path = path_for(model, test_id)
+    if not path.exists():
+        return []
+    datetimes = _datetime_fields(model)
+    pk_name = model._meta.pk.attname
+    seen = set()
+    instances = []
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        for line in archive:
+            row = json.loads(line)
+            if row[pk_name] in seen or any(row.get(k) != v for k, v in filters.items()):
+                continue
+            seen.add(row[pk_name])
+            for name in datetimes:
+                if row.get(name) is not None:
+                    row[name] = parse_datetime(row[name])
+            instances.append(model(**row))
+    return instances
+
+
+def rows_for(model, test_id, **filters):
+    """
+    Log rows of a test from the hot table, plus its archive when the test was compacted,
+    in the model's default ordering. Tests that were never compacted only touch the table.
+    """
+    rows = model.objects.filter(test_id=test_id, **filters)
+    if not is_archived(model, test_id):
+        return rows
+    rows = list(rows) + read(model, test_id, **filters)
+    for field in reversed(model._meta.ordering):
+        name = field.lstrip("-")
+        rows.sort(key=lambda row: getattr(row, name), reverse=field.startswith("-"))
+    return rows
+
+
+def _roll_up(test_id, last_pk):
+    """
+    Add the test's violations up to last_pk to its ViolationSummary rows. Rows at or below
+    the stored high-water mark (last_vid) were rolled up by an earlier run whose delete did
+    not happen, and are skipped.
+    """
+    mark = ViolationSummary.objects.filter(test_id=test_id).aggregate(mark=models.Max("last_vid"))["mark"] or 0
+    totals = ViolationLog.objects.filter(test_id=test_id, pk__gt=mark, pk__lte=last_pk) \
+        .values_list("student_id", "category") \
+        .annotate(n=models.Count("vid"), score=models.Sum("score"),
+                  first_at=models.Min("timestamp"), last_at=models.Max("timestamp")).order_by()
+    existing = {(s.student_id, s.category): s for s in ViolationSummary.objects.filter(test_id=test_id)}
+    created = []
+    for student_id, category, count, score, first_at, last_at in totals:
+        summary = existing.get((student_id, category))
+        if summary is None:
+            created.append(ViolationSummary(test_id=test_id, student_id=student_id, category=category, count=count,
+                                            score=score or 0, first_at=first_at, last_at=last_at,
+                                            last_vid=last_pk))
+            continue
+        summary.count += count
+        summary.score += score or 0
+        summary.first_at = min(summary.first_at, first_at)
+        summary.last_at = max(summary.last_at, last_at)
+        summary.save(update_fields=["count", "score", "first_at", "last_at"])
+    ViolationSummary.objects.bulk_create(created)
+    ViolationSummary.objects.filter(test_id=test_id, last_vid__lt=last_pk).update(last_vid=last_pk)
+
+
+def compact(test_id, dry_run=False):
+    """Archive a closed test's raw logs and roll up its violations; returns {table: rows}."""
+    flush_pending()
+    moved = {}
+    for model in ARCHIVED_MODELS:
+        rows = model._base_manager.filter(test_id=test_id)
+        last_pk = rows.aggregate(last=models.Max("pk"))["last"]
+        if last_pk is None:
+            continue
+        # Rows logged after this point stay hot until the next run
+        rows = rows.filter(pk__lte=last_pk)
+        table = model._meta.db_table
+        if dry_run:
+            moved[table] = rows.count()
+            continue
+        moved[table] = _append(model, test_id, rows.order_by("pk").values().iterator())
+        with transaction.atomic(using=router.db_for_write(model)):
+            if model is ViolationLog:
+                _roll_up(test_id, last_pk)
+            rows.delete()
+    return moved
+
+
+def evidence_references(cutoff):
+    """Evidence names referenced by archived rows newer than cutoff (see evidence.purge)."""
+    from .evidence import PREFIX, evidence_columns, name_of
+    names = set()
+    for model, field, time_field, _ in evidence_columns():
+        for path in archive_dir().glob(f"*/{model._meta.db_table}.jsonl.gz"):
+            with gzip.open(path, "rt", encoding="utf-8") as archive:
+                for line in archive:
+                    row = json.loads(line)
+                    value = row.get(field)
+                    if value and value.startswith(PREFIX) and parse_datetime(row[time_field]) >= cutoff:
+                        names.add(name_of(value))
+    return names
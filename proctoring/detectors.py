@@ -0,0 +1,306 @@
+"""
+Object detector backends for the proctoring pipeline.
+
+Every backend exposes the same interface:
+    predict(images, conf) -> one list of Detection per image
+    warmup()              -> run a dummy frame so the first real request is not slow
+    names                 -> {class_id: class_name}
+
+Backends (PROCTORING_DETECTOR_BACKEND):
+    'ultralytics' - the bundled yolov8n weights through PyTorch (previous behaviour)
+    'onnx'        - an exported ONNX model through ONNX Runtime on CPU
+    'openvino'    - the same ONNX model through OpenVINO on CPU
+    'auto'        - onnx if the exported model and onnxruntime are available,
+                    otherwise ultralytics (default)
+
+Images may be BGR numpy arrays (as decoded by OpenCV) or PIL images.
+Export the ONNX model with `manage.py export_detector` and compare backends with
+`manage.py benchmark_detector`.
+"""
+import ast
+import logging
+import os
+import time
+
+import numpy as np
+from django.conf import settings
+
+from .inference import Detection, parse_result
+
+logger = logging.getLogger(__name__)
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+CUSTOM_MODEL_PATH = "yolov8n/data.pkl"
+FALLBACK_MODEL_PATH = "yolov8n.pt"
+
+
+def to_bgr(image):
+    """Return a HxWx3 uint8 BGR array for a numpy (BGR) or PIL (RGB) image."""
+    if isinstance(image, np.ndarray):
+        if image.ndim == 2:
+            return np.repeat(image[:, :, None], 3, axis=2)
+        return image[:, :, :3]
+    return np.asarray(image.convert("RGB"))[:, :, ::-1]
+
+
+class UltralyticsDetector:
+    """YOLO model loaded through ultralytics / PyTorch."""
+
+    backend = "ultralytics"
+
+    def __init__(self, model):
+        self.model = model
+        self.names = getattr(model, "names", None) or {}
+
+    def predict(self, images, conf):
+        results = self.model(list(images), verbose=False, conf=conf)
+        return [parse_result(result) for result in results]
+
+    def warmup(self):
+        self.predict([np.zeros((480, 640, 3), dtype=np.uint8)], conf=0.25)
+
+
+def load_ultralytics_model():
+    """Load the custom model (yolov8n/data.pkl), falling back to the standard yolov8n.pt."""
+    try:
+        from ultralytics import YOLO
+    except ImportError:
+        logger.warning("ultralytics not installed. Object detection will not work.")
+        return None
+
+    try:
+        # The custom model may be a .pt file renamed to .pkl or a pickled model object
+        try:
+            model = YOLO(CUSTOM_MODEL_PATH)
+            if not getattr(model, "names", None):
+                raise ValueError("Model loaded but has no class names")
+            logger.info("Custom YOLOv8 model loaded from %s", CUSTOM_MODEL_PATH)
+        except Exception as e:
+            logger.info("YOLO(%s) failed (%s). Trying pickle...", CUSTOM_MODEL_PATH, e)
+            import pickle
+            with open(CUSTOM_MODEL_PATH, "rb") as f:
+                model = pickle.load(f)
+            logger.info("Custom model loaded via pickle")
+        return model
+    except Exception as e:
+        logger.warning("Error loading custom model (%s), falling back to %s", e, FALLBACK_MODEL_PATH)
+        try:
+            # Standard yolov8n detects the COCO classes (person, cell phone, laptop, book, tv, ...)
+            return YOLO(FALLBACK_MODEL_PATH)
+        except Exception as e2:
+            logger.error("Could not load fallback model: %s", e2)
+            return None
+
+
+class OnnxDetector:
+    """
+    YOLOv8 detection head exported to ONNX, run with ONNX Runtime.
+    Pre/post-processing (letterbox, confidence filter, class-wise NMS) mirrors ultralytics.
+    """
+
+    backend = "onnx"
+
+    def __init__(self, path, threads=0, iou=0.7, max_det=300):
+        self.path = str(path)
+        self.iou = iou
+        self.max_det = max_det
+        self._load(threads)
+        input_shape = self._input_shape()
+        self.imgsz = (int(input_shape[2]) if isinstance(input_shape[2], int) else 640,
+                      int(input_shape[3]) if isinstance(input_shape[3], int) else 640)
+        # Models exported without dynamic=True only accept a batch of one
+        self.batchable = not isinstance(input_shape[0], int)
+
+    def _load(self, threads):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(self.path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = self._parse_names(metadata.get("names"))
+
+    def _input_shape(self):
+        return self.session.get_inputs()[0].shape
+
+    def _run(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+    @staticmethod
+    def _parse_names(raw):
+        if not raw:
+            return {}
+        try:
+            return {int(k): v for k, v in ast.literal_eval(raw).items()}
+        except (ValueError, SyntaxError, AttributeError):
+            return {}
+
+    def _letterbox(self, image):
+        """Resize keeping aspect ratio and pad to imgsz; returns (RGB CHW float32, ratio, (pad_w, pad_h))."""
+        image = to_bgr(image)
+        h, w = image.shape[:2]
+        target_h, target_w = self.imgsz
+        ratio = min(target_h / h, target_w / w)
+        new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+        if (new_w, new_h) != (w, h):
+            if cv2 is not None:
+                image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+            else:
+                from PIL import Image
+                image = np.asarray(Image.fromarray(image).resize((new_w, new_h), Image.BILINEAR))
+        pad_w, pad_h = (target_w - new_w) / 2, (target_h - new_h) / 2
+        top, left = int(round(pad_h - 0.1)), int(round(pad_w - 0.1))
+        canvas = np.full((target_h, target_w, 3), 114, dtype=np.uint8)
+        canvas[top:top + new_h, left:left + new_w] = image
+        blob = canvas[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+        return blob, ratio, (left, top)
+
+    def _postprocess(self, output, conf):
+        """output: (4 + num_classes, num_anchors) for one image."""
+        predictions = output.T
+        scores = predictions[:, 4:]
+        class_ids = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(class_ids)), class_ids]
+        keep = confidences >= conf
+        if not keep.any():
+            return []
+        boxes = predictions[keep, :4]
+        class_ids, confidences = class_ids[keep], confidences[keep]
+        # cx, cy, w, h -> x1, y1, x2, y2; offset by class so NMS never suppresses across classes
+        xyxy = np.empty_like(boxes)
+        xyxy[:, :2] = boxes[:, :2] - boxes[:, 2:] / 2
+        xyxy[:, 2:] = boxes[:, :2] + boxes[:, 2:] / 2
+        xyxy += (class_ids * 7680.0)[:, None]
+        kept = _nms(xyxy, confidences, self.iou)[:self.max_det]
+        return [Detection(self.names.get(int(class_ids[i]), str(int(class_ids[i]))), float(confidences[i]))
+                for i in kept]
+
+    def predict(self, images, conf):
+        blobs = [self._letterbox(image)[0] for image in images]
+        if self.batchable:
+            outputs = self._run(np.stack(blobs))
+        else:
+            outputs = np.concatenate([self._run(blob[None]) for blob in blobs])
+        return [self._postprocess(output, conf) for output in outputs]
+
+    def warmup(self):
+        self.predict([np.zeros((480, 640, 3), dtype=np.uint8)], conf=0.25)
+
+
+class OpenVINODetector(OnnxDetector):
+    """The exported ONNX model compiled for CPU with OpenVINO."""
+
+    backend = "openvino"
+
+    def _load(self, threads):
+        import openvino as ov
+        core = ov.Core()
+        config = {"INFERENCE_NUM_THREADS": threads} if threads else {}
+        model = core.read_model(self.path)
+        self._ov_model = model
+        self.compiled = core.compile_model(model, "CPU", config)
+        self.names = self._parse_names(self._read_names(self.path))
+
+    @staticmethod
+    def _read_names(path):
+        # OpenVINO does not carry the ONNX metadata over; read it from the file itself
+        try:
+            import onnx
+            model = onnx.load(path, load_external_data=False)
+            return {p.key: p.value for p in model.metadata_props}.get("names")
+        except Exception:
+            return None
+
+    def _input_shape(self):
+        return [d.get_length() if d.is_static else None for d in self._ov_model.inputs[0].get_partial_shape()]
+
+    def _run(self, blob):
+        return self.compiled([blob])[self.compiled.output(0)]
+
+
+def _nms(boxes, scores, iou_threshold):
+    """Greedy non-maximum suppression; returns kept indices ordered by score."""
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.maximum(0.0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]))
+        h = np.maximum(0.0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]))
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return keep
+
+
+def onnx_model_path():
+    """The INT8 model when PROCTORING_DETECTOR_INT8 is on and it exists, else the FP32 export."""
+    path = str(getattr(settings, "PROCTORING_DETECTOR_ONNX_PATH", "models/yolov8n.onnx"))
+    if getattr(settings, "PROCTORING_DETECTOR_INT8", False):
+        quantized = int8_path(path)
+        if os.path.exists(quantized):
+            return quantized
+        logger.warning("INT8 detector requested but %s does not exist; using %s", quantized, path)
+    return path
+
+
+def int8_path(path):
+    root, ext = os.path.splitext(str(path))
+    return f"{root}.int8{ext}"
+
+
+def create_detector(backend, path=None, threads=None):
+    """Build one backend by name; raises if its runtime or model file is missing."""
+    threads = getattr(settings, "PROCTORING_DETECTOR_THREADS", 0) if threads is None else threads
+    if backend == "ultralytics":
+        model = load_ultralytics_model()
+        if model is None:
+            raise RuntimeError("ultralytics model could not be loaded")
+        return UltralyticsDetector(model)
+    path = path or onnx_model_path()
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found (run `manage.py export_detector`)")
+    if backend == "onnx":
+        return OnnxDetector(path, threads)
+    if backend == "openvino":
+        return OpenVINODetector(path, threads)
+    raise ValueError(f"Unknown detector backend: {backend}")
+
+
+def load_detector():
+    """
+    Load the configured backend, falling back to ultralytics, and warm it up.
+    Returns None when no detector can be loaded.
+    """
+    backend = getattr(settings, "PROCTORING_DETECTOR_BACKEND", "auto")
+    candidates = ["onnx", "ultralytics"] if backend == "auto" else [backend]
+    if "ultralytics" not in candidates:
+        candidates.append("ultralytics")
+
+    for name in candidates:
+        try:
+            detector = create_detector(name)
+        except Exception as e:
+            log = logger.info if backend == "auto" else logger.warning
+            log("Detector backend %s unavailable: %s", name, e)
+            continue
+        if getattr(settings, "PROCTORING_DETECTOR_WARMUP", True):
+            started = time.monotonic()
+            try:
+                detector.warmup()
+            except Exception as e:
+                logger.warning("Detector warm-up failed on %s: %s", name, e)
+                continue
+            logger.info("Detector %s warmed up in %.0f ms", name, (time.monotonic() - started) * 1000)
+        return detector
+    return None
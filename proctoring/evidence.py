@@ -0,0 +1,237 @@
+"""
+Content-addressed evidence store.
+
+Evidence frames (ViolationLog.evidence, ProctoringLog.img_log) are written as
+compressed JPEG/WebP files under PROCTORING_EVIDENCE_DIR, sharded by their SHA-256
+(ab/cd/abcd....jpg), and the row keeps only a short reference "evidence:<sha256>.<ext>".
+Identical frames are stored once. Files are immutable, so the hash doubles as the ETag.
+
+Rows written before the store existed still hold base64; `manage.py migrate_evidence`
+moves them into the store and `manage.py purge_evidence` applies the retention period.
+Templates render both kinds through the `evidence_src` filter (proctoring.templatetags).
+"""
+import base64
+import hashlib
+import os
+import re
+import tempfile
+import time
+from datetime import timedelta
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+PREFIX = "evidence:"
+NAME_RE = re.compile(r"^([0-9a-f]{64})\.(jpg|webp)$")
+CONTENT_TYPES = {"jpg": "image/jpeg", "webp": "image/webp"}
+_EXTENSIONS = {"jpeg": "jpg", "webp": "webp"}
+
+# Already-compressed uploads are stored as they are instead of being re-encoded
+_MAGIC = ((b"\xff\xd8\xff", "jpg"), (b"RIFF", "webp"))
+
+
+def evidence_dir():
+    return Path(getattr(settings, "PROCTORING_EVIDENCE_DIR", Path(settings.MEDIA_ROOT) / "evidence"))
+
+
+def is_reference(value):
+    return isinstance(value, str) and value.startswith(PREFIX)
+
+
+def name_of(reference):
+    return reference[len(PREFIX):]
+
+
+def path_for(name):
+    """Absolute path of a stored file; raises ValueError for anything that is not a store name."""
+    match = NAME_RE.match(name)
+    if not match:
+        raise ValueError(f"Invalid evidence name: {name!r}")
+    digest = match.group(1)
+    return evidence_dir() / digest[:2] / digest[2:4] / name
+
+
+def _sniff(data):
+    for magic, ext in _MAGIC:
+        if data.startswith(magic) and (ext != "webp" or data[8:12] == b"WEBP"):
+            return ext
+    return None
+
+
+def _decode(data):
+    if not data:
+        raise ValueError("Empty evidence image")
+    if cv2 is not None:
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    else:
+        from PIL import Image
+        image = np.asarray(Image.open(BytesIO(data)).convert("RGB"))[:, :, ::-1]
+    if image is None or image.size == 0:
+        raise ValueError("Could not decode evidence image")
+    return image
+
+
+def encode(image):
+    """
+    Compressed bytes and extension for an image given as a BGR array, a PIL image,
+    encoded bytes or a base64 string (optionally a data: URI).
+    """
+    if isinstance(image, str):
+        if "base64," in image:
+            image = image.split("base64,", 1)[1]
+        image = base64.b64decode(image)
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        data = bytes(image)
+        ext = _sniff(data)
+        if ext is not None:
+            return data, ext
+        image = _decode(data)
+    elif not isinstance(image, np.ndarray):
+        # PIL image (RGB)
+        image = np.asarray(image.convert("RGB"))[:, :, ::-1]
+
+    ext = _EXTENSIONS.get(getattr(settings, "PROCTORING_EVIDENCE_FORMAT", "jpeg"), "jpg")
+    quality = getattr(settings, "PROCTORING_EVIDENCE_QUALITY", 80)
+    if cv2 is not None:
+        flag = cv2.IMWRITE_WEBP_QUALITY if ext == "webp" else cv2.IMWRITE_JPEG_QUALITY
+        ok, buffer = cv2.imencode(f".{ext}", np.ascontiguousarray(image), [flag, quality])
+        if not ok:
+            raise ValueError("Could not encode evidence image")
+        return buffer.tobytes(), ext
+    from PIL import Image
+    out = BytesIO()
+    Image.fromarray(np.ascontiguousarray(image[:, :, ::-1])).save(out, "WEBP" if ext == "webp" else "JPEG", quality=quality)
+    return out.getvalue(), ext
+
+
+def save(image):
+    """Store an image (see encode) and return its reference for the log row."""
+    data, ext = encode(image)
+    name = f"{hashlib.sha256(data).hexdigest()}.{ext}"
+    path = path_for(name)
+    try:
+        # A reused file gets the grace period of a new one in purge(): the row
+        # referencing it may still be in a write-behind buffer
+        os.utime(path)
+    except FileNotFoundError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so readers never see a partial file and concurrent
+        # writers of the same frame simply replace it with identical bytes
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    return PREFIX + name
+
+
+def url_for(value):
+    """<img src> for a stored reference, or a data: URI for a legacy base64 value."""
+    if not value:
+        return ""
+    if is_reference(value):
+        return reverse("proctoring_evidence", args=[name_of(value)])
+    return f"data:image/jpeg;base64,{value}"
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single "bytes=" range, None when the header is absent
+    or not a single byte range (the whole file is sent), ValueError when unsatisfiable.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start, end = max(0, size - int(last)), size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        raise ValueError(f"Range {header!r} not satisfiable for {size} bytes")
+    return start, end
+
+
+def iter_file(path, start=0, length=None, chunk_size=64 * 1024):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = length if length is not None else os.path.getsize(path) - start
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def evidence_columns():
+    """(model, image field, time field, empty value) for every table holding evidence."""
+    from exams.models import ViolationLog
+    from .models import ProctoringLog
+    return (
+        (ViolationLog, "evidence", "timestamp", None),
+        (ProctoringLog, "img_log", "log_time", ""),
+    )
+
+
+def referenced_names():
+    """Names of every stored file still referenced by a log row."""
+    names = set()
+    for model, field, _, _ in evidence_columns():
+        rows = model.objects.filter(**{f"{field}__startswith": PREFIX}).values_list(field, flat=True)
+        names.update(name_of(value) for value in rows.iterator())
+    return names
+
+
+def purge(days, grace_seconds=3600, dry_run=False):
+    """
+    Drop evidence older than `days` from the log rows, then delete stored files that no
+    row references. Files younger than grace_seconds are kept: their rows may still be
+    in a write-behind buffer. Returns (rows cleared, files deleted, bytes freed).
+    """
+    cutoff = timezone.now() - timedelta(days=days)
+    cleared = 0
+    for model, field, time_field, empty in evidence_columns():
+        rows = model.objects.filter(**{f"{time_field}__lt": cutoff}).exclude(**{field: empty})
+        cleared += rows.count() if dry_run else rows.update(**{field: empty})
+
+    if dry_run:
+        # Nothing was cleared, so count the files that would lose their last reference
+        keep = set()
+        for model, field, time_field, _ in evidence_columns():
+            rows = model.objects.filter(**{f"{field}__startswith": PREFIX, f"{time_field}__gte": cutoff})
+            keep.update(name_of(value) for value in rows.values_list(field, flat=True).iterator())
+    else:
+        keep = referenced_names()
+    # Archived rows cannot be cleared in place; their recent references keep the files
+    from .archive import evidence_references
+    keep |= evidence_references(cutoff)
+
+    deleted = freed = 0
+    now = time.time()
+    root = evidence_dir()
+    if root.exists():
+        for path in root.glob("*/*/*"):
+            # Leftover .tmp files are from writers that died mid-save
+            if path.name in keep or not (NAME_RE.match(path.name) or path.suffix == ".tmp"):
+                continue
+            stat = path.stat()
+            if now - stat.st_mtime < grace_seconds:
+                continue
+            if not dry_run:
+                path.unlink(missing_ok=True)
+            deleted += 1
+            freed += stat.st_size
+    return cleared, deleted, freed
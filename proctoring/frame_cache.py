@@ -0,0 +1,140 @@
+"""
+Change detection for posted frames.
+
+Keeps a tiny grayscale thumbnail of the last analyzed frame per (student, test_id)
+and reuses that frame's detections while the scene stays the same: the mean absolute
+difference between thumbnails is below PROCTORING_FRAME_CHANGE_THRESHOLD (0-255 scale)
+and the cached result is younger than PROCTORING_FRAME_MAX_STALENESS seconds.
+Past that age a fresh inference is forced even for a static scene.
+
+The cache is per worker process; with several workers a session only hits when
+consecutive frames land on the same process.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+
+from . import metrics
+from .detectors import to_bgr
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+SIGNATURE_SIZE = (32, 24)  # width, height
+
+
+def frame_signature(image):
+    """Downscaled grayscale thumbnail of a BGR array or PIL image."""
+    if cv2 is not None:
+        bgr = to_bgr(image)
+        gray = cv2.cvtColor(np.ascontiguousarray(bgr), cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, SIGNATURE_SIZE, interpolation=cv2.INTER_AREA)
+    from PIL import Image
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(to_bgr(image)[:, :, ::-1])
+    return np.asarray(image.convert("L").resize(SIGNATURE_SIZE, Image.BOX))
+
+
+def signature_distance(a, b):
+    """Mean absolute pixel difference between two signatures."""
+    return float(np.abs(a.astype(np.int16) - b.astype(np.int16)).mean())
+
+
+class _Entry:
+    __slots__ = ("signature", "detections", "analyzed_at")
+
+    def __init__(self, signature, detections, analyzed_at):
+        self.signature = signature
+        self.detections = detections
+        self.analyzed_at = analyzed_at
+
+
+class FrameChangeCache:
+    """Per-session LRU of the last analyzed frame signature and its detections."""
+
+    def __init__(self, threshold=None, max_staleness=None, max_entries=None):
+        self.threshold = threshold if threshold is not None else \
+            getattr(settings, "PROCTORING_FRAME_CHANGE_THRESHOLD", 6.0)
+        self.max_staleness = max_staleness if max_staleness is not None else \
+            getattr(settings, "PROCTORING_FRAME_MAX_STALENESS", 10.0)
+        self.max_entries = max_entries or getattr(settings, "PROCTORING_STATE_MAX_ENTRIES", 5000)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def lookup(self, key, signature):
+        """Return the cached detections if the scene is unchanged and fresh, else None."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry.signature.shape != signature.shape:
+                self.misses += 1
+                return None
+            if time.monotonic() - entry.analyzed_at > self.max_staleness:
+                self.stale += 1
+                self.misses += 1
+                return None
+            if signature_distance(entry.signature, signature) > self.threshold:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return list(entry.detections)
+
+    def store(self, key, signature, detections):
+        with self._lock:
+            self._data[key] = _Entry(signature, list(detections), time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def forget(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": len(self._data),
+            "threshold": self.threshold,
+            "max_staleness_s": self.max_staleness,
+        }
+
+
+_cache = FrameChangeCache()
+metrics.register("frame_cache", _cache.stats)
+
+
+def detect_with_cache(broker, key, image, conf):
+    """
+    broker.detect(image, conf) unless the scene for this key is unchanged since its last
+    inference. Returns the detections (None when no model is available).
+    """
+    if not getattr(settings, "PROCTORING_FRAME_CACHE_ENABLED", True):
+        return broker.detect(image, conf=conf)
+    signature = frame_signature(image)
+    detections = _cache.lookup(key, signature)
+    if detections is not None:
+        return detections
+    detections = broker.detect(image, conf=conf)
+    if detections is not None:
+        _cache.store(key, signature, detections)
+    return detections
+
+
+def forget(key):
+    _cache.forget(key)
+
+
+def stats():
+    return _cache.stats()
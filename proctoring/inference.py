@@ -0,0 +1,157 @@
+"""
+Micro-batching broker for object detection.
+
+Frames submitted by concurrent requests are queued and a single background thread
+groups them into batches (up to PROCTORING_BATCH_MAX_SIZE frames, waiting at most
+PROCTORING_BATCH_MAX_WAIT_MS for the batch to fill). Each batch is one forward pass
+on the model and every caller gets back only its own detections.
+
+The model is any detector from proctoring.detectors (ultralytics, ONNX Runtime, OpenVINO).
+
+Batching only helps when a worker process serves several requests at once
+(threaded runserver, gunicorn gthread/gevent). With a batch size of 1 the broker
+runs inference inline in the calling thread.
+"""
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+Detection = namedtuple("Detection", ["name", "confidence"])
+
+
+def parse_result(result):
+    """Convert one ultralytics Results object into a list of Detection."""
+    names = getattr(result, "names", None)
+    detections = []
+    for box in result.boxes:
+        cls_id = int(box.cls[0])
+        name = names[cls_id] if names else str(cls_id)
+        detections.append(Detection(name, float(box.conf[0])))
+    return detections
+
+
+class _Job:
+    __slots__ = ("image", "conf", "enqueued", "done", "result", "error")
+
+    def __init__(self, image, conf):
+        self.image = image
+        self.conf = conf
+        self.enqueued = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class InferenceBroker:
+    """Collects frames from concurrent callers and runs them through the model in batches."""
+
+    def __init__(self, model_provider, max_batch_size=None, max_wait_ms=None, timeout=None, name="inference"):
+        self.model_provider = model_provider
+        self.max_batch_size = max(1, int(max_batch_size or getattr(settings, "PROCTORING_BATCH_MAX_SIZE", 8)))
+        self.max_wait = (max_wait_ms if max_wait_ms is not None
+                         else getattr(settings, "PROCTORING_BATCH_MAX_WAIT_MS", 20)) / 1000.0
+        self.timeout = timeout or getattr(settings, "PROCTORING_INFERENCE_TIMEOUT", 10)
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._latency = metrics.RollingWindow()
+        self._inference_time = metrics.RollingWindow()
+        self._batch_sizes = metrics.RollingWindow()
+        self._errors = 0
+        metrics.register(name, self.stats)
+
+    def detect(self, image, conf=0.4):
+        """
+        Run detection on one frame and return a list of Detection with confidence >= conf.
+        Returns None when no model is available.
+        """
+        if self.model_provider() is None:
+            return None
+        job = _Job(image, conf)
+        if self.max_batch_size == 1:
+            self._process([job])
+        else:
+            self._ensure_worker()
+            self._queue.put(job)
+            if not job.done.wait(self.timeout):
+                raise TimeoutError(f"Inference did not complete within {self.timeout}s")
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="proctoring-inference", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._process(batch)
+
+    def _process(self, batch):
+        # Run the whole batch at the lowest requested confidence, then filter per caller.
+        conf = min(job.conf for job in batch)
+        started = time.monotonic()
+        try:
+            model = self.model_provider()
+            if model is None:
+                raise RuntimeError("Detection model is not loaded")
+            results = model.predict([job.image for job in batch], conf)
+            for job, detections in zip(batch, results):
+                job.result = [d for d in detections if d.confidence >= job.conf]
+        except Exception as e:
+            self._errors += 1
+            logger.error("Batched inference failed (%d frames): %s", len(batch), e)
+            for job in batch:
+                job.error = e
+        finished = time.monotonic()
+        self._inference_time.add(finished - started)
+        self._batch_sizes.add(len(batch))
+        for job in batch:
+            self._latency.add(finished - job.enqueued)
+            job.done.set()
+
+    def pressure(self):
+        """
+        Load on the detector: 1.0 means frames wait a full batch in the queue or recent
+        end-to-end latency reached PROCTORING_SAMPLING_TARGET_LATENCY_MS.
+        """
+        target = getattr(settings, "PROCTORING_SAMPLING_TARGET_LATENCY_MS", 500) / 1000.0
+        return max(self._queue.qsize() / self.max_batch_size, self._latency.mean(last=32) / target)
+
+    def stats(self):
+        """Queue depth, batch occupancy and end-to-end latency (ms) for sizing the broker."""
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+            "batches": self._batch_sizes.count,
+            "frames": self._latency.count,
+            "errors": self._errors,
+            "mean_batch_size": round(self._batch_sizes.mean(), 2),
+            "batch_occupancy": round(self._batch_sizes.mean() / self.max_batch_size, 3),
+            "latency_ms": self._latency.summary(scale=1000),
+            "inference_ms": self._inference_time.summary(scale=1000),
+            "pressure": round(self.pressure(), 3),
+        }
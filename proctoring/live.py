@@ -0,0 +1,287 @@
+"""
+Live monitoring counters pushed to professors.
+
+log_violation publishes every violation to the test's channel; the live stream view
+(proctoring.views.live_stream_view) sends each subscriber one snapshot of the per-student
+counters for the whole test, then only the deltas, instead of every student tile polling
+five LIKE counts every few seconds. A fresh snapshot is sent every PROCTORING_LIVE_RESYNC
+seconds, and whenever a subscriber fell behind, so missed or racing events cannot drift
+the counters for long.
+
+Brokers (PROCTORING_LIVE_BACKEND):
+    'local' - in-process pub/sub (default); only sees violations logged by the same process
+    'cache' - events relayed through the Django cache alias PROCTORING_LIVE_CACHE_ALIAS,
+              a stand-in for a message broker when students and professors hit different workers
+
+broker.subscribe(test_id) returns a subscription with:
+    get(timeout)  events published since the last call, waiting up to timeout seconds
+                  for the first
+    overflowed    True (once) when events were dropped; the subscriber should resync
+    close()       stop receiving events
+"""
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count
+from django.utils import timezone
+
+from accounts.models import User
+from exams.models import ViolationLog
+from . import metrics
+from .models import ViolationSummary
+
+# Counter -> ViolationLog category; "tot" counts every row
+COUNTERS = {
+    "win": ViolationLog.Category.TAB_SWITCH,
+    "mob": ViolationLog.Category.MOBILE_PHONE,
+    "per": ViolationLog.Category.PERSON,
+    "aud": ViolationLog.Category.AUDIO,
+}
+COUNTER_NAMES = tuple(COUNTERS) + ("tot",)
+_COUNTER_OF = {category: name for name, category in COUNTERS.items()}
+
+
+def counters_for(category):
+    """{counter: 1} for the counters one violation of this category adds to."""
+    delta = {"tot": 1}
+    if category in _COUNTER_OF:
+        delta[_COUNTER_OF[category]] = 1
+    return delta
+
+
+def counter_totals(test_id, email=None, until=None):
+    """
+    {email: {counter: count}} for a test (every student, or one), from one GROUP BY
+    student, category query on the (test_id, student, category, timestamp) index, plus
+    the rolled-up totals of violations already archived (proctoring.archive).
+    until excludes violations logged after that time (see snapshot ordering in the view).
+    """
+    logs = ViolationLog.objects.filter(test_id=test_id)
+    summaries = ViolationSummary.objects.filter(test_id=test_id)
+    if email is not None:
+        student_id = User.objects.filter(email=email).values_list("uid", flat=True).first()
+        if student_id is None:
+            return {}
+        logs = logs.filter(student_id=student_id)
+        summaries = summaries.filter(student_id=student_id)
+    if until is not None:
+        logs = logs.filter(timestamp__lte=until)
+    rows = list(logs.values_list("student_id", "category").annotate(n=Count("vid")).order_by())
+    rows += summaries.values_list("student_id", "category", "count")
+    totals = {}
+    for student_id, category, count in rows:
+        counters = totals.setdefault(student_id, dict.fromkeys(COUNTER_NAMES, 0))
+        counters["tot"] += count
+        if category in _COUNTER_OF:
+            counters[_COUNTER_OF[category]] += count
+    if email is not None:
+        return {email: counters for counters in totals.values()}
+    emails = dict(User.objects.filter(uid__in=list(totals)).values_list("uid", "email"))
+    return {emails[student_id]: counters for student_id, counters in totals.items() if student_id in emails}
+
+
+class LocalSubscription:
+    """A subscriber's bounded queue on a LocalBroker channel."""
+
+    def __init__(self, broker, test_id, max_pending):
+        self._broker = broker
+        self.test_id = test_id
+        self._queue = queue.Queue(max_pending)
+        self._overflowed = False
+
+    def put(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._overflowed = True
+            self._broker.dropped += 1
+
+    def get(self, timeout):
+        try:
+            events = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    @property
+    def overflowed(self):
+        overflowed, self._overflowed = self._overflowed, False
+        return overflowed
+
+    def close(self):
+        self._broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """In-process pub/sub: each subscriber has a bounded queue, publishing never blocks."""
+
+    def __init__(self, max_pending=1000):
+        self.max_pending = max_pending
+        self._channels = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, test_id, event):
+        with self._lock:
+            subscribers = list(self._channels.get(test_id, ()))
+        for subscription in subscribers:
+            subscription.put(event)
+        self.published += 1
+
+    def subscribe(self, test_id):
+        subscription = LocalSubscription(self, test_id, self.max_pending)
+        with self._lock:
+            self._channels.setdefault(test_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            channel = self._channels.get(subscription.test_id)
+            if channel is not None:
+                channel.discard(subscription)
+                if not channel:
+                    del self._channels[subscription.test_id]
+
+    def subscribers(self):
+        with self._lock:
+            return sum(len(channel) for channel in self._channels.values())
+
+
+class CacheSubscription:
+    """A subscriber polling a CacheBroker channel from its last seen sequence number."""
+
+    def __init__(self, broker, test_id):
+        self._broker = broker
+        self.test_id = test_id
+        self._broker.touch(test_id)
+        self._last = self._broker.sequence(test_id)
+        self._overflowed = False
+
+    def get(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            self._broker.touch(self.test_id)
+            current = self._broker.sequence(self.test_id)
+            if current < self._last:
+                # The sequence expired and restarted; whatever was missed needs a resync
+                self._last, self._overflowed = 0, True
+            if current > self._last:
+                first = max(self._last + 1, current - self._broker.max_pending + 1)
+                self._overflowed = self._overflowed or first > self._last + 1
+                keys = [self._broker.event_key(self.test_id, seq) for seq in range(first, current + 1)]
+                found = self._broker.cache.get_many(keys)
+                self._overflowed = self._overflowed or len(found) != len(keys)
+                self._last = current
+                return [found[key] for key in keys if key in found]
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+            time.sleep(min(self._broker.poll_interval, remaining))
+
+    @property
+    def overflowed(self):
+        overflowed, self._overflowed = self._overflowed, False
+        return overflowed
+
+    def close(self):
+        # Nothing held: the channel stays active until no subscriber touches it
+        pass
+
+
+class CacheBroker:
+    """
+    Pub/sub relayed through a shared Django cache: events are numbered with an atomic
+    incr and kept for event_timeout seconds; subscribers poll the sequence number.
+    Nothing is written while no subscriber has touched the test's channel recently.
+    """
+
+    def __init__(self, alias="default", poll_interval=0.5, event_timeout=60, max_pending=1000):
+        self.cache = caches[alias]
+        self.poll_interval = poll_interval
+        self.event_timeout = event_timeout
+        self.max_pending = max_pending
+        self.published = 0
+        self.dropped = 0
+
+    def _key(self, test_id, suffix):
+        return f"proctoring:live:{test_id}:{suffix}"
+
+    def event_key(self, test_id, seq):
+        return self._key(test_id, seq)
+
+    def sequence(self, test_id):
+        return self.cache.get(self._key(test_id, "seq"), 0)
+
+    def touch(self, test_id):
+        self.cache.set(self._key(test_id, "active"), True, self.event_timeout)
+
+    def publish(self, test_id, event):
+        if not self.cache.get(self._key(test_id, "active")):
+            return
+        seq_key = self._key(test_id, "seq")
+        self.cache.add(seq_key, 0, None)
+        try:
+            seq = self.cache.incr(seq_key)
+        except ValueError:
+            # Evicted between add and incr
+            self.dropped += 1
+            return
+        self.cache.set(self.event_key(test_id, seq), event, self.event_timeout)
+        self.published += 1
+
+    def subscribe(self, test_id):
+        return CacheSubscription(self, test_id)
+
+    def subscribers(self):
+        return None
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the configured broker (created on first use)."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                max_pending = getattr(settings, "PROCTORING_LIVE_MAX_PENDING", 1000)
+                if getattr(settings, "PROCTORING_LIVE_BACKEND", "local") == "cache":
+                    _broker = CacheBroker(
+                        alias=getattr(settings, "PROCTORING_LIVE_CACHE_ALIAS", "default"),
+                        poll_interval=getattr(settings, "PROCTORING_LIVE_POLL_INTERVAL", 0.5),
+                        max_pending=max_pending,
+                    )
+                else:
+                    _broker = LocalBroker(max_pending)
+    return _broker
+
+
+def publish_violation(email, test_id, category, timestamp):
+    get_broker().publish(test_id, {"email": email, "ts": timestamp.timestamp(), "delta": counters_for(category)})
+
+
+def publish_reset(email, test_id):
+    get_broker().publish(test_id, {"email": email, "ts": timezone.now().timestamp(), "reset": True})
+
+
+def stats():
+    broker = get_broker()
+    return {
+        "backend": type(broker).__name__,
+        "subscribers": broker.subscribers(),
+        "published": broker.published,
+        "dropped": broker.dropped,
+    }
+
+
+metrics.register("live_stream", stats)
@@ -0,0 +1,96 @@
+"""
+Django management command to compare detector backends on a stored set of frames.
+Reports frames/sec per backend and how closely each backend's detections match the
+reference backend (the first one listed) at the violation confidence threshold.
+Usage: python manage.py benchmark_detector --frames DIR [--backends ultralytics,onnx,openvino]
+       [--int8] [--batch 1] [--repeat 3] [--conf 0.4]
+"""
+import glob
+import os
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image
+
+from proctoring.detectors import create_detector, int8_path, onnx_model_path
+
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png", "*.webp")
+
+
+def _load_frames(directory):
+    paths = sorted(p for pattern in IMAGE_PATTERNS for p in glob.glob(os.path.join(directory, pattern)))
+    return [Image.open(p).convert("RGB") for p in paths]
+
+
+def _compare(reference, candidate):
+    """Label-level true positives / false positives / false negatives and exact-frame matches."""
+    tp = fp = fn = exact = 0
+    for ref, cand in zip(reference, candidate):
+        ref_counts, cand_counts = Counter(ref), Counter(cand)
+        overlap = sum((ref_counts & cand_counts).values())
+        tp += overlap
+        fp += sum(cand_counts.values()) - overlap
+        fn += sum(ref_counts.values()) - overlap
+        exact += ref_counts == cand_counts
+    return tp, fp, fn, exact
+
+
+class Command(BaseCommand):
+    help = "Benchmark object detector backends (frames/sec and agreement) on sample frames"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--frames", required=True, help="Directory of sample frames (jpg/png/webp)")
+        parser.add_argument("--backends", default="ultralytics,onnx",
+                            help="Comma-separated backends; the first is the accuracy reference")
+        parser.add_argument("--int8", action="store_true", help="Also benchmark the INT8 ONNX model")
+        parser.add_argument("--batch", type=int, default=1, help="Frames per predict call")
+        parser.add_argument("--repeat", type=int, default=3, help="Passes over the frame set")
+        parser.add_argument("--conf", type=float, default=0.4, help="Confidence threshold")
+        parser.add_argument("--threads", type=int, default=None, help="Intra-op threads (default: settings)")
+
+    def handle(self, *args, **options):
+        frames = _load_frames(options["frames"])
+        if not frames:
+            raise CommandError(f"No frames found in {options['frames']}")
+
+        runs = [(name, name, None) for name in options["backends"].split(",") if name]
+        if options["int8"]:
+            for name in ("onnx", "openvino"):
+                if name in options["backends"].split(","):
+                    runs.append((f"{name}-int8", name, int8_path(onnx_model_path())))
+
+        self.stdout.write(f"{len(frames)} frames, batch {options['batch']}, {options['repeat']} passes")
+        reference = None
+        for label, backend, path in runs:
+            try:
+                detector = create_detector(backend, path=path, threads=options["threads"])
+            except Exception as e:
+                self.stdout.write(self.style.WARNING(f"{label}: skipped ({e})"))
+                continue
+
+            started = time.monotonic()
+            detector.warmup()
+            warmup_ms = (time.monotonic() - started) * 1000
+
+            labels = []
+            started = time.monotonic()
+            for _ in range(options["repeat"]):
+                labels = []
+                for i in range(0, len(frames), options["batch"]):
+                    results = detector.predict(frames[i:i + options["batch"]], options["conf"])
+                    labels.extend([d.name for d in result] for result in results)
+            elapsed = time.monotonic() - started
+            fps = len(frames) * options["repeat"] / elapsed
+
+            line = f"{label:<16} {fps:8.1f} frames/s  warm-up {warmup_ms:7.0f} ms"
+            if reference is None:
+                reference = labels
+                line += "  (reference)"
+            else:
+                tp, fp, fn, exact = _compare(reference, labels)
+                precision = tp / (tp + fp) if tp + fp else 1.0
+                recall = tp / (tp + fn) if tp + fn else 1.0
+                line += (f"  precision {precision:.3f}  recall {recall:.3f}  "
+                         f"identical frames {exact}/{len(frames)}")
+            self.stdout.write(line)
@@ -0,0 +1,146 @@
+"""
+Django management command to benchmark SQLite under exam-style concurrency: writer
+threads log violations, checkpoint time left and save answers (read-then-write
+transactions) while reader threads run the monitoring GROUP BY. Each configuration runs
+on a fresh temporary database file: Django's stock connection settings, the SQLITE_*
+PRAGMAs of quizapp.sqlite, and those PRAGMAs with BEGIN IMMEDIATE.
+Usage: python manage.py benchmark_sqlite_writers [--writers 8] [--readers 2]
+       [--seconds 5] [--students 200]
+"""
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from quizapp.sqlite.base import pragma_statements
+
+SCHEMA = (
+    "CREATE TABLE violations (id INTEGER PRIMARY KEY, student_id INTEGER, test_id TEXT,"
+    " category INTEGER, details TEXT, timestamp REAL)",
+    "CREATE INDEX violations_stats ON violations (test_id, student_id, category, timestamp)",
+    "CREATE TABLE testinfo (id INTEGER PRIMARY KEY, student_id INTEGER, time_left INTEGER)",
+    "CREATE TABLE answers (id INTEGER PRIMARY KEY, student_id INTEGER, qid TEXT, ans TEXT)",
+    "CREATE UNIQUE INDEX answers_student_qid ON answers (student_id, qid)",
+)
+
+# (label, apply quizapp.sqlite PRAGMAs, BEGIN statement)
+CONFIGS = (
+    ("stock", False, "BEGIN"),
+    ("tuned", True, "BEGIN"),
+    ("tuned+immediate", True, "BEGIN IMMEDIATE"),
+)
+
+
+def _connect(path, tuned):
+    # As Django opens SQLite connections: autocommit, default 5 s timeout
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    if tuned:
+        for statement in pragma_statements():
+            conn.execute(statement)
+    return conn
+
+
+class Command(BaseCommand):
+    help = "Benchmark concurrent SQLite writers: stock settings vs WAL/busy_timeout/synchronous=NORMAL"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=8, help="Writer threads")
+        parser.add_argument("--readers", type=int, default=2, help="Monitoring reader threads")
+        parser.add_argument("--seconds", type=float, default=5, help="Duration per configuration")
+        parser.add_argument("--students", type=int, default=200, help="Simulated students")
+
+    def handle(self, *args, **options):
+        for label, tuned, begin in CONFIGS:
+            with tempfile.TemporaryDirectory() as directory:
+                result = self._run(os.path.join(directory, "bench.db"), tuned, begin, options)
+            latencies = result["latencies"] or [0.0]
+            p99 = statistics.quantiles(latencies, n=100)[98] if len(latencies) > 1 else latencies[0]
+            self.stdout.write(
+                f"{label:16} {result['writes'] / options['seconds']:8.0f} writes/s  "
+                f"p50 {statistics.median(latencies):7.2f} ms  p99 {p99:8.2f} ms  "
+                f"locked errors {result['errors']:5d}  reads/s {result['reads'] / options['seconds']:7.0f}"
+            )
+        self.stdout.write(self.style.SUCCESS("Benchmark complete."))
+
+    def _run(self, path, tuned, begin, options):
+        setup = _connect(path, tuned)
+        for statement in SCHEMA:
+            setup.execute(statement)
+        setup.executemany("INSERT INTO testinfo (student_id, time_left) VALUES (?, 3600)",
+                          [(s,) for s in range(options["students"])])
+        setup.close()
+
+        result = {"writes": 0, "reads": 0, "errors": 0, "latencies": []}
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def writer(seed):
+            rng = random.Random(seed)
+            conn = _connect(path, tuned)
+            writes, errors, latencies = 0, 0, []
+            while not stop.is_set():
+                student = rng.randrange(options["students"])
+                started = time.perf_counter()
+                try:
+                    roll = rng.random()
+                    if roll < 0.6:
+                        conn.execute("INSERT INTO violations (student_id, test_id, category, details, timestamp)"
+                                     " VALUES (?, 'T', ?, 'Tab Switch', ?)", (student, rng.randrange(5), time.time()))
+                    elif roll < 0.9:
+                        conn.execute("UPDATE testinfo SET time_left = time_left - 1 WHERE student_id = ?", (student,))
+                    else:
+                        # record_answers: read the stored answer, then write inside one transaction
+                        qid = str(rng.randrange(20))
+                        conn.execute(begin)
+                        try:
+                            row = conn.execute("SELECT id FROM answers WHERE student_id = ? AND qid = ?",
+                                               (student, qid)).fetchone()
+                            if row:
+                                conn.execute("UPDATE answers SET ans = ? WHERE id = ?", (rng.choice("abcd"), row[0]))
+                            else:
+                                conn.execute("INSERT INTO answers (student_id, qid, ans) VALUES (?, ?, ?)",
+                                             (student, qid, rng.choice("abcd")))
+                            conn.execute("COMMIT")
+                        except sqlite3.OperationalError:
+                            conn.execute("ROLLBACK")
+                            raise
+                    writes += 1
+                    latencies.append((time.perf_counter() - started) * 1000)
+                except sqlite3.OperationalError as e:
+                    if "locked" not in str(e) and "busy" not in str(e):
+                        raise
+                    errors += 1
+            conn.close()
+            with lock:
+                result["writes"] += writes
+                result["errors"] += errors
+                result["latencies"].extend(latencies)
+
+        def reader():
+            conn = _connect(path, tuned)
+            reads = 0
+            while not stop.is_set():
+                try:
+                    conn.execute("SELECT student_id, category, COUNT(*) FROM violations WHERE test_id = 'T'"
+                                 " GROUP BY student_id, category").fetchall()
+                    reads += 1
+                except sqlite3.OperationalError:
+                    pass
+            conn.close()
+            with lock:
+                result["reads"] += reads
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(options["writers"])]
+        threads += [threading.Thread(target=reader) for _ in range(options["readers"])]
+        for thread in threads:
+            thread.start()
+        time.sleep(options["seconds"])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return result
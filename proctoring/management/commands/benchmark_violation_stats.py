@@ -0,0 +1,138 @@
+"""
+Django management command to benchmark the live monitoring counters on synthetic violations:
+the previous five `details__icontains` counts per student against the GROUP BY category
+query on the (test_id, student, category, timestamp) index, per student and per test.
+Rows are generated inside a transaction that is rolled back, so the database is unchanged.
+Usage: python manage.py benchmark_violation_stats [--rows 1000000] [--tests 10]
+       [--students 500] [--repeat 10]
+"""
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections, models, router, transaction
+from django.utils import timezone
+
+from accounts.models import User
+from exams.models import ViolationLog
+from proctoring import live
+
+# Details strings as the proctoring views write them, roughly in their observed proportions
+SAMPLE_DETAILS = (
+    ("Tab Switch / Window Focus Lost", 30),
+    ("No Face Detected", 20),
+    ("Face Re-detected", 5),
+    ("Multiple Persons (2)", 10),
+    ("Mobile Phone Detected", 10),
+    ("Book Detected", 5),
+    ("Laptop Detected", 3),
+    ("High Volume (63.5)", 15),
+    ("Scan Violation: Found cell phone, book", 1),
+    ("Environment Violation: Debugger Detected", 1),
+)
+
+
+def _legacy_counts(test_id, email):
+    """The stats endpoint before categories: one LIKE scan per counter."""
+    student_id = User.objects.filter(email=email).values_list("uid", flat=True).first()
+    logs = ViolationLog.objects.filter(test_id=test_id, student_id=student_id)
+    return {
+        'win': logs.filter(details__icontains="Tab Switch").count(),
+        'mob': logs.filter(models.Q(details__icontains="Mobile Phone") | models.Q(details__icontains="Cell Phone")).count(),
+        'per': logs.filter(models.Q(details__icontains="Person") | models.Q(details__icontains="Face")).count(),
+        'aud': logs.filter(details__icontains="High Volume").count(),
+        'tot': logs.count(),
+    }
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Benchmark violation counters: details__icontains counts vs GROUP BY category on synthetic rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000000, help="Synthetic violations to generate")
+        parser.add_argument("--tests", type=int, default=10, help="Number of tests")
+        parser.add_argument("--students", type=int, default=500, help="Number of students (spread over the tests)")
+        parser.add_argument("--repeat", type=int, default=10, help="Timed runs per query")
+        parser.add_argument("--batch-size", type=int, default=10000, help="Rows per bulk_create")
+
+    def handle(self, *args, **options):
+        try:
+            # Users and violations may be in different databases
+            with transaction.atomic(), transaction.atomic(using=router.db_for_write(ViolationLog)):
+                self._run(options)
+                raise Rollback
+        except Rollback:
+            self.stdout.write("Synthetic rows rolled back.")
+
+    def _timed(self, func, repeat):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            samples.append((time.perf_counter() - started) * 1000)
+        return result, statistics.median(samples)
+
+    def _run(self, options):
+        rng = random.Random(0)
+        started = time.monotonic()
+        students = User.objects.bulk_create([
+            User(email=f"bench-{i}@violations.invalid", name=f"Bench {i}", user_type="student", password="!")
+            for i in range(options["students"])
+        ])
+        if students[0].pk is None:
+            students = list(User.objects.filter(email__endswith="@violations.invalid").order_by("uid"))
+        tests = [f"BENCH-{i}" for i in range(options["tests"])]
+        # Each student sits one test
+        roster = {student.pk: tests[i % len(tests)] for i, student in enumerate(students)}
+        details, weights = zip(*SAMPLE_DETAILS)
+        categories = {text: ViolationLog.category_for(text) for text in details}
+        now = timezone.now()
+
+        remaining = options["rows"]
+        while remaining > 0:
+            size = min(options["batch_size"], remaining)
+            batch = []
+            for text in rng.choices(details, weights, k=size):
+                student = rng.choice(students)
+                batch.append(ViolationLog(
+                    student_id=student.pk, test_id=roster[student.pk], details=text,
+                    category=categories[text], timestamp=now,
+                ))
+            ViolationLog.objects.bulk_create(batch)
+            remaining -= size
+        self.stdout.write(f"Generated {options['rows']} violations for {len(students)} students "
+                          f"in {len(tests)} tests ({time.monotonic() - started:.1f}s)")
+
+        student = students[0]
+        test_id = roster[student.pk]
+        legacy, legacy_ms = self._timed(lambda: _legacy_counts(test_id, student.email), options["repeat"])
+        grouped, grouped_ms = self._timed(
+            lambda: live.counter_totals(test_id, student.email).get(student.email), options["repeat"],
+        )
+        self.stdout.write(f"One student:  icontains x5 {legacy_ms:8.2f} ms   GROUP BY category {grouped_ms:8.2f} ms"
+                          f"   ({legacy_ms / max(grouped_ms, 1e-6):.1f}x)")
+        if legacy != grouped:
+            self.stdout.write(self.style.WARNING(f"Counts differ: {legacy} vs {grouped} "
+                                                 "(rows matching several counters now count once)"))
+
+        emails = [s.email for s in students if roster[s.pk] == test_id]
+        _, legacy_ms = self._timed(lambda: [_legacy_counts(test_id, email) for email in emails], 1)
+        _, grouped_ms = self._timed(lambda: live.counter_totals(test_id), options["repeat"])
+        self.stdout.write(f"Whole test ({len(emails)} students):  icontains x5 per student {legacy_ms:8.2f} ms   "
+                          f"one GROUP BY {grouped_ms:8.2f} ms   ({legacy_ms / max(grouped_ms, 1e-6):.1f}x)")
+
+        connection = connections[router.db_for_read(ViolationLog)]
+        if connection.vendor == "sqlite":
+            query = ViolationLog.objects.filter(test_id=test_id).values_list("student_id", "category") \
+                .annotate(n=models.Count("vid")).order_by().query
+            sql, params = query.get_compiler(connection=connection).as_sql()
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                for row in cursor.fetchall():
+                    self.stdout.write(f"  plan: {row[-1]}")
+        self.stdout.write(self.style.SUCCESS("Benchmark complete."))
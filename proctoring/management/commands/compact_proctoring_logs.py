@@ -0,0 +1,56 @@
+"""
+Django management command to compact the proctoring logs of closed tests: violations are
+rolled up into per-student summary rows, and the raw violation, proctoring and window
+log rows are moved to the test's gzipped JSONL archive (proctoring.archive).
+A test is closed PROCTORING_ARCHIVE_AFTER_DAYS days after its end time. Rows of tests
+that no longer exist are compacted too: log rows do not cascade (quizapp/routers.py), so
+this is what clears the rows of deleted tests and of deleted users' tests. Safe to re-run;
+rows logged after a test was compacted are picked up by the next run.
+Usage: python manage.py compact_proctoring_logs [--days 7] [--test TEST_ID ...] [--dry-run]
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from exams.models import Teacher
+from proctoring import archive
+
+
+class Command(BaseCommand):
+    help = "Roll up and archive the proctoring logs of closed tests, keeping only live tests in the log tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=getattr(settings, "PROCTORING_ARCHIVE_AFTER_DAYS", 7),
+            help="Compact tests that ended this many days ago (default: PROCTORING_ARCHIVE_AFTER_DAYS)",
+        )
+        parser.add_argument("--test", action="append", dest="tests",
+                            help="Compact this test regardless of its end time (repeatable)")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the rows to archive")
+
+    def handle(self, *args, **options):
+        if options["tests"]:
+            tests = options["tests"]
+        else:
+            # Tests with hot rows (log database) that are closed or deleted (main database)
+            hot = set()
+            for model in archive.ARCHIVED_MODELS:
+                hot.update(model.objects.order_by().values_list("test_id", flat=True).distinct())
+            cutoff = timezone.now() - timedelta(days=options["days"])
+            tests = Teacher.objects.filter(test_id__in=hot)
+            closed = set(tests.filter(end__lt=cutoff).values_list("test_id", flat=True))
+            deleted = hot - set(tests.values_list("test_id", flat=True))
+            tests = sorted(closed | deleted)
+
+        verb = "would archive" if options["dry_run"] else "archived"
+        total = 0
+        for test_id in tests:
+            moved = archive.compact(test_id, dry_run=options["dry_run"])
+            total += sum(moved.values())
+            details = ", ".join(f"{table} {rows}" for table, rows in moved.items()) or "nothing"
+            self.stdout.write(f"{test_id}: {verb} {details}")
+        self.stdout.write(self.style.SUCCESS(f"{len(tests)} tests, {total} rows {verb}."))
@@ -0,0 +1,48 @@
+"""
+Django management command to export the bundled YOLOv8 weights to ONNX for the
+onnx/openvino detector backends, optionally with a dynamically quantized INT8 copy.
+Usage: python manage.py export_detector [--weights yolov8n.pt] [--imgsz 640] [--int8]
+"""
+import os
+import shutil
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from proctoring.detectors import FALLBACK_MODEL_PATH, int8_path
+
+
+class Command(BaseCommand):
+    help = "Export the object detector to ONNX (and optionally INT8)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--weights", default=FALLBACK_MODEL_PATH, help="PyTorch weights to export")
+        parser.add_argument("--output", default=settings.PROCTORING_DETECTOR_ONNX_PATH, help="ONNX file to write")
+        parser.add_argument("--imgsz", type=int, default=640, help="Input size")
+        parser.add_argument("--int8", action="store_true", help="Also write a dynamically quantized INT8 model")
+
+    def handle(self, *args, **options):
+        try:
+            from ultralytics import YOLO
+        except ImportError:
+            raise CommandError("ultralytics is required to export the model")
+
+        output = str(options["output"])
+        model = YOLO(options["weights"])
+        # dynamic=True keeps the batch dimension open so the inference broker can batch frames
+        exported = model.export(format="onnx", imgsz=options["imgsz"], dynamic=True, simplify=True)
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        if os.path.abspath(exported) != os.path.abspath(output):
+            shutil.move(exported, output)
+        self.stdout.write(self.style.SUCCESS(f"Exported {options['weights']} to {output}"))
+
+        if options["int8"]:
+            try:
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+            except ImportError:
+                raise CommandError("onnxruntime is required for INT8 quantization")
+            quantized = int8_path(output)
+            quantize_dynamic(output, quantized, weight_type=QuantType.QUInt8)
+            self.stdout.write(self.style.SUCCESS(f"Wrote INT8 model to {quantized}"))
+            self.stdout.write("Compare accuracy with `manage.py benchmark_detector` before enabling "
+                              "PROCTORING_DETECTOR_INT8.")
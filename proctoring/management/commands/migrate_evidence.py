@@ -0,0 +1,59 @@
+"""
+Django management command to move base64 images still stored in ViolationLog.evidence
+and ProctoringLog.img_log into the evidence store, leaving only references in the rows.
+Safe to re-run: rows that already hold a reference are skipped.
+Usage: python manage.py migrate_evidence [--batch-size 200] [--dry-run] [--vacuum]
+"""
+import binascii
+
+from django.core.management.base import BaseCommand
+from django.db import connections, router, transaction
+
+from proctoring import evidence
+
+
+class Command(BaseCommand):
+    help = "Move base64 evidence images from log rows into the content-addressed evidence store"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200, help="Rows per transaction")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the rows to migrate")
+        parser.add_argument("--vacuum", action="store_true",
+                            help="VACUUM the database afterwards to return the freed space (SQLite)")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        databases = set()
+        for model, field, _, _ in evidence.evidence_columns():
+            database = router.db_for_write(model)
+            databases.add(database)
+            pending = (model.objects.exclude(**{f"{field}__isnull": True}).exclude(**{field: ""})
+                       .exclude(**{f"{field}__startswith": evidence.PREFIX}))
+            # Collect keys first: SQLite gives no isolation between a cursor and writes on the same table
+            pks = list(pending.values_list("pk", flat=True))
+            label = f"{model._meta.db_table}.{field}"
+            if options["dry_run"]:
+                self.stdout.write(f"{label}: {len(pks)} rows to migrate")
+                continue
+
+            migrated = skipped = 0
+            for i in range(0, len(pks), batch_size):
+                with transaction.atomic(using=database):
+                    for pk, value in model.objects.filter(pk__in=pks[i:i + batch_size]).values_list("pk", field):
+                        try:
+                            reference = evidence.save(value)
+                        except (binascii.Error, ValueError):
+                            # Placeholders such as "[Base64 Image Omitted]" are left alone
+                            skipped += 1
+                            continue
+                        model.objects.filter(pk=pk).update(**{field: reference})
+                        migrated += 1
+            self.stdout.write(f"{label}: {migrated} rows migrated, {skipped} not images")
+
+        if options["vacuum"] and not options["dry_run"]:
+            for database in sorted(databases):
+                connection = connections[database]
+                if connection.vendor == "sqlite":
+                    with connection.cursor() as cursor:
+                        cursor.execute("VACUUM")
+        self.stdout.write(self.style.SUCCESS("Done."))
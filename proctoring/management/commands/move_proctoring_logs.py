@@ -0,0 +1,72 @@
+"""
+Django management command to move the proctoring logs (violation, proctoring and window
+logs) from the main database into the PROCTORING_LOG_DATABASE alias.
+The source table may predate later migrations (they only run on the log database now):
+only its existing columns are read, the rest take their defaults and violation
+categories are derived from the details. Rows are moved in batches: inserted into the
+log database with new ids (it may already hold rows written since the switch), then
+deleted from the source, so an interrupted run can simply be repeated. Like the violation
+journal this is at-least-once: a crash between the two commits of a batch copies that
+batch twice.
+Run `manage.py migrate --database proctoring` first.
+Usage: python manage.py move_proctoring_logs [--source default] [--batch-size 2000] [--dry-run]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+
+from exams.models import ViolationLog
+from proctoring.models import ProctoringLog, WindowEstimationLog
+from proctoring.violations import flush_pending
+
+LOG_MODELS = (ViolationLog, ProctoringLog, WindowEstimationLog)
+
+
+class Command(BaseCommand):
+    help = "Move proctoring log rows from the main database into the proctoring log database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", default=DEFAULT_DB_ALIAS, help="Database alias holding the rows now")
+        parser.add_argument("--batch-size", type=int, default=2000, help="Rows per batch")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the rows to move")
+
+    def handle(self, *args, **options):
+        source = options["source"]
+        flush_pending()
+        for model in LOG_MODELS:
+            target = router.db_for_write(model)
+            table = model._meta.db_table
+            if target == source:
+                raise CommandError(f"{table} is routed to '{source}' itself; set PROCTORING_LOG_DATABASE")
+            if table not in connections[target].introspection.table_names():
+                raise CommandError(f"{table} does not exist in '{target}'; run migrate --database {target}")
+            if table not in connections[source].introspection.table_names():
+                self.stdout.write(f"{table}: not in '{source}', nothing to move")
+                continue
+
+            with connections[source].cursor() as cursor:
+                columns = {c.name for c in connections[source].introspection.get_table_description(cursor, table)}
+            fields = [f.attname for f in model._meta.concrete_fields if f.column in columns]
+            rows = model._base_manager.using(source).order_by("pk")
+            if options["dry_run"]:
+                self.stdout.write(f"{table}: {rows.count()} rows to move")
+                continue
+            moved = 0
+            while True:
+                values = list(rows.values(*fields)[:options["batch_size"]])
+                if not values:
+                    break
+                pks = [row[model._meta.pk.attname] for row in values]
+                batch = []
+                for row in values:
+                    row.pop(model._meta.pk.attname)
+                    instance = model(**row)
+                    if model is ViolationLog and "category" not in row:
+                        instance.category = ViolationLog.category_for(instance.details)
+                    batch.append(instance)
+                with transaction.atomic(using=target):
+                    model._base_manager.using(target).bulk_create(batch)
+                with transaction.atomic(using=source):
+                    model._base_manager.using(source).filter(pk__in=pks).delete()
+                moved += len(batch)
+            self.stdout.write(f"{table}: {moved} rows moved from '{source}' to '{target}'")
+        self.stdout.write(self.style.SUCCESS("Done."))
@@ -0,0 +1,32 @@
+"""
+Django management command to apply the evidence retention period: clears evidence
+references older than the retention from the log rows and deletes stored files that
+no row references any more.
+Usage: python manage.py purge_evidence [--days 90] [--dry-run]
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from proctoring.evidence import purge
+
+
+class Command(BaseCommand):
+    help = "Delete evidence images older than the retention period and unreferenced evidence files"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.PROCTORING_EVIDENCE_RETENTION_DAYS,
+            help="Keep evidence this many days (default: PROCTORING_EVIDENCE_RETENTION_DAYS)",
+        )
+        parser.add_argument("--grace", type=int, default=3600,
+                            help="Never delete files younger than this many seconds")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would be deleted")
+
+    def handle(self, *args, **options):
+        cleared, deleted, freed = purge(options["days"], options["grace"], options["dry_run"])
+        verb = "Would clear" if options["dry_run"] else "Cleared"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} evidence on {cleared} rows; {deleted} files ({freed / 1e6:.1f} MB) unreferenced."
+        ))
@@ -0,0 +1,24 @@
+"""
+Django management command to commit violations left in write-behind journals by
+worker processes that exited without flushing.
+Usage: python manage.py replay_violation_journal [--dir DIRECTORY]
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from proctoring.violations import replay_journals
+
+
+class Command(BaseCommand):
+    help = "Replay violation journals of dead worker processes into ViolationLog"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dir",
+            default=settings.PROCTORING_VIOLATION_JOURNAL_DIR,
+            help="Journal directory (default: PROCTORING_VIOLATION_JOURNAL_DIR)",
+        )
+
+    def handle(self, *args, **options):
+        written = replay_journals(options["dir"])
+        self.stdout.write(self.style.SUCCESS(f"Replayed {written} violations."))
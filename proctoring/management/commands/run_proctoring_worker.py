@@ -0,0 +1,33 @@
+"""
+Django management command to run the proctoring worker pool that owns the detection
+models. Point the web workers at it with PROCTORING_WORKER_SOCKET.
+Usage: python manage.py run_proctoring_worker [--socket PATH] [--processes N]
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from proctoring.worker import WorkerPool
+
+
+class Command(BaseCommand):
+    help = "Run the proctoring inference worker pool on a Unix socket"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--socket",
+            default=settings.PROCTORING_WORKER_SOCKET or str(settings.BASE_DIR / "proctoring-worker.sock"),
+            help="Unix socket path (default: PROCTORING_WORKER_SOCKET)",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=settings.PROCTORING_WORKER_PROCESSES,
+            help="Number of inference processes (default: PROCTORING_WORKER_PROCESSES)",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(
+            f"Proctoring worker pool: {options['processes']} processes on {options['socket']}"
+        ))
+        WorkerPool(options["socket"], options["processes"]).serve_forever()
+        self.stdout.write("Proctoring worker pool stopped.")
@@ -0,0 +1,69 @@
+"""
+In-process metrics for the proctoring pipeline.
+Components register a provider returning a dict; the metrics view reports them all.
+Numbers are per worker process.
+"""
+import threading
+from collections import deque
+
+
+class RollingWindow:
+    """Keeps the most recent samples and reports percentiles over them."""
+
+    def __init__(self, size=1024):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self, value):
+        with self._lock:
+            self._samples.append(value)
+            self.count += 1
+
+    def percentile(self, pct):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return 0.0
+        index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+    def mean(self, last=None):
+        """Mean of all retained samples, or of the most recent `last` ones."""
+        with self._lock:
+            samples = list(self._samples)
+        if last:
+            samples = samples[-last:]
+        return sum(samples) / len(samples) if samples else 0.0
+
+    def summary(self, scale=1.0, digits=2):
+        """Return count/mean/p50/p99, multiplied by scale (e.g. 1000 for seconds -> ms)."""
+        return {
+            "count": self.count,
+            "mean": round(self.mean() * scale, digits),
+            "p50": round(self.percentile(50) * scale, digits),
+            "p99": round(self.percentile(99) * scale, digits),
+        }
+
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def register(name, provider):
+    """Register a callable returning a dict of metrics under name (replaces any previous one)."""
+    with _providers_lock:
+        _providers[name] = provider
+
+
+def snapshot():
+    """Collect the current metrics from every registered provider."""
+    with _providers_lock:
+        providers = dict(_providers)
+    data = {}
+    for name, provider in providers.items():
+        try:
+            data[name] = provider()
+        except Exception as e:
+            data[name] = {"error": str(e)}
+    return data
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('proctoring', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='proctoringlog',
+            name='uid',
+            field=models.ForeignKey(db_column='uid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='windowestimationlog',
+            name='uid',
+            field=models.ForeignKey(db_column='uid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
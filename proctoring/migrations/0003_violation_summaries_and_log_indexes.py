@@ -0,0 +1,48 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:53
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('proctoring', '0002_logs_without_user_constraint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ViolationSummary',
+            fields=[
+                ('sid', models.BigAutoField(primary_key=True, serialize=False)),
+                ('test_id', models.CharField(max_length=100)),
+                ('category', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('score', models.IntegerField(default=0)),
+                ('first_at', models.DateTimeField()),
+                ('last_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'violation_summaries',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='proctoringlog',
+            index=models.Index(fields=['test_id', 'email', '-log_time'], name='proctoring_log_student_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='windowestimationlog',
+            index=models.Index(fields=['test_id', 'email', '-transaction_log'], name='window_log_student_idx'),
+        ),
+        migrations.AddField(
+            model_name='violationsummary',
+            name='student',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='violation_summaries', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='violationsummary',
+            constraint=models.UniqueConstraint(fields=('test_id', 'student', 'category'), name='violation_summaries_uniq'),
+        ),
+    ]
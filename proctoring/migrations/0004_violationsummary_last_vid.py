@@ -0,0 +1,18 @@
+# Generated by Django 4.2.28 on 2026-10-17 23:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proctoring', '0003_violation_summaries_and_log_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='violationsummary',
+            name='last_vid',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -12,14 +12,14 @@ class ProctoringLog(models.Model):
     name = models.CharField(max_length=100)
     test_id = models.CharField(max_length=100)
     voice_db = models.IntegerField(default=0)
-    img_log = models.TextField()  # Base64 encoded image
+    img_log = models.TextField()  # "evidence:<sha256>.<ext>" (proctoring.evidence); older rows: base64
     user_movements_updown = models.IntegerField()
     user_movements_lr = models.IntegerField()
     user_movements_eyes = models.IntegerField()
     phone_detection = models.IntegerField()
     person_status = models.IntegerField()
     log_time = models.DateTimeField(auto_now_add=True)
-    uid = models.ForeignKey(User, on_delete=models.CASCADE, db_column='uid')
+    uid = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, db_column='uid')
     
     class Meta:
         db_table = 'proctoring_log'
@@ -27,6 +27,8 @@ class ProctoringLog(models.Model):
             models.Index(fields=['email']),
             models.Index(fields=['email', 'test_id']),
             models.Index(fields=['uid']),
+            # Per-student log pages: rows of one test/student, newest first, straight from the index
+            models.Index(fields=['test_id', 'email', '-log_time'], name='proctoring_log_student_idx'),
         ]
         ordering = ['-log_time']
     
@@ -42,15 +44,42 @@ class WindowEstimationLog(models.Model):
     name = models.CharField(max_length=100)
     window_event = models.IntegerField()
     transaction_log = models.DateTimeField(auto_now_add=True)
-    uid = models.ForeignKey(User, on_delete=models.CASCADE, db_column='uid')
+    uid = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, db_column='uid')
     
     class Meta:
         db_table = 'window_estimation_log'
         indexes = [
             models.Index(fields=['email', 'test_id']),
             models.Index(fields=['uid']),
+            models.Index(fields=['test_id', 'email', '-transaction_log'], name='window_log_student_idx'),
         ]
         ordering = ['-transaction_log']
     
     def __str__(self):
         return f"{self.email} - {self.test_id} - {self.transaction_log}"
+
+
+class ViolationSummary(models.Model):
+    """
+    Per student/category violation totals of a compacted test; the raw rows were moved to
+    the test's archive (proctoring.archive, manage.py compact_proctoring_logs).
+    """
+    sid = models.BigAutoField(primary_key=True)
+    test_id = models.CharField(max_length=100)
+    student = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False,
+                                related_name='violation_summaries')
+    category = models.PositiveSmallIntegerField()  # ViolationLog.Category
+    count = models.PositiveIntegerField(default=0)
+    score = models.IntegerField(default=0)
+    first_at = models.DateTimeField()
+    last_at = models.DateTimeField()
+    last_vid = models.BigIntegerField(default=0)  # highest ViolationLog pk of the test rolled up so far
+
+    class Meta:
+        db_table = 'violation_summaries'
+        constraints = [
+            models.UniqueConstraint(fields=['test_id', 'student', 'category'], name='violation_summaries_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} - {self.test_id} - {self.category}: {self.count}"
@@ -0,0 +1,113 @@
+"""
+Server-driven frame sampling.
+
+Every video feed response carries `next_interval_ms`, the delay the exam page waits
+before posting its next frame. It is derived from:
+  - the student's recent risk: a violation within `alert_window_s` drops the
+    interval to `min_ms`; otherwise each clean frame in a row adds `clean_step`
+    times `base_ms`, up to `max_ms`
+  - inference pressure (InferenceBroker.pressure / WorkerClient.pressure): above 1.0
+    the interval is stretched proportionally, and a timed-out or unavailable detector
+    backs every session off for PROCTORING_SAMPLING_OVERLOAD_BACKOFF seconds
+
+The policy is chosen per Teacher.proctoring_type from PROCTORING_SAMPLING_POLICIES
+(missing keys fall back to DEFAULT_POLICY).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from exams.models import Teacher
+from . import metrics
+
+DEFAULT_POLICY = {
+    "min_ms": 1000,
+    "base_ms": 3000,
+    "max_ms": 10000,
+    "clean_step": 0.25,
+    "alert_window_s": 30,
+}
+
+# Pressure assumed while the detector is backing off after a timeout
+OVERLOAD_PRESSURE = 3.0
+
+
+def get_policy(proctoring_type):
+    policies = getattr(settings, "PROCTORING_SAMPLING_POLICIES", {})
+    return {**DEFAULT_POLICY, **policies.get(proctoring_type, {})}
+
+
+def proctoring_type_for(test_id):
+    """Teacher.proctoring_type for a test, cached so the per-frame path does not query it."""
+    return cache.get_or_set(
+        f"proctoring:type:{test_id}",
+        lambda: Teacher.objects.filter(test_id=test_id).values_list("proctoring_type", flat=True).first() or 0,
+        300,
+    )
+
+
+class _RiskTracker:
+    """Per-session clean streak and time of the last violation (in-process LRU)."""
+
+    def __init__(self, max_entries=5000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def observe(self, key, alerted):
+        """Record one analyzed frame; returns (clean_streak, seconds since last alert or None)."""
+        now = time.monotonic()
+        with self._lock:
+            streak, last_alert = self._data.get(key, (0, None))
+            if alerted:
+                streak, last_alert = 0, now
+            else:
+                streak += 1
+            self._data[key] = (streak, last_alert)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+        return streak, (now - last_alert) if last_alert is not None else None
+
+
+_tracker = _RiskTracker(getattr(settings, "PROCTORING_STATE_MAX_ENTRIES", 5000))
+_intervals = metrics.RollingWindow()
+_overloaded_until = 0.0
+_overloads = 0
+
+
+def report_overload():
+    """Called when detection timed out or the worker pool was unreachable."""
+    global _overloaded_until, _overloads
+    _overloads += 1
+    _overloaded_until = time.monotonic() + getattr(settings, "PROCTORING_SAMPLING_OVERLOAD_BACKOFF", 15)
+
+
+def next_interval_ms(key, test_id, alerted, pressure=0.0):
+    """Delay (ms) before this session's next frame."""
+    policy = get_policy(proctoring_type_for(test_id))
+    streak, since_alert = _tracker.observe(key, alerted)
+    if since_alert is not None and since_alert < policy["alert_window_s"]:
+        interval = policy["min_ms"]
+    else:
+        interval = policy["base_ms"] * (1 + policy["clean_step"] * streak)
+    if time.monotonic() < _overloaded_until:
+        pressure = max(pressure, OVERLOAD_PRESSURE)
+    interval *= max(1.0, pressure)
+    interval = int(min(max(interval, policy["min_ms"]), policy["max_ms"]))
+    _intervals.add(interval)
+    return interval
+
+
+def stats():
+    return {
+        "next_interval_ms": _intervals.summary(),
+        "overloads": _overloads,
+        "backing_off": time.monotonic() < _overloaded_until,
+    }
+
+
+metrics.register("sampling", stats)
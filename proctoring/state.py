@@ -0,0 +1,329 @@
+"""
+Running proctoring state per (student, test_id).
+
+Holds the violation score total, the number of violation flags and whether the
+face baseline ("Face Re-detected") has been recorded, so the per-frame termination
+check does not have to re-aggregate ViolationLog. State is updated incrementally as
+violations are written and rebuilt from the database on a cache miss.
+
+Backends (PROCTORING_STATE_BACKEND):
+    'local' - in-process LRU (default). A process only applies its own violations, so
+              entries are re-read from the database once they are older than
+              PROCTORING_STATE_LOCAL_TTL seconds; other workers' violations count
+              within that TTL plus the write-behind flush interval.
+    'cache' - Django cache alias PROCTORING_STATE_CACHE_ALIAS, exact across workers
+              when that alias is a shared cache (not the per-process LocMemCache)
+
+Violations are logged with write-behind, so a rebuild races with rows that are still
+buffered or being written. The local store serialises the two per key (see recording()).
+The cache store counts every violation into a time bucket and rebuilds from the database
+only up to a cutoff every worker has flushed; buckets after the cutoff are added on read.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Q, Sum
+
+from exams.models import ViolationLog
+from . import metrics
+
+FACE_BASELINE_DETAILS = "Face Re-detected"
+
+_FIELDS = ("score", "flags", "total", "face_baseline")
+
+
+class SessionState:
+    """Violation totals for one student in one test."""
+    __slots__ = _FIELDS
+
+    def __init__(self, score=0, flags=0, total=0, face_baseline=False):
+        self.score = score
+        self.flags = flags
+        self.total = total
+        self.face_baseline = face_baseline
+
+    def apply(self, details, score):
+        self.score += score
+        self.total += 1
+        if details == FACE_BASELINE_DETAILS:
+            self.face_baseline = True
+        else:
+            self.flags += 1
+
+    def copy(self):
+        return SessionState(self.score, self.flags, self.total, self.face_baseline)
+
+    def __repr__(self):
+        return (f"SessionState(score={self.score}, flags={self.flags}, "
+                f"total={self.total}, face_baseline={self.face_baseline})")
+
+
+class LocalStateStore:
+    """Thread-safe in-process LRU of SessionState objects, each valid for ttl seconds."""
+
+    def __init__(self, max_entries=5000, ttl=5.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        # Striped per-key locks held across rebuild/store and write/record
+        self._key_locks = [threading.Lock() for _ in range(64)]
+
+    def _fresh(self, entry):
+        return entry is not None and (not self.ttl or time.monotonic() - entry[1] < self.ttl)
+
+    def get(self, key):
+        """The cached state, or None when missing or older than the TTL."""
+        with self._lock:
+            entry = self._data.get(key)
+            if not self._fresh(entry):
+                return None
+            self._data.move_to_end(key)
+            return entry[0].copy()
+
+    def set(self, key, state):
+        with self._lock:
+            self._data[key] = [state.copy(), time.monotonic()]
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def add(self, key, state):
+        """Store state unless a fresh one is cached already; returns the cached state."""
+        with self._lock:
+            if not self._fresh(self._data.get(key)):
+                self._data[key] = [state.copy(), time.monotonic()]
+                while len(self._data) > self.max_entries:
+                    self._data.popitem(last=False)
+            self._data.move_to_end(key)
+            return self._data[key][0].copy()
+
+    def lock(self, key):
+        return self._key_locks[hash(key) % len(self._key_locks)]
+
+    def load(self, key, loader):
+        """Rebuild a missing or expired state; record() calls for the key wait until it is stored."""
+        with self.lock(key):
+            state = self.get(key)
+            if state is not None:
+                # Another thread rebuilt it while this one waited for the lock
+                return state
+            return self.add(key, loader(None))
+
+    def apply(self, key, details, score, timestamp=None):
+        """Fold one violation into a cached state; returns False if the key is not cached."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False
+            entry[0].apply(details, score)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CacheStateStore:
+    """
+    SessionState kept in a Django cache, shared between workers.
+
+    Every violation is counted (atomic incr) into a bucket of BUCKET_SECONDS by its
+    timestamp. The base entry holds the totals of all violations before bucket
+    `through`; a read adds the later buckets to it and folds settled buckets into it.
+    A missing base is rebuilt from ViolationLog up to `through`, which lies far enough
+    back that every worker has flushed those rows. No violation is counted by both.
+    """
+    BUCKET_SECONDS = 5
+    COUNTERS = ("score", "flags", "total", "face")
+
+    def __init__(self, alias="default", timeout=None, flush_interval=1.0):
+        self.cache = caches[alias]
+        self.bucket_timeout = timeout or 3600
+        # Buckets younger than this may still get violations from other workers' buffers
+        self.settle = math.ceil((2 * flush_interval + 1) / self.BUCKET_SECONDS)
+        # A base must expire before the oldest bucket it still needs
+        self.base_timeout = max(self.bucket_timeout - (self.settle + 2) * self.BUCKET_SECONDS, 1)
+
+    def _base_key(self, key):
+        return f"proctoring:state:{key}:base"
+
+    def _bucket_keys(self, key, bucket):
+        return {name: f"proctoring:state:{key}:{bucket}:{name}" for name in self.COUNTERS}
+
+    def _now_bucket(self):
+        return int(time.time() // self.BUCKET_SECONDS)
+
+    def _incr(self, key, delta):
+        try:
+            self.cache.incr(key, delta)
+        except ValueError:
+            if not self.cache.add(key, delta, self.bucket_timeout):
+                self.cache.incr(key, delta)
+
+    def get(self, key):
+        base = self.cache.get(self._base_key(key))
+        if base is None:
+            return None
+        return self._read(key, base)
+
+    def _read(self, key, base):
+        """Base plus its later buckets; settled buckets are folded into the stored base."""
+        now = self._now_bucket()
+        # One bucket ahead for workers whose clock runs slightly fast
+        buckets = range(base["through"], now + 2)
+        keys = {bucket: self._bucket_keys(key, bucket) for bucket in buckets}
+        values = self.cache.get_many([k for names in keys.values() for k in names.values()])
+        totals = dict(base)
+        settled = now - self.settle
+        folded = dict(base, through=settled) if settled > base["through"] else None
+        for bucket, names in keys.items():
+            for name, k in names.items():
+                value = values.get(k, 0)
+                totals[name] += value
+                if folded is not None and bucket < settled:
+                    folded[name] += value
+        if folded is not None:
+            # Concurrent folds store equivalent bases, so last write wins is fine
+            self.cache.set(self._base_key(key), folded, self.base_timeout)
+        return SessionState(score=totals["score"], flags=totals["flags"], total=totals["total"],
+                            face_baseline=totals["face"] > 0)
+
+    def lock(self, key):
+        return nullcontext()
+
+    def load(self, key, loader):
+        """Rebuild a missing base from the database up to the settled cutoff."""
+        through = self._now_bucket() - self.settle
+        cutoff = datetime.fromtimestamp(through * self.BUCKET_SECONDS, tz=dt_timezone.utc)
+        state = loader(cutoff)
+        base = {"through": through, "score": state.score, "flags": state.flags, "total": state.total,
+                "face": int(state.face_baseline)}
+        if not self.cache.add(self._base_key(key), base, self.base_timeout):
+            # Another worker rebuilt it first
+            base = self.cache.get(self._base_key(key), base)
+        return self._read(key, base)
+
+    def apply(self, key, details, score, timestamp=None):
+        """Count one violation into its time bucket; always True, buckets need no base."""
+        moment = timestamp.timestamp() if timestamp is not None else time.time()
+        names = self._bucket_keys(key, int(moment // self.BUCKET_SECONDS))
+        self._incr(names["total"], 1)
+        if score:
+            self._incr(names["score"], score)
+        self._incr(names["face"] if details == FACE_BASELINE_DETAILS else names["flags"], 1)
+        return True
+
+    def delete(self, key):
+        # Recent buckets would be read by the next rebuild; older ones are before its cutoff
+        now = self._now_bucket()
+        keys = [k for bucket in range(now - self.settle - 1, now + 2)
+                for k in self._bucket_keys(key, bucket).values()]
+        self.cache.delete_many(keys + [self._base_key(key)])
+
+
+_store = None
+_store_lock = threading.Lock()
+_hits = 0
+_misses = 0
+
+
+def get_store():
+    """Return the configured state store (created on first use)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = getattr(settings, "PROCTORING_STATE_BACKEND", "local")
+                if backend == "cache":
+                    _store = CacheStateStore(
+                        alias=getattr(settings, "PROCTORING_STATE_CACHE_ALIAS", "default"),
+                        timeout=getattr(settings, "PROCTORING_STATE_TIMEOUT", None),
+                        flush_interval=getattr(settings, "PROCTORING_VIOLATION_FLUSH_INTERVAL", 1.0),
+                    )
+                else:
+                    _store = LocalStateStore(getattr(settings, "PROCTORING_STATE_MAX_ENTRIES", 5000),
+                                             getattr(settings, "PROCTORING_STATE_LOCAL_TTL", 5.0))
+    return _store
+
+
+def _key(student_id, test_id):
+    return f"{student_id}:{test_id}"
+
+
+def rebuild(student_id, test_id, before=None):
+    """Recompute the state for one student/test from ViolationLog in a single query."""
+    rows = ViolationLog.objects.filter(student_id=student_id, test_id=test_id)
+    if before is not None:
+        rows = rows.filter(timestamp__lt=before)
+    row = rows.aggregate(
+        score=Sum("score"),
+        total=Count("vid"),
+        flags=Count("vid", filter=~Q(details=FACE_BASELINE_DETAILS)),
+        face=Count("vid", filter=Q(details=FACE_BASELINE_DETAILS)),
+    )
+    return SessionState(
+        score=row["score"] or 0,
+        flags=row["flags"],
+        total=row["total"],
+        face_baseline=row["face"] > 0,
+    )
+
+
+def get_state(student_id, test_id):
+    """Return the running SessionState, rebuilding it from the database on a miss."""
+    global _hits, _misses
+    store = get_store()
+    key = _key(student_id, test_id)
+    state = store.get(key)
+    if state is not None:
+        _hits += 1
+        return state
+    _misses += 1
+
+    def loader(before):
+        # Buffered violations must reach the database before re-aggregating
+        from .violations import flush_pending
+        flush_pending()
+        return rebuild(student_id, test_id, before)
+
+    return store.load(key, loader)
+
+
+def recording(student_id, test_id):
+    """Hold while writing a violation and calling record(), so a rebuild cannot interleave."""
+    return get_store().lock(_key(student_id, test_id))
+
+
+def record(student_id, test_id, details, score, timestamp=None):
+    """Fold a newly written violation into the cached state (no-op when not cached)."""
+    get_store().apply(_key(student_id, test_id), details, score, timestamp)
+
+
+def reset(student_id, test_id):
+    """Forget the cached state, e.g. after the student's violations were cleared."""
+    get_store().delete(_key(student_id, test_id))
+
+
+def stats():
+    store = get_store()
+    data = {
+        "backend": type(store).__name__,
+        "hits": _hits,
+        "misses": _misses,
+    }
+    if isinstance(store, LocalStateStore):
+        data["entries"] = len(store)
+    return data
+
+
+metrics.register("session_state", stats)
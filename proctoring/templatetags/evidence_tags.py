@@ -0,0 +1,14 @@
+"""
+Template filters for evidence images.
+"""
+from django import template
+
+from proctoring import evidence
+
+register = template.Library()
+
+
+@register.filter
+def evidence_src(value):
+    """<img src> for a log image: the evidence URL, or a data: URI for rows still holding base64."""
+    return evidence.url_for(value)
@@ -1,3 +1,203 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from accounts.models import User
+from django.db.models import Count, Min, Max, Sum
+
+from exams.models import ViolationLog
+from proctoring import archive, evidence, state
+from proctoring.models import ProctoringLog, ViolationSummary, WindowEstimationLog
+from proctoring.violations import JOURNAL_PREFIX, ViolationSink, replay_journals
+
+
+class JournalReplayTests(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        self.student = User.objects.create_user(email="student@example.com", password="pw", name="S",
+                                                user_type="student", user_image="")
+        self.directory = tempfile.mkdtemp()
+
+    def _seed(self, name, details):
+        record = {"student_id": self.student.pk, "test_id": "T1", "details": details, "category": 0,
+                  "score": 1, "evidence": None, "timestamp": timezone.now().isoformat()}
+        with open(os.path.join(self.directory, name), "w", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def test_journal_of_earlier_process_with_same_pid_is_replayed(self):
+        # A crashed worker whose pid the restarted worker got again
+        self._seed(f"{JOURNAL_PREFIX}{os.getpid()}.jsonl", "Tab Switch")
+        self._seed(f"{JOURNAL_PREFIX}{os.getpid()}.jsonl.1.seg", "Multiple Faces")
+        sink = ViolationSink(journal_dir=self.directory)
+        self.assertEqual(replay_journals(self.directory), 2)
+
+        sink.add(ViolationLog(student_id=self.student.pk, test_id="T1", details="No Face",
+                              category=ViolationLog.category_for("No Face"), score=1, timestamp=timezone.now()))
+        sink.flush()
+        sink.close()
+        self.assertCountEqual(ViolationLog.objects.filter(test_id="T1").values_list("details", flat=True),
+                              ["Tab Switch", "Multiple Faces", "No Face"])
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_open_journal_is_not_replayed(self):
+        sink = ViolationSink(journal_dir=self.directory)
+        sink.add(ViolationLog(student_id=self.student.pk, test_id="T1", details="No Face",
+                              category=ViolationLog.category_for("No Face"), score=1, timestamp=timezone.now()))
+        self.assertEqual(replay_journals(self.directory), 0)
+        sink.flush()
+        sink.close()
+        self.assertEqual(ViolationLog.objects.filter(test_id="T1").count(), 1)
+
+
+class StateRebuildTests(TestCase):
+    databases = "__all__"
+
+    def _rebuild_racing(self, record):
+        """A rebuild that takes the given database state and sees record() run meanwhile."""
+        def rebuild(student_id, test_id, before=None):
+            self.before = before
+            thread = threading.Thread(target=record)
+            thread.start()
+            thread.join(0.2)
+            self.threads.append(thread)
+            return state.SessionState(score=5, flags=1, total=1)
+        self.threads = []
+        return rebuild
+
+    @override_settings(PROCTORING_VIOLATION_WRITE_BEHIND=False)
+    def test_local_record_during_rebuild_is_kept(self):
+        def record():
+            with state.recording(1, "T1"):
+                state.record(1, "T1", "Tab Switch", 2)
+
+        with mock.patch.object(state, "_store", state.LocalStateStore()), \
+                mock.patch.object(state, "rebuild", self._rebuild_racing(record)):
+            self.assertEqual(state.get_state(1, "T1").score, 5)
+            self.threads[0].join()
+            self.assertEqual(state.get_state(1, "T1").score, 7)
+
+    @override_settings(PROCTORING_VIOLATION_WRITE_BEHIND=False)
+    def test_local_state_rereads_other_workers_violations_after_ttl(self):
+        totals = iter([5, 9])
+
+        def rebuild(student_id, test_id, before=None):
+            # The database total grows as another worker logs violations
+            return state.SessionState(score=next(totals), flags=1, total=1)
+
+        with mock.patch.object(state, "_store", state.LocalStateStore(ttl=0.05)), \
+                mock.patch.object(state, "rebuild", rebuild):
+            self.assertEqual(state.get_state(1, "T1").score, 5)
+            self.assertEqual(state.get_state(1, "T1").score, 5)
+            time.sleep(0.1)
+            self.assertEqual(state.get_state(1, "T1").score, 9)
+
+    @override_settings(PROCTORING_VIOLATION_WRITE_BEHIND=False)
+    def test_cache_counts_unflushed_and_concurrent_violations_once(self):
+        store = state.CacheStateStore()
+        store.cache.clear()
+        now = timezone.now()
+        # Already in the database (before the cutoff): counted by the rebuild only
+        store.apply("1:T1", "Tab Switch", 5, now - timedelta(minutes=5))
+        # Still buffered by another worker
+        store.apply("1:T1", "Tab Switch", 3, now)
+
+        def record():
+            state.record(1, "T1", "Face Re-detected", 4, timezone.now())
+
+        with mock.patch.object(state, "_store", store), \
+                mock.patch.object(state, "rebuild", self._rebuild_racing(record)):
+            state.get_state(1, "T1")
+            self.threads[0].join()
+            self.assertLess(self.before, now)
+            current = state.get_state(1, "T1")
+        self.assertEqual((current.score, current.flags, current.total, current.face_baseline), (12, 2, 3, True))
+
+
+class EvidencePurgeTests(TestCase):
+    databases = "__all__"
+
+    def test_reused_file_gets_a_new_grace_period(self):
+        frame = BytesIO()
+        Image.new("RGB", (8, 8)).save(frame, "JPEG")
+        with override_settings(PROCTORING_EVIDENCE_DIR=tempfile.mkdtemp()):
+            path = evidence.path_for(evidence.name_of(evidence.save(frame.getvalue())))
+            # Stored two hours ago and no longer referenced by any row
+            old = time.time() - 7200
+            os.utime(path, (old, old))
+            # The same frame again, its row still buffered
+            evidence.save(frame.getvalue())
+            self.assertEqual(evidence.purge(days=30)[1], 0)
+            self.assertTrue(path.exists())
+
+
+class CompactTests(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        self.students = [User.objects.create_user(email=f"s{i}@example.com", password="pw", name=f"S{i}",
+                                                  user_type="student", user_image="") for i in range(2)]
+        start = timezone.now() - timedelta(days=30)
+        details = ["Tab Switch", "Mobile Phone Detected", "Tab Switch", "Multiple Persons", "Tab Switch"]
+        for i, text in enumerate(details):
+            student = self.students[i % 2]
+            at = start + timedelta(minutes=i)
+            ViolationLog.objects.create(student=student, test_id="OLD", details=text, score=i + 1, timestamp=at,
+                                        category=ViolationLog.category_for(text))
+            ProctoringLog.objects.create(email=student.email, name=student.name, test_id="OLD", img_log="",
+                                         user_movements_updown=0, user_movements_lr=0, user_movements_eyes=0,
+                                         phone_detection=0, person_status=1, uid=student)
+            WindowEstimationLog.objects.create(email=student.email, test_id="OLD", name=student.name,
+                                               window_event=1, uid=student)
+        # Distinct times, so the archive and the table sort the same way
+        for model, field in ((ProctoringLog, "log_time"), (WindowEstimationLog, "transaction_log")):
+            for i, pk in enumerate(model.objects.order_by("pk").values_list("pk", flat=True)):
+                model.objects.filter(pk=pk).update(**{field: start + timedelta(minutes=i)})
+        override = override_settings(PROCTORING_ARCHIVE_DIR=tempfile.mkdtemp(),
+                                     PROCTORING_VIOLATION_WRITE_BEHIND=False)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def _rows(self):
+        return {model: [tuple(row.__dict__[f.attname] for f in model._meta.concrete_fields)
+                        for row in archive.rows_for(model, "OLD")]
+                for model in archive.ARCHIVED_MODELS}
+
+    def _totals(self):
+        return sorted(ViolationLog.objects.filter(test_id="OLD").values_list("student_id", "category")
+                      .annotate(n=Count("vid"), score=Sum("score"), first=Min("timestamp"), last=Max("timestamp"))
+                      .order_by())
+
+    def _summaries(self):
+        return sorted(ViolationSummary.objects.filter(test_id="OLD")
+                      .values_list("student_id", "category", "count", "score", "first_at", "last_at"))
+
+    def test_compact_moves_rows_to_the_archive(self):
+        rows, totals = self._rows(), self._totals()
+        moved = archive.compact("OLD")
+        self.assertEqual(moved, {model._meta.db_table: 5 for model in archive.ARCHIVED_MODELS})
+        for model in archive.ARCHIVED_MODELS:
+            self.assertTrue(archive.path_for(model, "OLD").exists())
+            self.assertFalse(model.objects.filter(test_id="OLD").exists())
+        self.assertEqual(self._summaries(), totals)
+        self.assertEqual(self._rows(), rows)
+
+    def test_rerun_after_crash_does_not_duplicate(self):
+        rows, totals = self._rows(), self._totals()
+        # Archive written and summaries committed, then the process died before deleting
+        with mock.patch("django.db.models.query.QuerySet.delete", return_value=(0, {})):
+            archive.compact("OLD")
+        self.assertEqual(ViolationLog.objects.filter(test_id="OLD").count(), 5)
+        archive.compact("OLD")
+        self.assertEqual(self._summaries(), totals)
+        self.assertEqual(self._rows(), rows)
+        self.assertEqual(len(archive.read(ViolationLog, "OLD")), 5)
@@ -5,5 +5,7 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
-    # Add proctoring URLs here
+    path('metrics/', views.metrics_view, name='proctoring_metrics'),
+    path('evidence/<str:name>', views.evidence_view, name='proctoring_evidence'),
+    path('live/<str:test_id>/stream/', views.live_stream_view, name='proctoring_live_stream'),
 ]
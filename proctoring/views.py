@@ -1,3 +1,130 @@
-from django.shortcuts import render
+"""
+Views for proctoring app.
+"""
+import json
+import time
 
-# Create your views here.
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse,
+)
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+
+from exams.models import Teacher
+from . import evidence, live, metrics
+from .violations import flush_pending
+
+
+@login_required
+@require_GET
+def metrics_view(request):
+    """Per-process proctoring pipeline metrics (professors and staff only)."""
+    if request.user.user_type != "teacher" and not request.user.is_staff:
+        return JsonResponse({'error': 'Access denied'}, status=403)
+    return JsonResponse(metrics.snapshot())
+
+
+@login_required
+@require_GET
+def evidence_view(request, name):
+    """Serve a stored evidence image with ETag and byte-range support (professors and staff only)."""
+    if request.user.user_type != "teacher" and not request.user.is_staff:
+        return JsonResponse({'error': 'Access denied'}, status=403)
+    try:
+        path = evidence.path_for(name)
+        size = path.stat().st_size
+    except (ValueError, OSError):
+        raise Http404("Evidence not found")
+
+    # Stored files never change, so the content hash is a strong validator
+    etag = '"%s"' % name.split('.')[0]
+    headers = {
+        'ETag': etag,
+        'Cache-Control': 'private, max-age=31536000, immutable',
+        'Accept-Ranges': 'bytes',
+    }
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        content_type = evidence.CONTENT_TYPES[name.rsplit('.', 1)[1]]
+        try:
+            byte_range = evidence.parse_range(request.headers.get('Range'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if byte_range is None:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                evidence.iter_file(path, start, end - start + 1), status=206, content_type=content_type,
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(end - start + 1)
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _live_events(test_id, email=None):
+    """
+    Snapshot of the counters, then deltas as violations are published. The snapshot counts
+    rows logged up to a cutoff and only events after it are forwarded, so nothing is counted
+    twice; it is repeated every PROCTORING_LIVE_RESYNC seconds and after a dropped event.
+    The stream ends after PROCTORING_LIVE_STREAM_SECONDS and the browser reconnects, so a
+    WSGI worker thread is not held indefinitely.
+    """
+    resync = getattr(settings, 'PROCTORING_LIVE_RESYNC', 60)
+    keepalive = getattr(settings, 'PROCTORING_LIVE_KEEPALIVE', 15)
+    deadline = time.monotonic() + getattr(settings, 'PROCTORING_LIVE_STREAM_SECONDS', 300)
+    subscription = live.get_broker().subscribe(test_id)
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            flush_pending()
+            cutoff = timezone.now()
+            yield _sse('snapshot', live.counter_totals(test_id, email, until=cutoff))
+            cutoff = cutoff.timestamp()
+            resync_at = min(deadline, time.monotonic() + resync)
+            while True:
+                remaining = resync_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                events = subscription.get(timeout=min(keepalive, remaining))
+                if subscription.overflowed:
+                    break
+                events = [e for e in events if e['ts'] > cutoff and (email is None or e['email'] == email)]
+                if events:
+                    yield _sse('delta', events)
+                else:
+                    yield ": keepalive\n\n"
+            if time.monotonic() >= deadline:
+                return
+    finally:
+        subscription.close()
+
+
+@login_required
+@require_GET
+def live_stream_view(request, test_id):
+    """
+    Server-Sent Events stream of the live monitoring counters of a test (its professor only).
+    ?email= narrows the stream to one student.
+    """
+    if request.user.user_type != "teacher":
+        return JsonResponse({'error': 'Access denied'}, status=403)
+    if not Teacher.objects.filter(test_id=test_id, uid=request.user).exists():
+        return JsonResponse({'error': 'Test not found'}, status=404)
+    response = StreamingHttpResponse(
+        _live_events(test_id, request.GET.get('email') or None), content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: pass events through unbuffered
+    return response
@@ -0,0 +1,320 @@
+"""
+Single entry point for recording proctoring violations.
+Every writer goes through log_violation so the running session state stays in sync.
+
+Violations are buffered per process and written with bulk_create once
+PROCTORING_VIOLATION_BUFFER_SIZE rows are pending or PROCTORING_VIOLATION_FLUSH_INTERVAL
+seconds have passed, so a noisy frame costs one write transaction instead of five.
+Each buffered violation is first appended to a per-process JSONL journal under
+PROCTORING_VIOLATION_JOURNAL_DIR, named violations-<pid>-<nonce>.jsonl; journals left
+behind by a crashed process are replayed on the next start (or with
+`manage.py replay_violation_journal`). The nonce keeps a restarted worker that reuses
+a crashed worker's pid from appending to (and then dropping) the old journal.
+Delivery is at-least-once: a crash between the database commit and the journal
+cleanup can replay a batch twice.
+"""
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from exams.models import ViolationLog
+from . import evidence as evidence_store, live, metrics, state
+from .models import ViolationSummary
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_PREFIX = "violations-"
+
+# Journals opened by this process; replay_journals never touches them or their segments
+_open_journals = set()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+class Journal:
+    """Append-only JSONL file holding the violations not yet committed by this process."""
+
+    def __init__(self, directory, fsync=False):
+        self.directory = str(directory)
+        self.fsync = fsync
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{JOURNAL_PREFIX}{os.getpid()}-{uuid.uuid4().hex[:12]}.jsonl"
+        self.path = os.path.join(self.directory, name)
+        self._file = open(self.path, "a", encoding="utf-8")
+        _open_journals.add(name)
+
+    def append(self, record):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def rotate(self):
+        """Close the current file and move it aside as a segment; returns the segment path."""
+        self._file.close()
+        segment = f"{self.path}.{time.monotonic_ns()}.seg"
+        os.replace(self.path, segment)
+        self._file = open(self.path, "a", encoding="utf-8")
+        return segment
+
+    def close(self):
+        self._file.close()
+        os.remove(self.path)
+        _open_journals.discard(os.path.basename(self.path))
+
+    @staticmethod
+    def read(path):
+        records = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # A torn final line from a crash mid-write
+                    logger.warning("Skipping unreadable journal line in %s", path)
+        return records
+
+
+def _to_record(violation):
+    return {
+        "student_id": violation.student_id,
+        "test_id": violation.test_id,
+        "details": violation.details,
+        "category": int(violation.category),
+        "score": violation.score,
+        "evidence": violation.evidence,
+        "timestamp": violation.timestamp.isoformat(),
+    }
+
+
+def _from_record(record):
+    return ViolationLog(
+        student_id=record["student_id"],
+        test_id=record["test_id"],
+        details=record["details"],
+        category=record.get("category", ViolationLog.category_for(record["details"])),
+        score=record["score"],
+        evidence=record.get("evidence"),
+        timestamp=parse_datetime(record["timestamp"]),
+    )
+
+
+class ViolationSink:
+    """Per-process write-behind buffer for ViolationLog rows."""
+
+    def __init__(self, max_buffer=None, flush_interval=None, journal_dir=None):
+        self.max_buffer = max_buffer or getattr(settings, "PROCTORING_VIOLATION_BUFFER_SIZE", 50)
+        self.flush_interval = flush_interval or getattr(settings, "PROCTORING_VIOLATION_FLUSH_INTERVAL", 1.0)
+        journal_dir = journal_dir or getattr(settings, "PROCTORING_VIOLATION_JOURNAL_DIR", None)
+        self.journal = Journal(journal_dir, getattr(settings, "PROCTORING_VIOLATION_JOURNAL_FSYNC", False)) \
+            if journal_dir else None
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._flushed = 0
+        self._failures = 0
+        self._flush_time = metrics.RollingWindow()
+        self._batch_sizes = metrics.RollingWindow()
+
+    def start(self):
+        if self._thread is None:
+            if self.journal:
+                replay_journals(self.journal.directory)
+            self._thread = threading.Thread(target=self._run, name="violation-sink", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def add(self, violation):
+        with self._lock:
+            if self.journal:
+                self.journal.append(_to_record(violation))
+            self._buffer.append(violation)
+            full = len(self._buffer) >= self.max_buffer
+        if full:
+            self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception as e:
+                logger.error("Violation flush failed: %s", e)
+
+    def flush(self):
+        """Write every buffered violation now. Safe to call from any thread."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._buffer:
+                    return 0
+                batch, self._buffer = self._buffer, []
+                segment = self.journal.rotate() if self.journal else None
+            started = time.monotonic()
+            try:
+                ViolationLog.objects.bulk_create(batch)
+            except Exception:
+                self._failures += 1
+                with self._lock:
+                    # Keep the rows (and their journal lines) for the next attempt
+                    self._buffer[:0] = batch
+                    if self.journal:
+                        for violation in batch:
+                            self.journal.append(_to_record(violation))
+                if segment:
+                    os.remove(segment)
+                raise
+            if segment:
+                os.remove(segment)
+            self._flushed += len(batch)
+            self._flush_time.add(time.monotonic() - started)
+            self._batch_sizes.add(len(batch))
+            return len(batch)
+
+    def close(self):
+        """Flush on shutdown and drop the (now empty) journal file."""
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error("Violation flush at shutdown failed, journal kept: %s", e)
+            return
+        if self.journal:
+            with self._lock:
+                self.journal.close()
+                self.journal = None
+
+    def stats(self):
+        return {
+            "buffered": len(self._buffer),
+            "flushed": self._flushed,
+            "failures": self._failures,
+            "mean_batch_size": round(self._batch_sizes.mean(), 2),
+            "flush_ms": self._flush_time.summary(scale=1000),
+            "journal": self.journal.path if self.journal else None,
+        }
+
+
+def replay_journals(directory):
+    """
+    Commit violations from journals whose process is gone; returns the number of rows written.
+    Journals with this process's pid but not opened by it were left by an earlier process
+    that had the same pid, and are replayed too.
+    """
+    written = 0
+    paths = glob.glob(os.path.join(str(directory), f"{JOURNAL_PREFIX}*.jsonl*"))
+    for path in paths:
+        name = os.path.basename(path)
+        if ".replaying-" in name or any(name.startswith(own) for own in _open_journals):
+            continue
+        try:
+            # violations-<pid>-<nonce>.jsonl, or violations-<pid>.jsonl from older versions
+            pid = int(name[len(JOURNAL_PREFIX):].split(".", 1)[0].split("-", 1)[0])
+        except ValueError:
+            continue
+        if pid != os.getpid() and _pid_alive(pid):
+            continue
+        claimed = f"{path}.replaying-{os.getpid()}"
+        try:
+            # Only one process wins the rename, so a journal is replayed once
+            os.rename(path, claimed)
+        except OSError:
+            continue
+        rows = [_from_record(r) for r in Journal.read(claimed)]
+        if rows:
+            ViolationLog.objects.bulk_create(rows)
+            written += len(rows)
+            logger.warning("Replayed %d violations from %s", len(rows), name)
+        os.remove(claimed)
+    return written
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_sink():
+    """Return this process's ViolationSink, or None when write-behind is disabled."""
+    global _sink
+    if not getattr(settings, "PROCTORING_VIOLATION_WRITE_BEHIND", True):
+        return None
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                sink = ViolationSink()
+                sink.start()
+                metrics.register("violation_sink", sink.stats)
+                _sink = sink
+    return _sink
+
+
+def flush_pending():
+    """Make buffered violations visible to database reads (no-op without write-behind)."""
+    sink = get_sink()
+    if sink is not None:
+        sink.flush()
+
+
+def log_violation(student, test_id, details, score=0, evidence=None):
+    """
+    Record a violation (buffered when write-behind is on), fold it into the running state
+    and publish it to the test's live monitoring stream.
+    Image evidence (BGR array, PIL image or encoded bytes) goes to the evidence store and
+    the row keeps its reference; strings are stored as given.
+    """
+    if evidence is not None and not isinstance(evidence, str):
+        try:
+            evidence = evidence_store.save(evidence)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not store violation evidence: %s", e)
+            evidence = None
+    violation = ViolationLog(
+        student_id=student.pk,
+        test_id=test_id,
+        details=details,
+        category=ViolationLog.category_for(details),
+        score=score,
+        evidence=evidence,
+        timestamp=timezone.now(),
+    )
+    sink = get_sink()
+    with state.recording(student.pk, test_id):
+        if sink is not None:
+            sink.add(violation)
+        else:
+            violation.save()
+        state.record(student.pk, test_id, details, score, violation.timestamp)
+    live.publish_violation(student.email, test_id, violation.category, violation.timestamp)
+    return violation
+
+
+def clear_violations(student, test_id):
+    """Delete a student's violations for a test (fresh attempt) and reset the cached state."""
+    flush_pending()
+    ViolationLog.objects.filter(student=student, test_id=test_id).delete()
+    ViolationSummary.objects.filter(student=student, test_id=test_id).delete()
+    state.reset(student.pk, test_id)
+    live.publish_reset(student.email, test_id)
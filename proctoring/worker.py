@@ -0,0 +1,242 @@
+"""
+Standalone proctoring worker pool.
+
+`manage.py run_proctoring_worker` binds a Unix socket and forks
+PROCTORING_WORKER_PROCESSES inference processes that share it. Each process loads
+the detector once (see proctoring.detectors) and serves connections with one thread
+each, so frames from concurrent Django requests are still micro-batched by an
+InferenceBroker inside the worker.
+
+When PROCTORING_WORKER_SOCKET is set, Django request workers use WorkerClient
+instead of loading any model themselves; model memory and inference cores are then
+paid per worker pool rather than per gunicorn worker.
+
+Wire format, both directions: 4-byte header length, 4-byte payload length
+(big-endian), a JSON header, then the raw payload. A detect request carries the
+frame as a contiguous BGR uint8 array with its shape in the header.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+from . import metrics
+from .detectors import load_detector, to_bgr
+from .inference import Detection, InferenceBroker
+
+logger = logging.getLogger(__name__)
+
+_FRAME = struct.Struct("!II")
+
+
+class WorkerError(Exception):
+    """The worker pool could not be reached or failed to process a request."""
+
+
+def _recv_exact(conn, size):
+    chunks = []
+    while size:
+        chunk = conn.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_message(conn, header, payload=b""):
+    data = json.dumps(header).encode("utf-8")
+    conn.sendall(_FRAME.pack(len(data), len(payload)) + data)
+    if payload:
+        conn.sendall(payload)
+
+
+def recv_message(conn):
+    header_size, payload_size = _FRAME.unpack(_recv_exact(conn, _FRAME.size))
+    header = json.loads(_recv_exact(conn, header_size))
+    payload = _recv_exact(conn, payload_size) if payload_size else b""
+    return header, payload
+
+
+class WorkerClient:
+    """Drop-in replacement for InferenceBroker.detect that forwards frames to the worker pool."""
+
+    def __init__(self, socket_path, timeout=None):
+        self.socket_path = str(socket_path)
+        self.timeout = timeout or getattr(settings, "PROCTORING_WORKER_TIMEOUT", 10)
+        self._local = threading.local()
+        self._latency = metrics.RollingWindow()
+        self._errors = 0
+        metrics.register("worker_client", self.stats)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.settimeout(self.timeout)
+            conn.connect(self.socket_path)
+            self._local.conn = conn
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            conn.close()
+
+    def request(self, header, payload=b""):
+        """Send one request on this thread's connection, reconnecting once if it went stale."""
+        started = time.monotonic()
+        for attempt in (1, 2):
+            try:
+                conn = self._connection()
+                send_message(conn, header, payload)
+                response, _ = recv_message(conn)
+                break
+            except (OSError, ConnectionError) as e:
+                self._drop_connection()
+                if attempt == 2:
+                    self._errors += 1
+                    raise WorkerError(f"Proctoring worker unavailable at {self.socket_path}: {e}")
+        self._latency.add(time.monotonic() - started)
+        if not response.get("ok"):
+            self._errors += 1
+            raise WorkerError(response.get("error", "Worker request failed"))
+        return response
+
+    def detect(self, image, conf=0.4):
+        """Same contract as InferenceBroker.detect: list of Detection, or None when the worker has no model."""
+        frame = np.ascontiguousarray(to_bgr(image), dtype=np.uint8)
+        response = self.request({"op": "detect", "conf": conf, "shape": list(frame.shape)}, frame.tobytes())
+        detections = response.get("detections")
+        if detections is None:
+            return None
+        return [Detection(name, confidence) for name, confidence in detections]
+
+    def pressure(self):
+        """Load on the pool as seen by this client: recent round-trip latency over the target."""
+        target = getattr(settings, "PROCTORING_SAMPLING_TARGET_LATENCY_MS", 500) / 1000.0
+        return self._latency.mean(last=32) / target
+
+    def ping(self):
+        return self.request({"op": "ping"})
+
+    def stats(self):
+        return {
+            "socket": self.socket_path,
+            "errors": self._errors,
+            "latency_ms": self._latency.summary(scale=1000),
+        }
+
+
+class _WorkerProcess:
+    """One inference process: owns a detector and answers requests on the shared socket."""
+
+    def __init__(self, listener):
+        self.listener = listener
+        self.detector = load_detector()
+        self.broker = InferenceBroker(lambda: self.detector, name="worker")
+        logger.info("Proctoring worker %d ready (%s)", os.getpid(),
+                    self.detector.backend if self.detector else "no detector")
+
+    def serve_forever(self):
+        while True:
+            conn, _ = self.listener.accept()
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            while True:
+                try:
+                    header, payload = recv_message(conn)
+                except (ConnectionError, OSError):
+                    return
+                try:
+                    response = self._dispatch(header, payload)
+                except Exception as e:
+                    logger.error("Worker request failed: %s", e)
+                    response = {"ok": False, "error": str(e)}
+                try:
+                    send_message(conn, response)
+                except OSError:
+                    return
+
+    def _dispatch(self, header, payload):
+        op = header.get("op")
+        if op == "detect":
+            frame = np.frombuffer(payload, dtype=np.uint8).reshape(header["shape"])
+            detections = self.broker.detect(frame, conf=header.get("conf", 0.4))
+            return {
+                "ok": True,
+                "detections": None if detections is None else [list(d) for d in detections],
+            }
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid(), "stats": metrics.snapshot()}
+        raise ValueError(f"Unknown op: {op}")
+
+
+def _child_main(listener):
+    # The parent handles shutdown; children exit when it terminates them
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    _WorkerProcess(listener).serve_forever()
+
+
+class WorkerPool:
+    """Binds the socket, forks the inference processes and restarts any that die."""
+
+    def __init__(self, socket_path, processes, backlog=128):
+        self.socket_path = str(socket_path)
+        self.processes = max(1, int(processes))
+        self.backlog = backlog
+        self._children = []
+        self._stopping = False
+
+    def _bind(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        os.makedirs(os.path.dirname(self.socket_path) or ".", exist_ok=True)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        listener.listen(self.backlog)
+        return listener
+
+    def _spawn(self, context, listener):
+        process = context.Process(target=_child_main, args=(listener,), daemon=True)
+        process.start()
+        return process
+
+    def _stop(self, *args):
+        self._stopping = True
+
+    def serve_forever(self):
+        # fork keeps the listening socket shared between the children
+        context = multiprocessing.get_context("fork")
+        listener = self._bind()
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        try:
+            self._children = [self._spawn(context, listener) for _ in range(self.processes)]
+            while not self._stopping:
+                time.sleep(0.5)
+                for i, child in enumerate(self._children):
+                    if not child.is_alive() and not self._stopping:
+                        logger.warning("Proctoring worker %s exited (%s), restarting", child.pid, child.exitcode)
+                        self._children[i] = self._spawn(context, listener)
+        finally:
+            for child in self._children:
+                child.terminate()
+            for child in self._children:
+                child.join(5)
+            listener.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
@@ -9,3 +9,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'quizapp.settings')
 
 application = get_asgi_application()
+
+# Build and warm the face verification model now rather than on the first login
+from accounts import face_verification  # noqa: E402
+
+face_verification.warmup()
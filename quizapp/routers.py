@@ -0,0 +1,54 @@
+"""
+Database router that keeps proctoring telemetry apart from exam content.
+
+ViolationLog and the proctoring app's models (ProctoringLog, WindowEstimationLog) are
+write-heavy, append-only logs; they are read and written on the PROCTORING_LOG_DATABASE
+alias so their writes never hold the lock of the database that serves questions,
+answers and sessions. Everything else stays on 'default'. Log rows reference users by
+id only (no database constraint, no cascade), so the two can be separate files or
+servers. Deleting a user or a test therefore leaves its log rows behind until
+`manage.py compact_proctoring_logs` archives them. Create the log tables with
+`manage.py migrate --database proctoring` and copy existing rows with
+`manage.py move_proctoring_logs`.
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+LOG_APPS = {"proctoring"}
+LOG_MODELS = {("exams", "violationlog")}
+
+
+def log_database():
+    return getattr(settings, "PROCTORING_LOG_DATABASE", DEFAULT_DB_ALIAS)
+
+
+def is_log_model(app_label, model_name=None):
+    """True for telemetry models; without a model name, for apps made only of them."""
+    return app_label in LOG_APPS or (app_label, model_name) in LOG_MODELS
+
+
+class ProctoringLogRouter:
+
+    def _database(self, model):
+        if is_log_model(model._meta.app_label, model._meta.model_name):
+            return log_database()
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._database(model)
+
+    def db_for_write(self, model, **hints):
+        return self._database(model)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Log rows may point at users in the other database
+        if self._database(obj1) or self._database(obj2):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        log_db = log_database()
+        if log_db == DEFAULT_DB_ALIAS:
+            return None
+        # Data migrations without a model_name hint belong to the app's main database
+        return is_log_model(app_label, model_name) == (db == log_db)
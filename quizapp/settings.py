@@ -40,7 +40,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'accounts.middleware.LazySessionMiddleware',  # saves only changed sessions, see SESSION_REFRESH_INTERVAL
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -72,10 +72,22 @@ WSGI_APPLICATION = 'quizapp.wsgi.application'
 # Database
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'quizapp.sqlite',  # django.db.backends.sqlite3 + the SQLITE_* PRAGMAs below
         'NAME': BASE_DIR / 'quizapp.db',
-    }
+    },
+    # Proctoring telemetry (violation, proctoring and window logs), see quizapp/routers.py
+    'proctoring': {
+        'ENGINE': os.getenv('PROCTORING_LOG_DB_ENGINE', 'quizapp.sqlite'),
+        'NAME': os.getenv('PROCTORING_LOG_DB_NAME', str(BASE_DIR / 'proctoring_logs.db')),
+        'USER': os.getenv('PROCTORING_LOG_DB_USER', ''),
+        'PASSWORD': os.getenv('PROCTORING_LOG_DB_PASSWORD', ''),
+        'HOST': os.getenv('PROCTORING_LOG_DB_HOST', ''),
+        'PORT': os.getenv('PROCTORING_LOG_DB_PORT', ''),
+    },
 }
+# Alias holding the log models; 'default' puts them back in the main database
+PROCTORING_LOG_DATABASE = os.getenv('PROCTORING_LOG_DATABASE', 'proctoring')
+DATABASE_ROUTERS = ['quizapp.routers.ProctoringLogRouter']
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -125,7 +137,13 @@ DEFAULT_FROM_EMAIL = 'nandiwalebalu738@gmail.com'
 # Session Configuration (use Lax so session works over HTTP; use None+Secure only with HTTPS)
 SESSION_COOKIE_SAMESITE = 'Lax'
 SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS
-SESSION_SAVE_EVERY_REQUEST = True  # Ensure session is saved on each request (e.g. after registration POST)
+# Sessions are saved only when modified; the expiry of a session in use is extended at most once per
+# SESSION_REFRESH_INTERVAL seconds (accounts/middleware.py) instead of rewriting it on every request
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_REFRESH_INTERVAL = int(os.getenv('SESSION_REFRESH_INTERVAL', '3600'))
+# 'django.contrib.sessions.backends.cached_db' serves session reads from the cache during exams.
+# signed_cookies does not fit: registration keeps the face photo in the session (4 KB cookie limit)
+SESSION_ENGINE = os.getenv('SESSION_ENGINE', 'django.contrib.sessions.backends.db')
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False
 SESSION_COOKIE_AGE = 86400  # 24 hours
 
@@ -143,4 +161,117 @@ GROQ_API_KEY = os.getenv('GROQ_API_KEY', '')  # Set GROQ_API_KEY in .env or envi
 GROQ_API_URL = os.getenv('GROQ_API_URL', 'https://api.groq.ai/v1/generate')
 
 # Face verification settings
-FACE_VERIFICATION_ENABLED = os.getenv('FACE_VERIFICATION_ENABLED', 'True') == 'True' 
+FACE_VERIFICATION_ENABLED = os.getenv('FACE_VERIFICATION_ENABLED', 'True') == 'True'
+
+# Proctoring inference: frames from concurrent requests are micro-batched into one forward pass
+PROCTORING_BATCH_MAX_SIZE = int(os.getenv('PROCTORING_BATCH_MAX_SIZE', '8'))  # 1 disables batching
+PROCTORING_BATCH_MAX_WAIT_MS = float(os.getenv('PROCTORING_BATCH_MAX_WAIT_MS', '20'))
+PROCTORING_INFERENCE_TIMEOUT = float(os.getenv('PROCTORING_INFERENCE_TIMEOUT', '10'))  # seconds
+
+# Running violation totals per student/test: 'local' (in-process LRU) or 'cache' (shared Django cache)
+PROCTORING_STATE_BACKEND = os.getenv('PROCTORING_STATE_BACKEND', 'local')
+PROCTORING_STATE_CACHE_ALIAS = os.getenv('PROCTORING_STATE_CACHE_ALIAS', 'default')
+PROCTORING_STATE_MAX_ENTRIES = int(os.getenv('PROCTORING_STATE_MAX_ENTRIES', '5000'))
+# 'local' entries are re-read from the database after this many seconds, so violations logged by
+# other workers reach the termination check ('cache' needs a shared CACHES backend, e.g. Redis)
+PROCTORING_STATE_LOCAL_TTL = float(os.getenv('PROCTORING_STATE_LOCAL_TTL', '5'))
+
+# Binary frame upload from the exam pages (canvas.toBlob type and quality 0-1)
+PROCTORING_FRAME_TYPE = os.getenv('PROCTORING_FRAME_TYPE', 'image/jpeg')
+PROCTORING_FRAME_QUALITY = float(os.getenv('PROCTORING_FRAME_QUALITY', '0.7'))
+
+# Write-behind violation logging: buffered per process, flushed with bulk_create, journaled for crash recovery
+PROCTORING_VIOLATION_WRITE_BEHIND = os.getenv('PROCTORING_VIOLATION_WRITE_BEHIND', 'True') == 'True'
+PROCTORING_VIOLATION_BUFFER_SIZE = int(os.getenv('PROCTORING_VIOLATION_BUFFER_SIZE', '50'))
+PROCTORING_VIOLATION_FLUSH_INTERVAL = float(os.getenv('PROCTORING_VIOLATION_FLUSH_INTERVAL', '1.0'))  # seconds
+PROCTORING_VIOLATION_JOURNAL_DIR = os.getenv('PROCTORING_VIOLATION_JOURNAL_DIR', str(BASE_DIR / 'journal'))
+PROCTORING_VIOLATION_JOURNAL_FSYNC = os.getenv('PROCTORING_VIOLATION_JOURNAL_FSYNC', 'False') == 'True'
+
+# Object detector backend: 'auto' (ONNX if exported, else ultralytics), 'onnx', 'openvino' or 'ultralytics'
+PROCTORING_DETECTOR_BACKEND = os.getenv('PROCTORING_DETECTOR_BACKEND', 'auto')
+PROCTORING_DETECTOR_ONNX_PATH = os.getenv('PROCTORING_DETECTOR_ONNX_PATH', str(BASE_DIR / 'models' / 'yolov8n.onnx'))
+PROCTORING_DETECTOR_INT8 = os.getenv('PROCTORING_DETECTOR_INT8', 'False') == 'True'  # use yolov8n.int8.onnx
+PROCTORING_DETECTOR_THREADS = int(os.getenv('PROCTORING_DETECTOR_THREADS', '0'))  # intra-op threads, 0 = runtime default
+PROCTORING_DETECTOR_WARMUP = os.getenv('PROCTORING_DETECTOR_WARMUP', 'True') == 'True'
+
+# Proctoring worker pool (manage.py run_proctoring_worker). When the socket is set, web workers
+# forward frames to the pool over IPC instead of loading the detector themselves.
+PROCTORING_WORKER_SOCKET = os.getenv('PROCTORING_WORKER_SOCKET', '')
+PROCTORING_WORKER_PROCESSES = int(os.getenv('PROCTORING_WORKER_PROCESSES', '2'))
+PROCTORING_WORKER_TIMEOUT = float(os.getenv('PROCTORING_WORKER_TIMEOUT', '10'))  # seconds
+
+# Skip inference on static scenes: reuse the last detections while the downscaled frame differs by
+# less than the threshold (mean abs diff, 0-255), forcing a fresh inference after max staleness
+PROCTORING_FRAME_CACHE_ENABLED = os.getenv('PROCTORING_FRAME_CACHE_ENABLED', 'True') == 'True'
+PROCTORING_FRAME_CHANGE_THRESHOLD = float(os.getenv('PROCTORING_FRAME_CHANGE_THRESHOLD', '6.0'))
+PROCTORING_FRAME_MAX_STALENESS = float(os.getenv('PROCTORING_FRAME_MAX_STALENESS', '10'))  # seconds
+
+# Server-driven frame sampling (next_interval_ms in video feed responses), per Teacher.proctoring_type.
+# Keys: min_ms, base_ms, max_ms, clean_step, alert_window_s (see proctoring/sampling.py)
+PROCTORING_SAMPLING_POLICIES = {
+    0: {'min_ms': 1000, 'base_ms': 3000, 'max_ms': 10000},  # AI auto-proctoring
+    1: {'min_ms': 2000, 'base_ms': 5000, 'max_ms': 15000},  # Live professor monitoring
+}
+PROCTORING_SAMPLING_TARGET_LATENCY_MS = int(os.getenv('PROCTORING_SAMPLING_TARGET_LATENCY_MS', '500'))
+PROCTORING_SAMPLING_OVERLOAD_BACKOFF = float(os.getenv('PROCTORING_SAMPLING_OVERLOAD_BACKOFF', '15'))  # seconds
+
+# Cosine distance threshold for VGG-Face embeddings (DeepFace's default for this model/metric)
+FACE_VERIFICATION_THRESHOLD = float(os.getenv('FACE_VERIFICATION_THRESHOLD', '0.40'))
+# Face verification model: built once per process and warmed up at startup (wsgi/asgi);
+# at most CONCURRENCY embeddings run at once, further logins wait up to QUEUE_TIMEOUT seconds
+FACE_VERIFICATION_WARMUP = os.getenv('FACE_VERIFICATION_WARMUP', 'True') == 'True'
+FACE_VERIFICATION_CONCURRENCY = int(os.getenv('FACE_VERIFICATION_CONCURRENCY', '2'))
+FACE_VERIFICATION_QUEUE_TIMEOUT = float(os.getenv('FACE_VERIFICATION_QUEUE_TIMEOUT', '30'))
+
+# request.user is loaded with only the columns the request path needs (accounts/backends.py)
+AUTHENTICATION_BACKENDS = ['accounts.backends.RequestUserBackend']
+
+# Evidence images (violation/proctoring log frames) are stored as files, content-addressed by
+# SHA-256; log rows keep only the reference. See proctoring/evidence.py
+PROCTORING_EVIDENCE_DIR = os.getenv('PROCTORING_EVIDENCE_DIR', str(MEDIA_ROOT / 'evidence'))
+PROCTORING_EVIDENCE_FORMAT = os.getenv('PROCTORING_EVIDENCE_FORMAT', 'jpeg')  # 'jpeg' or 'webp'
+PROCTORING_EVIDENCE_QUALITY = int(os.getenv('PROCTORING_EVIDENCE_QUALITY', '80'))
+PROCTORING_EVIDENCE_RETENTION_DAYS = int(os.getenv('PROCTORING_EVIDENCE_RETENTION_DAYS', '90'))  # manage.py purge_evidence
+
+# Live monitoring stream (proctoring/live.py): SSE snapshot + deltas per test. Backend 'local'
+# (in-process pub/sub) or 'cache' (relayed through a shared Django cache between workers)
+PROCTORING_LIVE_BACKEND = os.getenv('PROCTORING_LIVE_BACKEND', 'local')
+PROCTORING_LIVE_CACHE_ALIAS = os.getenv('PROCTORING_LIVE_CACHE_ALIAS', 'default')
+PROCTORING_LIVE_RESYNC = float(os.getenv('PROCTORING_LIVE_RESYNC', '60'))  # seconds between full snapshots
+PROCTORING_LIVE_STREAM_SECONDS = float(os.getenv('PROCTORING_LIVE_STREAM_SECONDS', '300'))  # then the browser reconnects
+
+# Shared per-process copy of each objective test's questions for the exam pages (exams/questions.py).
+# Edits replace a version token in this cache alias; use a shared cache so every worker sees them at once
+EXAMS_QUESTION_CACHE_ALIAS = os.getenv('EXAMS_QUESTION_CACHE_ALIAS', 'default')
+EXAMS_QUESTION_CACHE_TTL = float(os.getenv('EXAMS_QUESTION_CACHE_TTL', '300'))  # seconds, bounds staleness otherwise
+EXAMS_QUESTION_CACHE_MAX_TESTS = int(os.getenv('EXAMS_QUESTION_CACHE_MAX_TESTS', '256'))
+
+# Single-page exam delivery (exam_api_start_view / exam_api_sync_view): questions load once and
+# answers are synced in batches, each stamped with the client time so replays are idempotent
+EXAMS_SHUFFLE_QUESTIONS = os.getenv('EXAMS_SHUFFLE_QUESTIONS', 'False') == 'True'  # per-student order
+EXAMS_SYNC_INTERVAL_MS = int(os.getenv('EXAMS_SYNC_INTERVAL_MS', '15000'))
+EXAMS_SYNC_MAX_ANSWERS = int(os.getenv('EXAMS_SYNC_MAX_ANSWERS', '500'))  # per sync request
+
+# Exam time-left heartbeat (exams/heartbeat.py): server-side deadline per attempt in a fast store,
+# StudentTestInfo.time_left checkpointed at most once per interval and on finish. Backend 'local' or 'cache'
+# ('local' entries are per process: use 'cache' when several workers serve the same students)
+EXAMS_HEARTBEAT_BACKEND = os.getenv('EXAMS_HEARTBEAT_BACKEND', 'local')
+EXAMS_HEARTBEAT_CACHE_ALIAS = os.getenv('EXAMS_HEARTBEAT_CACHE_ALIAS', 'default')
+EXAMS_HEARTBEAT_CHECKPOINT_INTERVAL = float(os.getenv('EXAMS_HEARTBEAT_CHECKPOINT_INTERVAL', '60'))  # seconds
+
+# SQLite tuning (quizapp/sqlite/base.py), applied to every new connection
+SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'wal')
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'normal')
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))  # wait for the write lock
+SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', '20000'))
+SQLITE_MMAP_SIZE_MB = int(os.getenv('SQLITE_MMAP_SIZE_MB', '256'))
+# 'IMMEDIATE' takes the write lock when an atomic block starts, so it waits for it instead of failing
+# when a read-then-write transaction cannot upgrade its lock (manage.py benchmark_sqlite_writers)
+SQLITE_TRANSACTION_MODE = os.getenv('SQLITE_TRANSACTION_MODE', 'IMMEDIATE')
+SQLITE_CHECKPOINT_INTERVAL = float(os.getenv('SQLITE_CHECKPOINT_INTERVAL', '300'))  # seconds, 0 disables
+SQLITE_OPTIMIZE_INTERVAL = float(os.getenv('SQLITE_OPTIMIZE_INTERVAL', '3600'))  # seconds, 0 disables
+
+# Closed tests' proctoring logs are rolled up and moved to per-test gzipped JSONL archives
+# (proctoring/archive.py, manage.py compact_proctoring_logs) so the log tables only hold live tests
+PROCTORING_ARCHIVE_DIR = os.getenv('PROCTORING_ARCHIVE_DIR', str(BASE_DIR / 'archive'))
+PROCTORING_ARCHIVE_AFTER_DAYS = int(os.getenv('PROCTORING_ARCHIVE_AFTER_DAYS', '7'))  # after the test's end time
@@ -0,0 +1 @@
+# SQLite database backend with production PRAGMAs (see base.py)
@@ -0,0 +1,132 @@
+"""
+SQLite backend tuned for concurrent exam traffic (ENGINE 'quizapp.sqlite').
+
+Every new connection gets the PRAGMAs built by pragma_statements() from the SQLITE_*
+settings: WAL journaling so readers do not block the writer, a busy timeout so
+writers wait for the lock instead of failing with "database is locked",
+synchronous=NORMAL (durable at WAL checkpoints, safe against corruption), and a
+larger page cache and mmap window. SQLITE_TRANSACTION_MODE = 'IMMEDIATE' makes
+atomic blocks take the write lock up front; a deferred transaction that reads and then
+writes cannot wait for the lock and fails at once when another writer got in between.
+
+A per-process maintenance thread runs PRAGMA wal_checkpoint(PASSIVE) every
+SQLITE_CHECKPOINT_INTERVAL seconds and PRAGMA optimize every SQLITE_OPTIMIZE_INTERVAL
+seconds on each file database using this backend (0 disables either).
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.sqlite3 import base
+
+logger = logging.getLogger(__name__)
+
+TRANSACTION_MODES = ("DEFERRED", "IMMEDIATE", "EXCLUSIVE")
+
+
+def pragma_statements():
+    """PRAGMAs applied to each new connection, from the SQLITE_* settings."""
+    statements = [
+        f"PRAGMA busy_timeout = {int(getattr(settings, 'SQLITE_BUSY_TIMEOUT_MS', 5000))}",
+        f"PRAGMA journal_mode = {getattr(settings, 'SQLITE_JOURNAL_MODE', 'wal')}",
+        f"PRAGMA synchronous = {getattr(settings, 'SQLITE_SYNCHRONOUS', 'normal')}",
+        # Negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size = -{int(getattr(settings, 'SQLITE_CACHE_SIZE_KB', 20000))}",
+        f"PRAGMA mmap_size = {int(getattr(settings, 'SQLITE_MMAP_SIZE_MB', 256)) * 1024 * 1024}",
+        "PRAGMA temp_store = memory",
+    ]
+    return statements
+
+
+class Maintenance:
+    """Background WAL checkpoints and PRAGMA optimize for the registered aliases."""
+
+    def __init__(self):
+        self.aliases = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.checkpoints = 0
+        self.optimizes = 0
+        self.failures = 0
+        self.last_checkpoint = None  # (busy, wal frames, frames checkpointed)
+
+    def register(self, alias):
+        checkpoint = getattr(settings, "SQLITE_CHECKPOINT_INTERVAL", 300)
+        optimize = getattr(settings, "SQLITE_OPTIMIZE_INTERVAL", 3600)
+        if not checkpoint and not optimize:
+            return
+        with self._lock:
+            self.aliases.add(alias)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, args=(checkpoint, optimize),
+                                                name="sqlite-maintenance", daemon=True)
+                self._thread.start()
+
+    def _run(self, checkpoint, optimize):
+        tick = min(interval for interval in (checkpoint, optimize) if interval)
+        next_checkpoint = time.monotonic() + (checkpoint or float("inf"))
+        next_optimize = time.monotonic() + (optimize or float("inf"))
+        while True:
+            time.sleep(tick)
+            now = time.monotonic()
+            statements = []
+            if now >= next_checkpoint:
+                statements.append("PRAGMA wal_checkpoint(PASSIVE)")
+                next_checkpoint = now + checkpoint
+            if now >= next_optimize:
+                statements.append("PRAGMA optimize")
+                next_optimize = now + optimize
+            with self._lock:
+                aliases = list(self.aliases)
+            for alias in aliases:
+                self.run(alias, statements)
+
+    def run(self, alias, statements):
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+                    if "wal_checkpoint" in statement:
+                        self.last_checkpoint = cursor.fetchone()
+                        self.checkpoints += 1
+                    else:
+                        self.optimizes += 1
+        except Exception as e:
+            self.failures += 1
+            logger.warning("SQLite maintenance on %s failed: %s", alias, e)
+        finally:
+            # This thread's connection is only needed for the round
+            connection.close()
+
+    def stats(self):
+        return {
+            "aliases": sorted(self.aliases),
+            "checkpoints": self.checkpoints,
+            "optimizes": self.optimizes,
+            "failures": self.failures,
+            "last_checkpoint": self.last_checkpoint,
+        }
+
+
+# Reported on the proctoring metrics page (see ProctoringConfig.ready)
+maintenance = Maintenance()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for statement in pragma_statements():
+            conn.execute(statement)
+        if not self.is_in_memory_db():
+            maintenance.register(self.alias)
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = str(getattr(settings, "SQLITE_TRANSACTION_MODE", "DEFERRED")).upper()
+        if mode not in TRANSACTION_MODES:
+            mode = "DEFERRED"
+        self.cursor().execute(f"BEGIN {mode}")
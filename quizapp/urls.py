@@ -8,6 +8,9 @@ from django.conf.urls.static import static
 from exams.views import (
     give_test_view,
     give_test_exam_view,
+    exam_api_start_view,
+    exam_api_sync_view,
+    exam_heartbeat_view,
     finish_exam_view,
     generate_test_view,
     viewquestions_view,
@@ -27,6 +30,7 @@ from exams.views import (
     randomize_view,
     window_event_view,
     video_feed_view,
+    video_feed_frame_view,
     calculator_view,
     create_test_view,
     create_test_lqa_view,
@@ -65,6 +69,9 @@ urlpatterns = [
     path('', include('accounts.urls')),
     path('give-test/', give_test_view, name='give_test'),
     path('give-test/<str:test_id>/', give_test_exam_view, name='give_test_exam'),
+    path('give-test/<str:test_id>/api/start/', exam_api_start_view, name='exam_api_start'),
+    path('give-test/<str:test_id>/api/sync/', exam_api_sync_view, name='exam_api_sync'),
+    path('give-test/<str:test_id>/heartbeat/', exam_heartbeat_view, name='exam_heartbeat'),
     path('finish-exam/', finish_exam_view, name='finish_exam'),
     path('test-login/', lambda request: render(request, 'test_login.html'), name='test_login'),
     # Professor exam management
@@ -103,6 +110,7 @@ urlpatterns = [
     path('randomize', randomize_view, name='randomize'),
     path('window_event', window_event_view, name='window_event'),
     path('video_feed', video_feed_view, name='video_feed'),
+    path('video_feed/frame', video_feed_frame_view, name='video_feed_frame'),
     path('calc', calculator_view, name='calculator'),
     path('create-test', create_test_view, name='create_test'),
     path('create_test_lqa', create_test_lqa_view, name='create_test_lqa'),
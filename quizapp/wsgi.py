@@ -9,4 +9,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'quizapp.settings')
 
 application = get_wsgi_application()
-  
+
+# Build and warm the face verification model now rather than on the first login
+from accounts import face_verification  # noqa: E402
+
+face_verification.warmup()
@@ -143,102 +143,107 @@ function stopStreaming() {
     }
 }
 
+// Server-driven delay between frames (next_interval_ms), see frame-upload.js
+var nextSnapshotDelay = 3000;
+
 function captureSnapshot() {
     if (null != cameraStream && typeof tid !== 'undefined') {
         var ctx = capture.getContext('2d');
         ctx.drawImage(stream, 0, 0, capture.width, capture.height);
-        var d1 = capture.toDataURL("image/png");
-        var res = d1.replace("data:image/png;base64,", "");
-
         var average = values / length || 0;
 
-        if (res) {
-            $.post("/video_feed", {
-                data: { 'imgData': res, 'voice_db': average, 'testid': tid }
-            }, function (data) {
-                // Handle Termination
-                if (data.status === 'terminate') {
-                    const terminationMessage = "Exam Terminated: Excessive Violations";
-                    if (typeof Swal !== 'undefined') {
-                        Swal.fire({
-                            icon: 'error',
-                            title: terminationMessage,
-                            text: data.message || 'You have exceeded the maximum number of violations. Your exam is being submitted.',
-                            allowOutsideClick: false,
-                            timer: 5000,
-                            timerProgressBar: true
-                        }).then(() => {
-                            document.getElementById('finishBtn').click();
-                        });
-                    } else {
-                        alert(terminationMessage);
+        // Raw JPEG/WebP bytes via canvas.toBlob (see frame-upload.js)
+        uploadFrame(capture, tid, average).then(function (data) {
+            nextSnapshotDelay = nextFrameDelay(data, nextSnapshotDelay);
+
+            // Handle Termination
+            if (data.status === 'terminate') {
+                const terminationMessage = "Exam Terminated: Excessive Violations";
+                if (typeof Swal !== 'undefined') {
+                    Swal.fire({
+                        icon: 'error',
+                        title: terminationMessage,
+                        text: data.message || 'You have exceeded the maximum number of violations. Your exam is being submitted.',
+                        allowOutsideClick: false,
+                        timer: 5000,
+                        timerProgressBar: true
+                    }).then(() => {
                         document.getElementById('finishBtn').click();
-                    }
-                    return;
+                    });
+                } else {
+                    alert(terminationMessage);
+                    document.getElementById('finishBtn').click();
                 }
+                return;
+            }
 
-                // Handle YOLO Warning Popup (New)
-                if (data.status === 'warning_popup' && data.alerts && data.alerts.length > 0) {
-                    try {
-                        const audio = new Audio('/static/assets/alert.mp3');
-                        audio.play().catch(e => { });
-                    } catch (e) { }
-
-                    // Build alert message from alerts array
-                    const currentFlags = data.flags || 0;
-                    const alertHTML = `
-                        <div style="text-align: left;">
-                            <p><strong>⚠️ Proctoring Alert!</strong></p>
-                            <p>Violations detected:</p>
-                            <ul style="margin-left: 20px;">
-                                ${data.alerts.map(alert => `<li>${alert}</li>`).join('')}
-                            </ul>
-                            <p style="color: #f97316;"><strong>Violation Flags: ${currentFlags}/5</strong></p>
-                            <p style="color: #ef4444;"><strong>⚠️ Your exam will be terminated after 5 violations!</strong></p>
-                            <p>Please follow exam guidelines immediately.</p>
-                        </div>
-                    `;
-
-                    if (typeof Swal !== 'undefined') {
-                        // Show a non-blocking warning (no backdrop) so exam controls remain usable
-                        if (!Swal.isVisible()) {
-                            console.log('app.js: showing non-blocking warning popup');
-                            Swal.fire({
-                                icon: 'warning',
-                                title: '⚠️ Exam Alert',
-                                html: alertHTML,
-                                showConfirmButton: true,
-                                confirmButtonText: 'I Understand',
-                                allowOutsideClick: true,
-                                backdrop: false,
-                                timer: 6000,
-                                timerProgressBar: true
-                            });
-                        }
-                    } else {
-                        console.warn("DETECTION ALERT:", data.alerts);
-                    }
-                }
-                // Legacy Warning Toast
-                else if (data.warning) {
-                    if (typeof Swal !== 'undefined') {
-                        const Toast = Swal.mixin({
-                            toast: true,
-                            position: 'top-end',
-                            showConfirmButton: false,
-                            timer: 4000,
+            // Handle YOLO Warning Popup (New)
+            if (data.status === 'warning_popup' && data.alerts && data.alerts.length > 0) {
+                try {
+                    const audio = new Audio('/static/assets/alert.mp3');
+                    audio.play().catch(e => { });
+                } catch (e) { }
+
+                // Build alert message from alerts array
+                const currentFlags = data.flags || 0;
+                const alertHTML = `
+                    <div style="text-align: left;">
+                        <p><strong>⚠️ Proctoring Alert!</strong></p>
+                        <p>Violations detected:</p>
+                        <ul style="margin-left: 20px;">
+                            ${data.alerts.map(alert => `<li>${alert}</li>`).join('')}
+                        </ul>
+                        <p style="color: #f97316;"><strong>Violation Flags: ${currentFlags}/5</strong></p>
+                        <p style="color: #ef4444;"><strong>⚠️ Your exam will be terminated after 5 violations!</strong></p>
+                        <p>Please follow exam guidelines immediately.</p>
+                    </div>
+                `;
+
+                if (typeof Swal !== 'undefined') {
+                    // Show a non-blocking warning (no backdrop) so exam controls remain usable
+                    if (!Swal.isVisible()) {
+                        console.log('app.js: showing non-blocking warning popup');
+                        Swal.fire({
+                            icon: 'warning',
+                            title: '⚠️ Exam Alert',
+                            html: alertHTML,
+                            showConfirmButton: true,
+                            confirmButtonText: 'I Understand',
+                            allowOutsideClick: true,
+                            backdrop: false,
+                            timer: 6000,
                             timerProgressBar: true
                         });
-                        Toast.fire({
-                            icon: 'error',
-                            title: data.warning
-                        });
                     }
+                } else {
+                    console.warn("DETECTION ALERT:", data.alerts);
                 }
-            });
-        }
+            }
+            // Legacy Warning Toast
+            else if (data.warning) {
+                if (typeof Swal !== 'undefined') {
+                    const Toast = Swal.mixin({
+                        toast: true,
+                        position: 'top-end',
+                        showConfirmButton: false,
+                        timer: 4000,
+                        timerProgressBar: true
+                    });
+                    Toast.fire({
+                        icon: 'error',
+                        title: data.warning
+                    });
+                }
+            }
+        }).catch(function (err) {
+            console.warn('Frame upload failed:', err);
+        }).then(function () {
+            // Next frame only after this one is answered, at the pace the server asks for
+            setTimeout(captureSnapshot, nextSnapshotDelay);
+        });
+        return;
     }
-    // Continue polling every 2 seconds for YOLO (less heavy than 1s)
+    // Camera not ready yet, check again shortly
     setTimeout(captureSnapshot, 3000);
 }
 
@@ -286,41 +291,28 @@ $(document).ready(function () {
 
         $('.question').remove();
 
-        // Initialize exam
-        $.ajax({
-            type: "POST",
-            url: "/randomize", // or window.location.href if that's where get flag is handled? No, randomize is separate
-            // Actually, looks like randomize view returns the list of question IDs
-            dataType: "json",
-            data: { id: testId },
-            success: function (temp) {
-                console.log("Questions loaded:", temp);
-                // Sort to reverse the randomization and keep order consistent with the backend
-                nos = temp.sort(function (a, b) {
-                    return String(a).localeCompare(String(b));
-                });
-                make_array();
-                // If URL contains ?q= use that index (1-based). Otherwise start at 1.
-                try {
-                    const params = new URLSearchParams(window.location.search);
-                    const qParam = parseInt(params.get('q'));
-                    if (!isNaN(qParam) && qParam >= 1 && qParam <= nos.length) {
-                        curr = qParam - 1;
-                    } else {
-                        curr = 0;
-                    }
-                } catch (e) {
-                    curr = 0;
+        // Initialize exam: one call for the whole question set, then local navigation.
+        // Falls back to fetching each question from the page if the API is unavailable.
+        startExam(testId).then(showInitialQuestion).catch(function (error) {
+            console.warn('Exam API unavailable, loading questions one by one:', error);
+            $.ajax({
+                type: "POST",
+                url: "/randomize",
+                dataType: "json",
+                data: { id: testId },
+                success: function (temp) {
+                    console.log("Questions loaded:", temp);
+                    // Sort to reverse the randomization and keep order consistent with the backend
+                    nos = temp.sort(function (a, b) {
+                        return String(a).localeCompare(String(b));
+                    });
+                    make_array();
+                    showInitialQuestion();
+                },
+                error: function (xhr, status, error) {
+                    console.log("Randomize error:", error);
                 }
-
-                display_ques(curr + 1);
-                ques_grid();
-                updateQueryParamForQuestion(curr + 1);
-            },
-            error: function (xhr, status, error) {
-                console.log("Randomize error:", error);
-                // Fallback if randomize fails? 
-            }
+            });
         });
 
         // Timer setup
@@ -468,6 +460,17 @@ $(document).ready(function () {
 
     // Ensure exam form submits include selected answer
     $(document).on('submit', '#examForm', function (e) {
+        // With the exam API loaded, the buttons act locally instead of posting the form
+        if (examApi) {
+            e.preventDefault();
+            var submitter = e.originalEvent && e.originalEvent.submitter;
+            var action = submitter ? submitter.value : '';
+            if (action === 'next') nextQuestion();
+            else if (action === 'prev') previousQuestion();
+            else if (action === 'submit') submitAnswer();
+            else if (action === 'finish') finishExam();
+            return;
+        }
         try {
             var selected = document.querySelector('input[name="answer-options"]:checked');
             var ansVal = selected ? selected.value : '';
@@ -503,6 +506,122 @@ $(document).ready(function () {
 });
 
 
+// Single-page delivery (exam_api_start_view / exam_api_sync_view): the question set is
+// loaded once, navigation is local and answers are synced in batches with the time left
+var examApi = null;        // {start, sync} URLs once the start call succeeded
+var questionsById = {};
+var pendingAnswers = {};   // qid -> {qid, ans, ts}
+var syncTimer = null;
+var syncing = null;
+const SYNC_BATCH_SIZE = 10;
+
+async function startExam(testId) {
+    var base = '/give-test/' + encodeURIComponent(testId) + '/api/';
+    const response = await fetch(base + 'start/', { credentials: 'same-origin' });
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    const payload = await response.json();
+
+    nos = payload.questions.map(function (q) { return q.qid; });
+    questionsById = {};
+    payload.questions.forEach(function (q) { questionsById[q.qid] = q; });
+    var bookmarked = new Set(payload.bookmarks || []);
+    for (var i = 0; i < nos.length; i++) {
+        var ans = payload.answers[nos[i]];
+        var status = ans ? SUBMITTED : NOT_MARKED;
+        if (bookmarked.has(nos[i])) status = ans ? SUBMITTED_BOOKMARKED : BOOKMARKED;
+        data[i + 1] = { marked: ans || null, status: status };
+    }
+    examApi = { start: base + 'start/', sync: base + 'sync/' };
+    updateQuestionCounter();
+
+    syncTimer = setInterval(function () {
+        syncExam().catch(function (error) { console.warn('Sync failed, will retry:', error); });
+    }, payload.sync_interval_ms || 15000);
+    document.addEventListener('visibilitychange', function () {
+        if (document.visibilityState === 'hidden') {
+            syncExam({ keepalive: true }).catch(function () { });
+        }
+    });
+    return payload;
+}
+
+function showInitialQuestion() {
+    // If URL contains ?q= use that index (1-based). Otherwise start at 1.
+    try {
+        const params = new URLSearchParams(window.location.search);
+        const qParam = parseInt(params.get('q'));
+        if (!isNaN(qParam) && qParam >= 1 && qParam <= nos.length) {
+            curr = qParam - 1;
+        } else {
+            curr = 0;
+        }
+    } catch (e) {
+        curr = 0;
+    }
+
+    display_ques(curr + 1);
+    ques_grid();
+    updateQueryParamForQuestion(curr + 1);
+}
+
+function queueAnswer(qid, ans) {
+    pendingAnswers[qid] = { qid: qid, ans: ans, ts: Date.now() };
+}
+
+function timeLeftSeconds() {
+    var parts = $('#time').text().trim().split(':').map(function (p) { return parseInt(p, 10) || 0; });
+    return parts.reduce(function (total, part) { return total * 60 + part; }, 0);
+}
+
+function bookmarkedQids() {
+    return nos.filter(function (qid, i) {
+        var status = data[i + 1] && data[i + 1].status;
+        return status == BOOKMARKED || status == MARKED_BOOKMARKED || status == SUBMITTED_BOOKMARKED;
+    });
+}
+
+async function syncExam(options) {
+    options = options || {};
+    if (!examApi) return null;
+    // One sync in flight at a time; answers queued meanwhile go with the next one
+    while (syncing) {
+        await syncing.catch(function () { });
+    }
+    var batch = Object.values(pendingAnswers);
+    pendingAnswers = {};
+    var body = { answers: batch, time_left: timeLeftSeconds(), bookmarks: bookmarkedQids() };
+    if (options.completed) body.completed = true;
+
+    syncing = fetch(examApi.sync, {
+        method: 'POST',
+        credentials: 'same-origin',
+        keepalive: !!options.keepalive,
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': getCsrfToken()
+        },
+        body: JSON.stringify(body)
+    }).then(function (response) {
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        return response.json();
+    });
+    try {
+        return await syncing;
+    } catch (error) {
+        // Keep the answers for the next attempt, unless a newer one was queued meanwhile
+        batch.forEach(function (answer) {
+            if (!pendingAnswers[answer.qid]) pendingAnswers[answer.qid] = answer;
+        });
+        throw error;
+    } finally {
+        syncing = null;
+    }
+}
+
 var unmark_all = function () {
     // Uncheck all radio buttons
     $('input[name="answer-options"]').prop('checked', false);
@@ -519,7 +638,8 @@ var display_ques = async function (move) {
     console.log("Displaying question:", move, "qid:", nos[curr]);
 
     try {
-        const response = await apiRequest(window.location.href, { flag: 'get', no: nos[curr] }, 'POST');
+        const response = questionsById[nos[curr]] ||
+            await apiRequest(window.location.href, { flag: 'get', no: nos[curr] }, 'POST');
 
         // document.getElementById('que').textContent = response['q'];
         $('#que').text(response['q']);
@@ -637,13 +757,20 @@ async function submitAnswer() {
     data[curr + 1].status = SUBMITTED;
 
     try {
-        const response = await apiRequest(window.location.href, {
-            flag: 'mark',
-            qid: nos[curr],
-            ans: selectedAnswer
-        }, 'POST');
-
-        console.log('Answer posted successfully', response);
+        if (examApi) {
+            // Saved with the next batch sync (or right away once enough are queued)
+            queueAnswer(nos[curr], selectedAnswer);
+            if (Object.keys(pendingAnswers).length >= SYNC_BATCH_SIZE) {
+                syncExam().catch(function (error) { console.warn('Sync failed, will retry:', error); });
+            }
+        } else {
+            const response = await apiRequest(window.location.href, {
+                flag: 'mark',
+                qid: nos[curr],
+                ans: selectedAnswer
+            }, 'POST');
+            console.log('Answer posted successfully', response);
+        }
         document.getElementById('question-list').innerHTML = '';
         ques_grid();
         updateQuestionCounter();
@@ -759,6 +886,26 @@ function startTimer(duration, display) {
 async function finish_test() {
     console.log("finish_test called");
 
+    if (examApi) {
+        clearInterval(syncTimer);
+        // Unsubmitted selections are saved too, all in the final sync
+        for (let i = 1; i <= nos.length; i++) {
+            if (data[i] && data[i].marked && data[i].status !== SUBMITTED && data[i].status !== SUBMITTED_BOOKMARKED) {
+                queueAnswer(nos[i - 1], data[i].marked);
+            }
+        }
+        for (let attempt = 1; attempt <= 3; attempt++) {
+            try {
+                await syncExam({ completed: true });
+                break;
+            } catch (error) {
+                console.error("Error in final sync (attempt " + attempt + "):", error);
+            }
+        }
+        window.location.replace('/tests-given/');
+        return;
+    }
+
     // Ensure all answered questions are saved before marking as completed
     for (let i = 1; i <= nos.length; i++) {
         if (data[i] && data[i].marked && data[i].status !== SUBMITTED && data[i].status !== SUBMITTED_BOOKMARKED) {
@@ -797,6 +944,11 @@ function sendTime() {
             return;
         }
 
+        if (examApi) {
+            // The time left goes with every answer sync
+            return;
+        }
+
         var timeElem = $('#time');
         if (!timeElem || timeElem.length === 0) {
             console.warn('Time element not found, stopping sendTime');
@@ -832,9 +984,9 @@ function sendTime() {
             // Send time update to server every 10 seconds instead of 5
             $.ajax({
                 type: 'POST',
-                url: window.location.href,
+                url: '/give-test/' + encodeURIComponent(tid) + '/heartbeat/',
                 dataType: "json",
-                data: { flag: 'time', time: seconds },
+                data: { time: seconds },
                 timeout: 5000,
                 error: function (error) {
                     console.warn('Failed to send time update:', error.status);
@@ -122,27 +122,24 @@ function stopStreaming() {
   }
 }
 
+// Server-driven delay between frames (next_interval_ms), see frame-upload.js
+var nextSnapshotDelay = 1000;
+
 function captureSnapshot() {
 
   if (null != cameraStream) {
     var ctx = capture.getContext('2d');
-    var img = new Image();
     ctx.drawImage(stream, 0, 0, capture.width, capture.height);
-    img.src = capture.toDataURL("image/png");
-    img.width = 340;
-    var d1 = capture.toDataURL("image/png");
-    var res = d1.replace("data:image/png;base64,", "");
 
     var average = values / length;
 
     console.log(average)
     console.log(Math.round(average - 40));
 
-    if (res) {
-      $.post("/video_feed", {
-        data: { 'imgData': res, 'voice_db': average, 'testid': tid }
-      },
+    // Raw JPEG/WebP bytes via canvas.toBlob (see frame-upload.js)
+    uploadFrame(capture, tid, average).then(
         function (data) {
+          nextSnapshotDelay = nextFrameDelay(data, nextSnapshotDelay);
           // Handle Termination
           if (data.status === 'terminate') {
             const terminationMessage = "Exam Terminated: Excessive Violations";
@@ -210,9 +207,15 @@ function captureSnapshot() {
               console.warn("VIOLATION:", data.warning);
             }
           }
-        });
-    }
-
+        })
+      .catch(function (err) {
+        console.warn('Frame upload failed:', err);
+      })
+      .then(function () {
+        // Next frame only after this one is answered, at the pace the server asks for
+        setTimeout(captureSnapshot, nextSnapshotDelay);
+      });
+    return;
   }
   setTimeout(captureSnapshot, 1000);
 
@@ -339,8 +342,8 @@ function sendTime() {
       $.ajax({
         type: 'POST',
         dataType: "json",
-        url: "/test_update_time",
-        data: { time: seconds, testid: tid },
+        url: "/give-test/" + encodeURIComponent(tid) + "/heartbeat/",
+        data: { time: seconds },
         timeout: 5000,
         error: function(error) {
           console.warn('Failed to send time update:', error.status);
@@ -91,8 +91,8 @@ function stopCamera() {
 // ==================== FRAME CAPTURE & PROCESSING ====================
 
 /**
- * Capture current frame from video stream
- * @returns {string|null} Base64 encoded image or null
+ * Capture current frame from video stream into the capture canvas
+ * @returns {HTMLCanvasElement|null} Canvas holding the frame or null
  */
 function captureFrame() {
     if (!videoElement || !canvasElement) {
@@ -110,9 +110,8 @@ function captureFrame() {
         ctx.drawImage(videoElement, -canvasElement.width, 0, canvasElement.width, canvasElement.height);
         ctx.restore();
         
-        // Convert to base64
-        const imageData = canvasElement.toDataURL('image/jpeg', 0.8); // 0.8 quality for smaller size
-        return imageData.split(',')[1]; // Remove data:image/jpeg;base64, prefix
+        // Encoding happens in sendFrameForDetection via canvas.toBlob (no base64 copy)
+        return canvasElement;
     } catch (error) {
         console.error('Error capturing frame:', error);
         return null;
@@ -122,36 +121,21 @@ function captureFrame() {
 // ==================== BACKEND COMMUNICATION ====================
 
 /**
- * Send frame to backend for detection
- * @param {string} frameB64 Base64 encoded frame
+ * Send frame to backend for detection as raw JPEG/WebP bytes (see frame-upload.js)
+ * @param {HTMLCanvasElement} frameCanvas Canvas holding the frame
  * @param {string} testId Test ID
+ * @returns {Promise<Object|undefined>} Detection result (undefined on error)
  */
-async function sendFrameForDetection(frameB64, testId) {
-    if (!frameB64 || frameB64.length === 0) {
+async function sendFrameForDetection(frameCanvas, testId) {
+    if (!frameCanvas) {
         console.warn('Empty frame');
         return;
     }
 
     try {
-        const response = await fetch('/exams/detect-cheating/', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/x-www-form-urlencoded',
-                'X-CSRFToken': getCSRFToken()
-            },
-            body: new URLSearchParams({
-                'data[imgData]': frameB64,
-                'data[testid]': testId
-            })
-        });
-
-        if (!response.ok) {
-            console.error(`HTTP error! status: ${response.status}`);
-            return;
-        }
-
-        const result = await response.json();
+        const result = await uploadFrame(frameCanvas, testId);
         handleDetectionResult(result);
+        return result;
     } catch (error) {
         console.error('Error sending frame:', error);
     }
@@ -329,19 +313,20 @@ async function startMonitoring(testId) {
     const monitoringLoop = async () => {
         if (!isMonitoring) return;
 
+        let result;
         try {
             // Capture frame
-            const frameB64 = captureFrame();
-            if (frameB64) {
+            const frame = captureFrame();
+            if (frame) {
                 // Send for detection
-                await sendFrameForDetection(frameB64, testId);
+                result = await sendFrameForDetection(frame, testId);
             }
         } catch (error) {
             console.error('Monitoring error:', error);
         }
 
-        // Schedule next frame
-        setTimeout(monitoringLoop, FRAME_SEND_INTERVAL);
+        // Schedule next frame (server hint, else the default interval)
+        setTimeout(monitoringLoop, nextFrameDelay(result, FRAME_SEND_INTERVAL));
     };
 
     // Start monitoring loop
@@ -0,0 +1,72 @@
+/**
+ * NocheatZone - Binary frame upload
+ * Encodes the capture canvas with canvas.toBlob and posts the raw JPEG/WebP bytes to
+ * /video_feed/frame, instead of a base64 PNG data URL in a form field (legacy /video_feed).
+ *
+ * FRAME_UPLOAD_TYPE / FRAME_UPLOAD_QUALITY are set by the exam templates from settings.
+ * The server answers with next_interval_ms; capture loops wait that long before the next frame.
+ */
+
+var FRAME_UPLOAD_URL = '/video_feed/frame';
+
+function frameUploadCsrfToken() {
+    const name = 'csrftoken';
+    if (document.cookie && document.cookie !== '') {
+        const cookies = document.cookie.split(';');
+        for (let i = 0; i < cookies.length; i++) {
+            const cookie = cookies[i].trim();
+            if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                return decodeURIComponent(cookie.substring(name.length + 1));
+            }
+        }
+    }
+    const input = document.querySelector('[name=csrfmiddlewaretoken]');
+    return input ? input.value : null;
+}
+
+/**
+ * Encode the canvas and send it for detection.
+ * @param {HTMLCanvasElement} canvas Canvas holding the current frame
+ * @param {string} testId Test ID
+ * @param {number} voiceDb Average microphone level (optional)
+ * @returns {Promise<Object>} Parsed JSON response from the server
+ */
+function uploadFrame(canvas, testId, voiceDb) {
+    const type = (typeof FRAME_UPLOAD_TYPE !== 'undefined' && FRAME_UPLOAD_TYPE) || 'image/jpeg';
+    const quality = (typeof FRAME_UPLOAD_QUALITY !== 'undefined' && FRAME_UPLOAD_QUALITY) || 0.7;
+
+    return new Promise(function (resolve, reject) {
+        canvas.toBlob(function (blob) {
+            if (!blob) {
+                reject(new Error('Frame encoding failed'));
+                return;
+            }
+            const params = new URLSearchParams({ testid: testId, voice_db: voiceDb || 0 });
+            fetch(FRAME_UPLOAD_URL + '?' + params.toString(), {
+                method: 'POST',
+                credentials: 'same-origin',
+                headers: {
+                    'Content-Type': blob.type || 'application/octet-stream',
+                    'X-CSRFToken': frameUploadCsrfToken()
+                },
+                body: blob
+            }).then(function (response) {
+                if (!response.ok) {
+                    throw new Error(`HTTP error! status: ${response.status}`);
+                }
+                return response.json();
+            }).then(resolve, reject);
+        }, type, quality);
+    });
+}
+
+/**
+ * Delay before the next frame: the server's next_interval_ms hint when present.
+ * @param {Object} data Response from uploadFrame (may be undefined after an error)
+ * @param {number} fallbackMs Delay to use without a hint
+ * @returns {number} Milliseconds to wait
+ */
+function nextFrameDelay(data, fallbackMs) {
+    const hint = data ? parseInt(data.next_interval_ms, 10) : NaN;
+    return hint > 0 ? hint : fallbackMs;
+}
@@ -104,12 +104,12 @@ def test_face_verification_components():
 
 def test_database_user_images():
     """Test that user images exist in database"""
-    from accounts.models import User
+    from accounts.models import FaceProfile, User
 
     print("\nUser Image Database Test")
     print("=" * 30)
 
-    users_with_images = User.objects.exclude(user_image__isnull=True).exclude(user_image='').count()
+    users_with_images = FaceProfile.objects.exclude(image='').count()
     total_users = User.objects.count()
 
     print(f"Users with images: {users_with_images}/{total_users}")